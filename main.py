@@ -1,17 +1,30 @@
 import os
+import asyncio
 import logging
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from logging.handlers import RotatingFileHandler
 from settings import settings
+import database
 from database import Base, engine
 from routers.administracao   import router as administracao_router
+from routers.alteracoes      import router as alteracoes_router
 from routers.evolucoes       import router as evolucoes_router
 from routers.internacoes     import router as internacoes_router
 from routers.pacientes       import router as pacientes_router
 from routers.profissionais   import router as profissionais_router
 from routers.telemedicina    import router as telemedicina_router
 from routers.usuarios        import router as usuarios_router
+from utils.ocupacao          import painel_ocupacao
+from utils.alertas           import job_alertas_diario
+from utils.interacoes        import indice_interacoes
+from utils.autocomplete      import carregar_autocomplete
+from utils.financeiro        import semear_consolidado
+from utils.busca_clinica     import semear_busca
+from utils.esquema           import adicionar_colunas_ausentes, criar_indices_ausentes
+from utils.compressao        import sincronizar_colunas
+from utils.alteracoes        import job_compactacao_diaria
+from utils.idempotencia      import MiddlewareIdempotencia
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -34,19 +47,53 @@ async def lifespan(app: FastAPI):
     uvicorn_logger = logging.getLogger("uvicorn.access")
     uvicorn_logger.addHandler(handler)
 
-    # Cria todas as tabelas (se ainda não existirem)
+    # Cria todas as tabelas (se ainda não existirem) e as colunas e índices novos das existentes;
+    # antes, os textos comprimidos adotam o tipo real das colunas já criadas
+    sincronizar_colunas(engine)
     Base.metadata.create_all(bind=engine)
+    adicionar_colunas_ausentes(engine)
+    criar_indices_ausentes(engine)
+
+    # Carrega os contadores de ocupação de leitos e os índices de autocomplete uma única vez
+    # e preenche o consolidado financeiro e o índice de busca se acabaram de ser criados
+    db = database.SessionLocal()
+    try:
+        painel_ocupacao.inicializar(db)
+        carregar_autocomplete(db)
+        semear_consolidado(db)
+        semear_busca(db)
+    finally:
+        db.close()
+
+    # Compila a tabela de interações medicamentosas (recarregada ao mudar o CSV)
+    indice_interacoes.carregar()
+
+    # Job diário de alertas de estoque (apenas com destinatário configurado)
+    job_alertas = None
+    if settings.alertas_email:
+        job_alertas = asyncio.create_task(job_alertas_diario())
+
+    # Compactação e retenção diárias do feed de alterações
+    job_compactacao = asyncio.create_task(job_compactacao_diaria())
 
     yield
 
+    if job_alertas:
+        job_alertas.cancel()
+    job_compactacao.cancel()
+
     # Fecha o handler ao encerrar a aplicação
     handler.close()
 
 # Cria a aplicação usando Lifespan Events
 app = FastAPI(lifespan=lifespan)
 
+# Retentativas de POST com Idempotency-Key recebem a resposta original
+app.add_middleware(MiddlewareIdempotencia)
+
 # Registra os routers com prefix e tags
 app.include_router(administracao_router,   prefix="/administracao",   tags=["administracao"])
+app.include_router(alteracoes_router,      prefix="/alteracoes",      tags=["alteracoes"])
 app.include_router(evolucoes_router,       prefix="/evolucoes",       tags=["evolucoes"])
 app.include_router(internacoes_router,     prefix="/internacoes",     tags=["internacoes"])
 app.include_router(pacientes_router,       prefix="/pacientes",       tags=["pacientes"])
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
 class AgendaMedica(Base):
     __tablename__ = "agenda_medica"
+    __table_args__ = (
+        # Janelas de agenda por profissional: busca por intervalo de data_hora
+        Index("ix_agenda_profissional_data_hora", "profissional_id", "data_hora"),
+    )
 
     id             = Column(Integer, primary_key=True)
     profissional_id= Column(Integer, ForeignKey("profissionais.id"), index=True)
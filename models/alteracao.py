@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from sqlalchemy import (
+    Column, Integer, String, DateTime, Text, Index
+)
+from database import Base
+
+class Alteracao(Base):
+    __tablename__ = "alteracoes"
+    __table_args__ = (
+        # Compactação: última alteração de cada registro
+        Index("ix_alteracoes_entidade_registro", "entidade", "registro_id"),
+        # seq nunca é reaproveitado no SQLite, mesmo após a retenção esvaziar a tabela
+        {"sqlite_autoincrement": True},
+    )
+
+    seq           = Column(Integer, primary_key=True, autoincrement=True)
+    entidade      = Column(String(30), nullable=False)
+    registro_id   = Column(Integer,    nullable=False)
+    operacao      = Column(String(10), nullable=False)   # "upsert" ou "delete"
+    dados         = Column(Text,       nullable=True)    # JSON com as colunas do registro
+    registrado_em = Column(
+                      DateTime(timezone=True),
+                      default=lambda: datetime.now(timezone.utc),
+                      nullable=False,
+                      index=True
+                    )
+
+class CorteAlteracoes(Base):
+    __tablename__ = "alteracoes_corte"
+
+    id    = Column(Integer, primary_key=True)
+    # Maior seq removido pela retenção: clientes com `desde` menor precisam de carga completa
+    seq   = Column(Integer, nullable=False, server_default="0")
\ No newline at end of file
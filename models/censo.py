@@ -0,0 +1,17 @@
+from sqlalchemy import (
+    Column, Integer, String, Date,
+    UniqueConstraint
+)
+from database import Base
+
+class CensoDiario(Base):
+    __tablename__ = "censo_diario"
+    __table_args__ = (
+        UniqueConstraint("dia", "unidade", "tipo", name="uq_censo_dia_unidade_tipo"),
+    )
+
+    id         = Column(Integer, primary_key=True)
+    dia        = Column(Date,       nullable=False, index=True)
+    unidade    = Column(String(50), nullable=False, index=True)
+    tipo       = Column(String(50), nullable=False, index=True)
+    ocupados   = Column(Integer,    nullable=False)
\ No newline at end of file
@@ -4,6 +4,7 @@ from sqlalchemy import (
     String,
     DateTime,
     ForeignKey,
+    Index,
     Enum as SqEnum,
 )
 from sqlalchemy.orm import relationship
@@ -17,6 +18,11 @@ class StatusConsulta(PyEnum):
 
 class Consulta(Base):
     __tablename__ = "consultas"
+    __table_args__ = (
+        Index("ix_consultas_profissional_data_hora", "profissional_id", "data_hora"),
+        # Linha do tempo do paciente
+        Index("ix_consultas_paciente_data_hora", "paciente_id", "data_hora"),
+    )
 
     id              = Column(Integer, primary_key=True)
     paciente_id     = Column(Integer, ForeignKey("pacientes.id"), index=True)
@@ -1,18 +1,23 @@
 from sqlalchemy import (
-    Column, Integer, ForeignKey, Text,
-    DateTime, func
+    Column, Integer, ForeignKey,
+    DateTime, Index, func
 )
 from sqlalchemy.orm import relationship
 from database import Base
+from models.tipos import TextoComprimido
 
 class EvolucaoClinica(Base):
     __tablename__ = "evolucoes_clinicas"
+    __table_args__ = (
+        # Linha do tempo do paciente
+        Index("ix_evolucoes_paciente_data_registro", "paciente_id", "data_registro"),
+    )
 
     id               = Column(Integer, primary_key=True)
     paciente_id      = Column(Integer, ForeignKey("pacientes.id"), index=True, nullable=False)
     profissional_id  = Column(Integer, ForeignKey("profissionais.id"), index=True, nullable=False)
     data_registro    = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
-    anotacoes        = Column(Text, nullable=False)
+    anotacoes        = Column(TextoComprimido, nullable=False)
 
     paciente         = relationship("Paciente", back_populates="evolucoes_clinicas")
     profissional     = relationship("Profissional", back_populates="evolucoes_clinicas")
\ No newline at end of file
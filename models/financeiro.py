@@ -5,12 +5,19 @@ from sqlalchemy import (
     Text,
     Numeric,
     DateTime,
+    Date,
+    Index,
+    UniqueConstraint,
     func
 )
 from database import Base
 
 class LancamentoFinanceiro(Base):
     __tablename__ = "lancamentos_financeiros"
+    __table_args__ = (
+        # Resumos por período: faixa em data_lancamento, filtrando por tipo
+        Index("ix_lancamentos_data_tipo", "data_lancamento", "tipo"),
+    )
 
     id               = Column(Integer, primary_key=True)
     tipo             = Column(String(30), index=True, nullable=False)
@@ -23,4 +30,21 @@ class LancamentoFinanceiro(Base):
         index=True
     )
     unidade          = Column(String(50), nullable=True)
-    descricao        = Column(Text, nullable=True)
\ No newline at end of file
+    descricao        = Column(Text, nullable=True)
+    # Chave do sistema de origem (banco/ERP) para deduplicar importações
+    referencia_externa = Column(String(100), unique=True, nullable=True, index=True)
+
+
+class ConsolidadoFinanceiroDiario(Base):
+    __tablename__ = "consolidado_financeiro_diario"
+    __table_args__ = (
+        UniqueConstraint("dia", "unidade", "categoria", "tipo", name="uq_consolidado_dia_dimensoes"),
+    )
+
+    id          = Column(Integer, primary_key=True)
+    dia         = Column(Date, nullable=False, index=True)
+    unidade     = Column(String(50), nullable=False, server_default="")
+    categoria   = Column(String(50), nullable=False)
+    tipo        = Column(String(30), nullable=False)   # sempre em minúsculas
+    total       = Column(Numeric(14, 2), nullable=False)
+    quantidade  = Column(Integer, nullable=False)
\ No newline at end of file
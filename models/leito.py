@@ -1,11 +1,15 @@
 from sqlalchemy import (
-    Column, Integer, String, Boolean
+    Column, Integer, String, Boolean, Index
 )
 from sqlalchemy.orm import relationship
 from database import Base
 
 class Leito(Base):
     __tablename__ = "leitos"
+    __table_args__ = (
+        # Atribuição automática: leitos livres por unidade e tipo
+        Index("ix_leitos_unidade_tipo_ocupado", "unidade", "tipo", "ocupado"),
+    )
 
     id        = Column(Integer, primary_key=True)
     numero    = Column(String(30),   index=True, nullable=False)
@@ -1,9 +1,11 @@
+from datetime import datetime, timezone
 from sqlalchemy import (
     Column, Integer, String,
-    DateTime, Text, ForeignKey, func
+    DateTime, ForeignKey, Index, func
 )
 from sqlalchemy.orm import relationship
 from database import Base
+from models.tipos import TextoComprimido
 
 class Paciente(Base):
     __tablename__ = "pacientes"
@@ -13,6 +15,17 @@ class Paciente(Base):
     email            = Column(String(150), unique=True, nullable=False, index=True)
     telefone         = Column(String(20), nullable=True)
     data_nascimento  = Column(DateTime(timezone=True), nullable=True, index=True)
+    # Versão (incrementada pelo ORM a cada UPDATE) e data da última alteração: ETag/Last-Modified
+    versao           = Column(Integer, nullable=False, server_default="1")
+    atualizado_em    = Column(
+                          DateTime(timezone=True),
+                          default=lambda: datetime.now(timezone.utc),
+                          onupdate=lambda: datetime.now(timezone.utc),
+                          server_default=func.now(),
+                          nullable=False
+                      )
+
+    __mapper_args__ = {"version_id_col": versao}
 
     evolucoes_clinicas = relationship(
         "EvolucaoClinica",
@@ -48,6 +61,10 @@ class Paciente(Base):
 
 class HistoricoClinico(Base):
     __tablename__ = "historicos_clinicos"
+    __table_args__ = (
+        # Linha do tempo do paciente
+        Index("ix_historicos_paciente_data_registro", "paciente_id", "data_registro"),
+    )
 
     id             = Column(Integer, primary_key=True)
     paciente_id    = Column(Integer, ForeignKey("pacientes.id"), nullable=False, index=True)
@@ -57,7 +74,7 @@ class HistoricoClinico(Base):
                       nullable=False,
                       index=True
                     )
-    descricao      = Column(Text, nullable=False)
+    descricao      = Column(TextoComprimido, nullable=False)
     profissional   = Column(String(100), nullable=False)
 
     paciente       = relationship("Paciente", back_populates="historicos_clinicos")
\ No newline at end of file
@@ -4,14 +4,19 @@ from sqlalchemy import (
     String,
     DateTime,
     ForeignKey,
-    Text,
+    Index,
     func
 )
 from sqlalchemy.orm import relationship
 from database import Base
+from models.tipos import TextoComprimido
 
 class Prescricao(Base):
     __tablename__ = "prescricoes"
+    __table_args__ = (
+        # Linha do tempo do paciente
+        Index("ix_prescricoes_paciente_data_prescricao", "paciente_id", "data_prescricao"),
+    )
 
     id               = Column(Integer, primary_key=True)
     paciente_id      = Column(Integer, ForeignKey("pacientes.id"), index=True, nullable=False)
@@ -23,7 +28,7 @@ class Prescricao(Base):
                           index=True
                        )
     medicamento      = Column(String(100), index=True, nullable=False)
-    posologia        = Column(Text, nullable=False)
+    posologia        = Column(TextoComprimido, nullable=False)
 
     paciente         = relationship("Paciente", back_populates="prescricoes")
     profissional     = relationship("Profissional", back_populates="prescricoes")
\ No newline at end of file
@@ -1,5 +1,6 @@
+from datetime import datetime, timezone
 from sqlalchemy import (
-    Column, Integer, String
+    Column, Integer, String, DateTime, func
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -12,6 +13,20 @@ class Profissional(Base):
     email             = Column(String(150), unique=True, nullable=False, index=True)
     especialidade     = Column(String(100), nullable=False, index=True)
     registro_conselho = Column(String(50), unique=True, nullable=False, index=True)
+    # Versão (incrementada pelo ORM a cada UPDATE) e data da última alteração: ETag/Last-Modified
+    versao            = Column(Integer, nullable=False, server_default="1")
+    atualizado_em     = Column(
+                          DateTime(timezone=True),
+                          default=lambda: datetime.now(timezone.utc),
+                          onupdate=lambda: datetime.now(timezone.utc),
+                          server_default=func.now(),
+                          nullable=False
+                        )
+    # Mantidos por utils.versoes a cada alteração em agenda_medica
+    agenda_versao     = Column(Integer, nullable=False, server_default="0")
+    agenda_atualizada_em = Column(DateTime(timezone=True), nullable=True)
+
+    __mapper_args__ = {"version_id_col": versao}
 
     evolucoes_clinicas = relationship(
         "EvolucaoClinica",
@@ -3,7 +3,9 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    ForeignKey,
     CheckConstraint,
+    Index,
     func
 )
 from database import Base
@@ -14,13 +16,48 @@ class Suprimento(Base):
     id             = Column(Integer, primary_key=True)
     nome           = Column(String(100), index=True, nullable=False)
     categoria      = Column(String(50), index=True, nullable=False)
+    # Estoque atual: soma dos lotes, mantida pelas movimentações
     quantidade     = Column(Integer, nullable=False)
     data_validade  = Column(
                       DateTime(timezone=True),
                       nullable=True,
                       index=True
                     )
+    # Ponto de reposição: alerta quando quantidade <= estoque_minimo
+    estoque_minimo = Column(Integer, nullable=True, index=True)
 
     __table_args__ = (
         CheckConstraint("quantidade >= 0", name="chk_quantidade_nao_negativa"),
-    )
\ No newline at end of file
+    )
+
+
+class LoteSuprimento(Base):
+    __tablename__ = "lotes_suprimentos"
+
+    id             = Column(Integer, primary_key=True)
+    suprimento_id  = Column(Integer, ForeignKey("suprimentos.id"), nullable=False, index=True)
+    codigo         = Column(String(50), nullable=True)
+    data_validade  = Column(DateTime(timezone=True), nullable=True, index=True)
+    quantidade     = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("quantidade >= 0", name="chk_lote_quantidade_nao_negativa"),
+        # FEFO: lotes do suprimento pela validade mais próxima
+        Index("ix_lotes_suprimento_validade", "suprimento_id", "data_validade"),
+    )
+
+
+class MovimentacaoEstoque(Base):
+    __tablename__ = "movimentacoes_estoque"
+
+    id                 = Column(Integer, primary_key=True)
+    suprimento_id      = Column(Integer, ForeignKey("suprimentos.id"), nullable=False, index=True)
+    lote_id            = Column(Integer, ForeignKey("lotes_suprimentos.id"), nullable=True, index=True)
+    tipo               = Column(String(10), nullable=False)    # entrada | saida
+    quantidade         = Column(Integer, nullable=False)
+    data_movimentacao  = Column(
+                          DateTime(timezone=True),
+                          server_default=func.now(),
+                          nullable=False,
+                          index=True
+                        )
\ No newline at end of file
@@ -1,15 +1,22 @@
+from datetime import datetime, timezone
 from sqlalchemy import (
     Column, Integer, String,
     DateTime, Text, ForeignKey,
-    func, UniqueConstraint
+    func, UniqueConstraint, Index,
+    Enum as SqEnum
 )
 from sqlalchemy.orm import relationship
 from database import Base
+from models.consulta import StatusConsulta
 
 class ConsultaTelemedicina(Base):
     __tablename__ = "consultas_telemedicina"
     __table_args__ = (
         UniqueConstraint("link_video", name="uq_telemedicina_link"),
+        # Detecção de conflitos: faixa de início por profissional, com a duração no índice
+        Index("ix_telemedicina_profissional_data_hora", "profissional_id", "data_hora", "duracao_minutos"),
+        # Linha do tempo do paciente
+        Index("ix_telemedicina_paciente_data_hora", "paciente_id", "data_hora"),
     )
 
     id               = Column(Integer, primary_key=True)
@@ -21,8 +28,18 @@ class ConsultaTelemedicina(Base):
                           nullable=False,
                           index=True
                       )
+    duracao_minutos  = Column(Integer, nullable=False, server_default="30")
     link_video       = Column(String(200), nullable=False, index=True)
     observacoes      = Column(Text, nullable=True)
+    status           = Column(SqEnum(StatusConsulta), server_default="Agendada", nullable=False)
+    # Data da última alteração (o polling usa o seq do feed de alterações)
+    atualizado_em    = Column(
+                          DateTime(timezone=True),
+                          default=lambda: datetime.now(timezone.utc),
+                          onupdate=lambda: datetime.now(timezone.utc),
+                          server_default=func.now(),
+                          nullable=False
+                      )
 
     paciente         = relationship("Paciente", back_populates="telemedicinas")
     profissional     = relationship("Profissional", back_populates="telemedicinas")
\ No newline at end of file
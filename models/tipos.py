@@ -0,0 +1,72 @@
+import zlib
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.types import TypeDecorator
+
+from settings import settings
+
+class TextoComprimido(TypeDecorator):
+    """
+    Texto longo comprimido com zlib acima de `settings.textos_compressao_limite`
+    bytes (opt-in via `settings.textos_compressao`). Valores comprimidos são
+    gravados como BLOB com o prefixo MARCA; os demais continuam como texto,
+    então linhas antigas e novas convivem na mesma coluna e a leitura é
+    transparente. Filtros SQL (LIKE) não enxergam o conteúdo comprimido.
+    Fora do SQLite a coluna é criada binária com a compressão ligada e TEXT
+    sem ela; em tabelas existentes vale o tipo real da coluna
+    (`coluna_binaria`, preenchido por utils.compressao.sincronizar_colunas
+    na inicialização), então mudar a configuração não troca o tipo gravado.
+    """
+    impl = Text
+    cache_ok = True
+
+    MARCA = b"\x00z1"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # None: coluna ainda não inspecionada (ou a criar); segue a configuração
+        self.coluna_binaria = None
+
+    def load_dialect_impl(self, dialect):
+        # SQLite tem tipagem dinâmica: TEXT e BLOB na mesma coluna.
+        # Nos demais bancos a coluna é binária (UTF-8 ou zlib) ou TEXT (sem compressão).
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(Text())
+        binaria = settings.textos_compressao if self.coluna_binaria is None else self.coluna_binaria
+        return dialect.type_descriptor(LargeBinary() if binaria else Text())
+
+    def binario(self, dialect) -> bool:
+        """
+        True se a coluna é binária neste banco (filtros SQL não leem o texto).
+        """
+        return isinstance(self.dialect_impl(dialect).impl, LargeBinary)
+
+    @classmethod
+    def comprimir(cls, texto: str, dialect_name: str = "sqlite", binario: bool = False):
+        dados = texto.encode("utf-8")
+        pode_comprimir = dialect_name == "sqlite" or binario
+        if pode_comprimir and settings.textos_compressao and len(dados) >= settings.textos_compressao_limite:
+            return cls.MARCA + zlib.compress(dados, settings.textos_compressao_nivel)
+        return dados if binario else texto
+
+    @classmethod
+    def descomprimir(cls, valor) -> str:
+        if isinstance(valor, str):
+            return valor
+        dados = bytes(valor)
+        if dados.startswith(cls.MARCA):
+            return zlib.decompress(dados[len(cls.MARCA):]).decode("utf-8")
+        return dados.decode("utf-8")
+
+    @classmethod
+    def esta_comprimido(cls, valor) -> bool:
+        return isinstance(valor, (bytes, memoryview)) and bytes(valor[:len(cls.MARCA)]) == cls.MARCA
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self.comprimir(value, dialect.name, self.binario(dialect))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.descomprimir(value)
@@ -1,7 +1,11 @@
+import os
+import re
 from fastapi import APIRouter, Depends, HTTPException, Request
-from pydantic import BaseModel
-from typing import List
-from datetime import datetime
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime, date
 from sqlalchemy.orm import Session
 from database import get_db
 from models.leito import Leito
@@ -9,7 +13,25 @@ from models.suprimento import Suprimento
 from models.financeiro import LancamentoFinanceiro
 from routers.usuarios import verificar_permissao
 from models.usuario import PerfilEnum
+from settings import settings
 from utils.logs import registrar_log
+from utils.ocupacao import painel_ocupacao
+from utils.cache import cache_leitura
+from utils.leitura import Campos, campos_de, listar
+from utils.respostas import responder_lista, responder_valores
+from utils.censo import consultar_censo
+from utils.indicadores import DIMENSOES as DIMENSOES_INDICADORES, indicadores_internacao
+from utils.financeiro import (
+    DIMENSOES as DIMENSOES_FINANCEIRO,
+    consolidar_lancamento,
+    reconstruir_consolidado,
+    resumir_lancamentos,
+    verificar_consolidado,
+)
+from utils.alertas import alertas_estoque, limpar_cache as limpar_cache_alertas, notificar_alertas
+from utils.estoque import listar_lotes_fefo, registrar_entrada, registrar_saida
+from utils.ingestao import FORMATOS, ImportacaoLote, linhas_do_corpo
+from utils.relatorios import DIMENSOES as DIMENSOES_PIVO, limpar_cache, pivo_csv, pivo_financeiro
 
 router = APIRouter(
     prefix="/administracao",
@@ -22,12 +44,44 @@ class SuprimentoIn(BaseModel):
     categoria: str
     quantidade: int
     data_validade: datetime
+    estoque_minimo: Optional[int] = None
 
 class SuprimentoOut(SuprimentoIn):
     id: int
     class ConfigDict:
         from_attributes = True
 
+class EntradaEstoqueIn(BaseModel):
+    quantidade: int = Field(gt=0)
+    lote: Optional[str] = None
+    data_validade: Optional[datetime] = None
+
+class SaidaEstoqueIn(BaseModel):
+    quantidade: int = Field(gt=0)
+
+class MovimentacaoOut(BaseModel):
+    id: int
+    lote_id: Optional[int]
+    tipo: str
+    quantidade: int
+
+    class ConfigDict:
+        from_attributes = True
+
+class EstoqueOut(BaseModel):
+    suprimento_id: int
+    quantidade: int
+    movimentacoes: List[MovimentacaoOut]
+
+class LoteOut(BaseModel):
+    id: int
+    codigo: Optional[str]
+    data_validade: Optional[datetime]
+    quantidade: int
+
+    class ConfigDict:
+        from_attributes = True
+
 class LeitoIn(BaseModel):
     numero: str
     tipo: str
@@ -39,6 +93,18 @@ class LeitoOut(LeitoIn):
     class ConfigDict:
         from_attributes = True
 
+class OcupacaoOut(BaseModel):
+    unidade: str
+    tipo: str
+    livres: int
+    ocupados: int
+
+class CensoOut(BaseModel):
+    dia: date
+    unidade: str
+    tipo: str
+    ocupados: int
+
 class LancamentoIn(BaseModel):
     tipo: str
     categoria: str
@@ -46,6 +112,7 @@ class LancamentoIn(BaseModel):
     data_lancamento: datetime
     unidade: str
     descricao: str
+    referencia_externa: Optional[str] = None
 
 class LancamentoOut(LancamentoIn):
     id: int
@@ -63,9 +130,14 @@ def cadastrar_suprimento(
     request: Request,
     db: Session = Depends(get_db)
 ):
-    novo = Suprimento(**item.model_dump())
+    # O estoque inicial entra como primeiro lote, mantendo quantidade == soma dos lotes
+    novo = Suprimento(**item.model_dump(exclude={"quantidade"}), quantidade=0)
     db.add(novo)
+    db.flush()
+    if item.quantidade:
+        registrar_entrada(db, novo.id, item.quantidade, item.data_validade)
     db.commit()
+    limpar_cache_alertas()
     db.refresh(novo)
     registrar_log(
         request, db,
@@ -77,12 +149,94 @@ def cadastrar_suprimento(
 @router.get("/suprimentos", response_model=List[SuprimentoOut])
 def listar_suprimentos(
     request: Request,
+    campos: Campos = Depends(campos_de(SuprimentoOut)),
     db: Session = Depends(get_db)
 ):
-    registros = db.query(Suprimento).all()
+    registros = responder_lista(db.query(Suprimento), Suprimento, SuprimentoOut, campos)
     registrar_log(request, db, token="", descricao="Listagem de suprimentos")
     return registros
 
+@router.post(
+    "/suprimentos/{suprimento_id}/entrada",
+    response_model=EstoqueOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def entrada_estoque(
+    suprimento_id: int,
+    entrada: EntradaEstoqueIn,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    suprimento = db.query(Suprimento).filter_by(id=suprimento_id).first()
+    if not suprimento:
+        raise HTTPException(status_code=404, detail="Suprimento não encontrado")
+
+    movs = registrar_entrada(db, suprimento_id, entrada.quantidade, entrada.data_validade, entrada.lote)
+    db.commit()
+    limpar_cache_alertas()
+    registrar_log(request, db, token="", descricao=f"Entrada de {entrada.quantidade} no suprimento {suprimento_id}")
+    return {"suprimento_id": suprimento_id, "quantidade": suprimento.quantidade, "movimentacoes": movs}
+
+@router.post(
+    "/suprimentos/{suprimento_id}/saida",
+    response_model=EstoqueOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def saida_estoque(
+    suprimento_id: int,
+    saida: SaidaEstoqueIn,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    suprimento = db.query(Suprimento).filter_by(id=suprimento_id).first()
+    if not suprimento:
+        raise HTTPException(status_code=404, detail="Suprimento não encontrado")
+
+    movs = registrar_saida(db, suprimento_id, saida.quantidade)
+    if movs is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Estoque insuficiente")
+    db.commit()
+    limpar_cache_alertas()
+    registrar_log(request, db, token="", descricao=f"Saída de {saida.quantidade} do suprimento {suprimento_id}")
+    return {"suprimento_id": suprimento_id, "quantidade": suprimento.quantidade, "movimentacoes": movs}
+
+@router.get(
+    "/suprimentos/alertas",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def listar_alertas_estoque(
+    request: Request,
+    dias: int = settings.alertas_dias_validade,
+    db: Session = Depends(get_db)
+):
+    alertas = alertas_estoque(db, dias)
+    registrar_log(request, db, token="", descricao="Alertas de estoque")
+    return alertas
+
+@router.post(
+    "/suprimentos/alertas/notificar",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def notificar_alertas_estoque(
+    request: Request,
+    dias: int = settings.alertas_dias_validade,
+    db: Session = Depends(get_db)
+):
+    enviado = notificar_alertas(db, dias)
+    registrar_log(request, db, token="", descricao="Notificação de alertas de estoque")
+    return {"enviado": enviado}
+
+@router.get("/suprimentos/{suprimento_id}/lotes", response_model=List[LoteOut])
+def listar_lotes(
+    suprimento_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    lotes = listar_lotes_fefo(db, suprimento_id)
+    registrar_log(request, db, token="", descricao=f"Listagem de lotes do suprimento {suprimento_id}")
+    return lotes
+
 @router.post(
     "/leitos",
     response_model=LeitoOut,
@@ -97,17 +251,93 @@ def cadastrar_leito(
     db.add(novo)
     db.commit()
     db.refresh(novo)
+    painel_ocupacao.leito_cadastrado(novo.unidade, novo.tipo)
+    cache_leitura.invalidar("leitos")
     registrar_log(request, db, token="", descricao=f"Cadastro de leito {novo.numero}")
     return novo
 
 @router.get("/leitos", response_model=List[LeitoOut])
 def listar_leitos(
     request: Request,
+    campos: Campos = Depends(campos_de(LeitoOut)),
     db: Session = Depends(get_db)
 ):
-    registros = db.query(Leito).all()
+    registros = cache_leitura.obter_ou_carregar(
+        "leitos", ("listar_leitos",),
+        lambda: [linha._asdict() for linha in listar(db.query(Leito), Leito, LeitoOut)]
+    )
     registrar_log(request, db, token="", descricao="Listagem de leitos")
-    return registros
+    return responder_valores(registros, campos)
+
+@router.get(
+    "/cache/metricas",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def metricas_cache():
+    return cache_leitura.metricas()
+
+@router.get("/leitos/ocupacao", response_model=List[OcupacaoOut])
+def resumo_ocupacao(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    if not painel_ocupacao.inicializado:
+        painel_ocupacao.inicializar(db)
+    registrar_log(request, db, token="", descricao="Resumo de ocupação de leitos")
+    return painel_ocupacao.resumo()
+
+@router.get("/leitos/ocupacao/stream")
+def stream_ocupacao(
+    db: Session = Depends(get_db)
+):
+    # Server-Sent Events: substitui o polling de GET /leitos pelos painéis
+    if not painel_ocupacao.inicializado:
+        painel_ocupacao.inicializar(db)
+    return StreamingResponse(
+        painel_ocupacao.eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get(
+    "/leitos/censo",
+    response_model=List[CensoOut],
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def censo_leitos(
+    inicio: date,
+    fim: date,
+    request: Request,
+    unidade: Optional[str] = None,
+    tipo: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="Período inválido")
+    serie = consultar_censo(db, inicio, fim, unidade=unidade, tipo=tipo)
+    registrar_log(request, db, token="", descricao="Censo histórico de leitos")
+    return serie
+
+@router.get(
+    "/internacoes/indicadores",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def indicadores_internacoes(
+    inicio: datetime,
+    fim: datetime,
+    request: Request,
+    agrupar: str = "unidade,motivo",
+    db: Session = Depends(get_db)
+):
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="Período inválido")
+    dimensoes = [d.strip() for d in agrupar.split(",") if d.strip()]
+    if any(d not in DIMENSOES_INDICADORES for d in dimensoes):
+        raise HTTPException(status_code=400, detail="Agrupamento inválido")
+
+    indicadores = indicadores_internacao(db, inicio, fim, dimensoes)
+    registrar_log(request, db, token="", descricao="Indicadores de internação")
+    return indicadores
 
 @router.post(
     "/financeiro",
@@ -119,21 +349,63 @@ def registrar_lancamento(
     request: Request,
     db: Session = Depends(get_db)
 ):
+    if lanc.referencia_externa and db.query(LancamentoFinanceiro).filter_by(
+        referencia_externa=lanc.referencia_externa
+    ).first():
+        raise HTTPException(status_code=409, detail="Lançamento já registrado")
+
     novo = LancamentoFinanceiro(**lanc.model_dump())
     db.add(novo)
+    consolidar_lancamento(db, novo)
     db.commit()
+    limpar_cache()
     db.refresh(novo)
     registrar_log(request, db, token="", descricao=f"Lançamento financeiro {novo.id}")
     return novo
 
+@router.post(
+    "/financeiro/lote",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+async def importar_lancamentos(
+    request: Request,
+    formato: str = "csv",
+    retomar_apos: int = 0,
+    db: Session = Depends(get_db)
+):
+    # Corpo: CSV com cabeçalho ou NDJSON, um lançamento por linha
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato inválido")
+
+    importacao = ImportacaoLote(LancamentoIn)
+    resumo = await importacao.executar(db, linhas_do_corpo(request.stream()), formato, retomar_apos)
+    await run_in_threadpool(
+        registrar_log, request, db, token="",
+        descricao=f"Importação de lançamentos {importacao.lote_id}: {importacao.inseridos} inseridos"
+    )
+    limpar_cache()
+    return resumo
+
+@router.get(
+    "/financeiro/lote/{lote_id}/erros",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def baixar_erros_lote(lote_id: str):
+    caminho = ImportacaoLote.caminho_erros_de(lote_id) if re.fullmatch(r"[0-9a-f]{32}", lote_id) else None
+    if not caminho or not os.path.exists(caminho):
+        raise HTTPException(status_code=404, detail="Arquivo de erros não encontrado")
+    return FileResponse(caminho, media_type="text/csv", filename=f"{lote_id}_erros.csv")
+
 @router.get("/financeiro", response_model=List[LancamentoOut])
 def listar_lancamentos(
     request: Request,
+    campos: Campos = Depends(campos_de(LancamentoOut)),
     db: Session = Depends(get_db)
 ):
-    regs = db.query(LancamentoFinanceiro).order_by(
-        LancamentoFinanceiro.data_lancamento.desc()
-    ).all()
+    regs = responder_lista(
+        db.query(LancamentoFinanceiro).order_by(LancamentoFinanceiro.data_lancamento.desc()),
+        LancamentoFinanceiro, LancamentoOut, campos
+    )
     registrar_log(request, db, token="", descricao="Listagem financeiro")
     return regs
 
@@ -142,20 +414,78 @@ def resumo_financeiro(
     inicio: datetime,
     fim: datetime,
     request: Request,
+    agrupar: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     if inicio > fim:
         raise HTTPException(status_code=400, detail="Período inválido")
-    lancs = db.query(LancamentoFinanceiro).filter(
-        LancamentoFinanceiro.data_lancamento.between(inicio, fim)
-    ).all()
-    receita = sum(l.valor for l in lancs if l.tipo.lower() == "receita")
-    despesa = sum(l.valor for l in lancs if l.tipo.lower() == "despesa")
-    saldo = receita - despesa
-    registrar_log(request, db, token="", descricao="Resumo financeiro")
-    return {
-        "receita": receita,
-        "despesa": despesa,
-        "saldo": saldo,
+    dimensoes = [d.strip() for d in (agrupar or "").split(",") if d.strip()]
+    if any(d not in DIMENSOES_FINANCEIRO for d in dimensoes):
+        raise HTTPException(status_code=400, detail="Agrupamento inválido")
+
+    [total] = resumir_lancamentos(db, inicio, fim)
+    resumo = {
+        "receita": total["receita"],
+        "despesa": total["despesa"],
+        "saldo": total["saldo"],
         "periodo": f"{inicio:%d/%m/%Y} - {fim:%d/%m/%Y}"
-    }
\ No newline at end of file
+    }
+    if dimensoes:
+        resumo["grupos"] = resumir_lancamentos(db, inicio, fim, dimensoes)
+    registrar_log(request, db, token="", descricao="Resumo financeiro")
+    return resumo
+
+@router.post(
+    "/financeiro/consolidado/reconstruir",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def reconstruir_consolidado_financeiro(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    linhas = reconstruir_consolidado(db)
+    limpar_cache()
+    registrar_log(request, db, token="", descricao="Reconstrução do consolidado financeiro")
+    return {"linhas": linhas}
+
+@router.get(
+    "/financeiro/consolidado/verificar",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def verificar_consolidado_financeiro(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    divergencias = verificar_consolidado(db)
+    registrar_log(request, db, token="", descricao="Verificação do consolidado financeiro")
+    return {"consistente": not divergencias, "divergencias": divergencias}
+
+@router.get(
+    "/financeiro/pivo",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def pivo_financeiro_mensal(
+    inicio: date,
+    fim: date,
+    request: Request,
+    linhas: str = "unidade,categoria",
+    formato: str = "json",
+    db: Session = Depends(get_db)
+):
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="Período inválido")
+    dimensoes = [d.strip() for d in linhas.split(",") if d.strip()]
+    if any(d not in DIMENSOES_PIVO for d in dimensoes):
+        raise HTTPException(status_code=400, detail="Agrupamento inválido")
+    if formato not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail="Formato inválido")
+
+    pivo = pivo_financeiro(db, inicio, fim, dimensoes)
+    registrar_log(request, db, token="", descricao="Pivô financeiro")
+    if formato == "csv":
+        return StreamingResponse(
+            pivo_csv(pivo, dimensoes),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=pivo_financeiro.csv"}
+        )
+    return pivo
\ No newline at end of file
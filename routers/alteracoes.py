@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from database import get_db
+from routers.usuarios import verificar_permissao
+from models.usuario import PerfilEnum
+from utils.logs import registrar_log
+from utils.alteracoes import MODELOS, compactar_alteracoes, listar_alteracoes, seq_atual
+
+router = APIRouter(tags=["Alterações"])
+
+# 1) Schemas “in-line”
+class AlteracaoOut(BaseModel):
+    seq: int
+    entidade: str
+    id: int
+    operacao: str
+    dados: Optional[dict] = None
+
+class AlteracoesPaginaOut(BaseModel):
+    itens: List[AlteracaoOut]
+    proximo: int
+    mais: bool
+
+class SeqAtualOut(BaseModel):
+    seq: int
+
+class CompactacaoOut(BaseModel):
+    compactadas: int
+    expiradas: int
+    corte: int
+
+# 2) Endpoints
+@router.get(
+    "/",
+    response_model=AlteracoesPaginaOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def listar(
+    request: Request,
+    desde: int = Query(0, ge=0),
+    limite: int = Query(500, ge=1, le=5000),
+    entidades: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    if entidades and set(entidades) - set(MODELOS):
+        raise HTTPException(status_code=400, detail=f"Entidades válidas: {', '.join(MODELOS)}")
+
+    pagina = listar_alteracoes(db, desde, limite, entidades)
+    if pagina is None:
+        raise HTTPException(
+            status_code=410,
+            detail="Alterações anteriores já descartadas; refaça a carga completa a partir de /alteracoes/atual"
+        )
+    itens, proximo, mais = pagina
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Leitura do feed de alterações de seq {desde} a {proximo}"
+    )
+    return {"itens": itens, "proximo": proximo, "mais": mais}
+
+@router.get(
+    "/atual",
+    response_model=SeqAtualOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def obter_seq_atual(db: Session = Depends(get_db)):
+    return {"seq": seq_atual(db)}
+
+@router.post(
+    "/compactar",
+    response_model=CompactacaoOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def compactar(
+    request: Request,
+    retencao_dias: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db)
+):
+    resultado = compactar_alteracoes(db, retencao_dias)
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Compactação do feed de alterações até seq {resultado['corte']}"
+    )
+    return resultado
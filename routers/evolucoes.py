@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 from database import get_db
@@ -10,6 +10,9 @@ from models.profissional import Profissional
 from routers.usuarios import verificar_permissao
 from models.usuario import PerfilEnum
 from utils.logs import registrar_log
+from utils.busca_clinica import buscar_textos_clinicos, reindexar_busca
+from utils.leitura import Campos, campos_de
+from utils.respostas import responder_lista
 
 router = APIRouter(
     prefix="/evolucoes",
@@ -29,6 +32,14 @@ class EvolucaoOut(EvolucaoIn):
     class ConfigDict:
         from_attributes = True
 
+class BuscaClinicaOut(BaseModel):
+    origem: str
+    registro_id: int
+    paciente_id: int
+    profissional: str
+    data_registro: datetime
+    trecho: str
+
 # 2) Endpoints
 @router.post(
     "/{profissional_id}",
@@ -62,6 +73,50 @@ def registrar_evolucao(
 
     return nova
 
+@router.get(
+    "/busca",
+    response_model=List[BuscaClinicaOut],
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def buscar_evolucoes(
+    request: Request,
+    q: str = Query(..., min_length=2),
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    profissional_id: Optional[int] = None,
+    limite: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    if inicio and fim and inicio > fim:
+        raise HTTPException(status_code=400, detail="Período inválido")
+
+    resultados = buscar_textos_clinicos(db, q, inicio, fim, profissional_id, limite)
+    if resultados is None:
+        raise HTTPException(status_code=400, detail="Expressão de busca inválida")
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Busca em textos clínicos: {q}"
+    )
+
+    return resultados
+
+@router.post(
+    "/busca/reindexar",
+    dependencies=[Depends(verificar_permissao(PerfilEnum.administrador))]
+)
+def reindexar_evolucoes(request: Request, db: Session = Depends(get_db)):
+    total = reindexar_busca(db)
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Reindexação da busca clínica ({total} registros)"
+    )
+
+    return {"indexados": total}
+
 @router.get(
     "/{paciente_id}",
     response_model=List[EvolucaoOut],
@@ -70,13 +125,14 @@ def registrar_evolucao(
 def listar_evolucoes(
     paciente_id: int,
     request: Request,
+    campos: Campos = Depends(campos_de(EvolucaoOut)),
     db: Session = Depends(get_db)
 ):
-    evolucoes = (
+    evolucoes = responder_lista(
         db.query(EvolucaoClinica)
           .filter_by(paciente_id=paciente_id)
-          .order_by(EvolucaoClinica.data_registro.desc())
-          .all()
+          .order_by(EvolucaoClinica.data_registro.desc()),
+        EvolucaoClinica, EvolucaoOut, campos
     )
 
     registrar_log(
@@ -10,6 +10,12 @@ from models.paciente import Paciente
 from routers.usuarios import verificar_permissao
 from models.usuario import PerfilEnum
 from utils.logs import registrar_log
+from utils.ocupacao import painel_ocupacao
+from utils.leitos import ocupar_leito, reservar_leito
+from utils.censo import invalidar_censo
+from utils.cache import cache_leitura
+from utils.leitura import Campos, campos_de
+from utils.respostas import responder_lista
 
 router = APIRouter(
     prefix="/internacoes",
@@ -19,9 +25,13 @@ router = APIRouter(
 # 1) Schemas “in-line”
 class InternacaoIn(BaseModel):
     paciente_id: int
-    leito_id: int
     data_entrada: datetime
     motivo: str
+    # Informe leito_id, ou unidade + tipo para atribuição automática
+    leito_id: Optional[int] = None
+    unidade: Optional[str] = None
+    tipo: Optional[str] = None
+    leitos_excluidos: List[int] = []
 
 class AltaIn(BaseModel):
     data_alta: datetime
@@ -48,20 +58,35 @@ def registrar_internacao(
     request: Request,
     db: Session = Depends(get_db)
 ):
-    paciente = db.query(Paciente).filter_by(id=dados.paciente_id).first()
-    leito = db.query(Leito).filter_by(id=dados.leito_id).first()
-
-    if not paciente or not leito:
-        raise HTTPException(status_code=404, detail="Paciente ou leito não encontrado")
+    if dados.leito_id is None and not (dados.unidade and dados.tipo):
+        raise HTTPException(status_code=400, detail="Informe leito_id ou unidade e tipo")
 
-    if leito.ocupado:
-        raise HTTPException(status_code=409, detail="Leito já está ocupado")
-
-    leito.ocupado = True
-    interna = Internacao(**dados.model_dump())
+    paciente = db.query(Paciente).filter_by(id=dados.paciente_id).first()
+    if dados.leito_id is not None:
+        leito = db.query(Leito).filter_by(id=dados.leito_id).first()
+        if not paciente or not leito:
+            raise HTTPException(status_code=404, detail="Paciente ou leito não encontrado")
+        if not ocupar_leito(db, leito.id):
+            raise HTTPException(status_code=409, detail="Leito já está ocupado")
+    else:
+        if not paciente:
+            raise HTTPException(status_code=404, detail="Paciente ou leito não encontrado")
+        leito = reservar_leito(db, dados.unidade, dados.tipo, dados.leitos_excluidos)
+        if not leito:
+            raise HTTPException(status_code=409, detail="Nenhum leito livre disponível")
+
+    interna = Internacao(
+        paciente_id=dados.paciente_id,
+        leito_id=leito.id,
+        data_entrada=dados.data_entrada,
+        motivo=dados.motivo
+    )
     db.add(interna)
+    invalidar_censo(db, dados.data_entrada.date())
     db.commit()
     db.refresh(interna)
+    painel_ocupacao.leito_ocupado(leito.unidade, leito.tipo)
+    cache_leitura.invalidar("leitos")
 
     registrar_log(
         request, db,
@@ -87,12 +112,17 @@ def registrar_alta(
         raise HTTPException(status_code=404, detail="Internação inválida")
 
     interna.data_alta = entrada.data_alta
+    invalidar_censo(db, entrada.data_alta.date())
     leito = db.query(Leito).filter_by(id=interna.leito_id).first()
+    liberado = leito is not None and leito.ocupado
     if leito:
         leito.ocupado = False
 
     db.commit()
     db.refresh(interna)
+    if liberado:
+        painel_ocupacao.leito_liberado(leito.unidade, leito.tipo)
+        cache_leitura.invalidar("leitos")
 
     registrar_log(
         request, db,
@@ -109,12 +139,12 @@ def registrar_alta(
 )
 def listar_internacoes(
     request: Request,
+    campos: Campos = Depends(campos_de(InternacaoOut)),
     db: Session = Depends(get_db)
 ):
-    internacoes = (
-        db.query(Internacao)
-          .order_by(Internacao.data_entrada.desc())
-          .all()
+    internacoes = responder_lista(
+        db.query(Internacao).order_by(Internacao.data_entrada.desc()),
+        Internacao, InternacaoOut, campos
     )
 
     registrar_log(
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, constr
 from typing import List, Optional
@@ -13,6 +13,12 @@ from utils.email_utils import enviar_email
 from routers.usuarios import verificar_permissao
 from models.usuario import PerfilEnum
 from utils.logs import registrar_log
+from utils.timeline import TIPOS, timeline_paciente
+from utils.autocomplete import indice_especialidades
+from utils.cache import cache_leitura
+from utils.leitura import Campos, campos_de, obter
+from utils.respostas import responder_item, responder_lista
+from utils.versoes import aplicar_cabecalhos, gerar_etag, nao_modificado, resumo_parametros
 
 router = APIRouter(tags=["Pacientes"])
 
@@ -82,6 +88,18 @@ class PrescricaoPacienteOut(BaseModel):
     class ConfigDict:
         from_attributes = True
 
+class TimelineEventoOut(BaseModel):
+    tipo: str
+    id: int
+    data: datetime
+    descricao: str
+    profissional_id: Optional[int] = None
+    profissional: Optional[str] = None
+
+class TimelinePaginaOut(BaseModel):
+    itens: List[TimelineEventoOut]
+    proximo_cursor: Optional[str]
+
 # 2) Endpoints
 @router.post("/", response_model=PacienteOut)
 def criar_paciente(
@@ -108,9 +126,10 @@ def criar_paciente(
 @router.get("/", response_model=List[PacienteOut])
 def listar_pacientes(
     request: Request,
+    campos: Campos = Depends(campos_de(PacienteOut)),
     db: Session = Depends(get_db)
 ):
-    pacientes = db.query(Paciente).all()
+    pacientes = responder_lista(db.query(Paciente), Paciente, PacienteOut, campos)
     registrar_log(
         request, db,
         token=request.headers.get("authorization", ""),
@@ -122,10 +141,13 @@ def listar_pacientes(
 def obter_paciente(
     paciente_id: int,
     request: Request,
+    response: Response,
+    campos: Campos = Depends(campos_de(PacienteOut)),
     db: Session = Depends(get_db)
 ):
-    paciente = db.query(Paciente).filter_by(id=paciente_id).first()
-    if not paciente:
+    # Só a versão (chave primária) decide entre 304 e a leitura completa
+    versao = db.query(Paciente.versao, Paciente.atualizado_em).filter_by(id=paciente_id).first()
+    if not versao:
         raise HTTPException(status_code=404, detail="Paciente não encontrado")
 
     registrar_log(
@@ -133,7 +155,13 @@ def obter_paciente(
         token=request.headers.get("authorization", ""),
         descricao=f"Consulta de paciente ID {paciente_id}"
     )
-    return paciente
+
+    etag = gerar_etag("paciente", paciente_id, versao.versao, resumo_parametros(request))
+    inalterado = nao_modificado(request, etag, versao.atualizado_em)
+    if inalterado:
+        return inalterado
+    paciente = obter(db.query(Paciente).filter_by(id=paciente_id), Paciente, PacienteOut, campos)
+    return aplicar_cabecalhos(responder_item(paciente, campos), response, etag, versao.atualizado_em)
 
 @router.post("/{paciente_id}/historico", response_model=HistoricoOut)
 def adicionar_historico(
@@ -161,9 +189,12 @@ def adicionar_historico(
 def listar_historico(
     paciente_id: int,
     request: Request,
+    campos: Campos = Depends(campos_de(HistoricoOut)),
     db: Session = Depends(get_db)
 ):
-    historicos = db.query(HistoricoClinico).filter_by(paciente_id=paciente_id).all()
+    historicos = responder_lista(
+        db.query(HistoricoClinico).filter_by(paciente_id=paciente_id), HistoricoClinico, HistoricoOut, campos
+    )
 
     registrar_log(
         request, db,
@@ -183,12 +214,19 @@ def agendar_consulta(
     if not paciente:
         raise HTTPException(status_code=404, detail="Paciente não encontrado")
 
-    profissional = db.query(Profissional).filter_by(especialidade=dados.especialidade).first()
-    if not profissional:
-        raise HTTPException(status_code=404, detail="Profissional não encontrado")
+    profissional_id = cache_leitura.obter_ou_carregar(
+        "profissionais", ("especialidade", dados.especialidade),
+        lambda: db.query(Profissional.id).filter_by(especialidade=dados.especialidade).limit(1).scalar()
+    )
+    if profissional_id is None:
+        sugestoes = indice_especialidades.sugerir(dados.especialidade[:4], 5)
+        detalhe = "Profissional não encontrado"
+        if sugestoes:
+            detalhe += f". Especialidades semelhantes: {', '.join(sugestoes)}"
+        raise HTTPException(status_code=404, detail=detalhe)
 
     horario = db.query(AgendaMedica).filter_by(
-        profissional_id=profissional.id,
+        profissional_id=profissional_id,
         data_hora=dados.data_hora,
         disponivel=True
     ).first()
@@ -197,7 +235,7 @@ def agendar_consulta(
 
     nova = Consulta(
         paciente_id=paciente_id,
-        profissional_id=profissional.id,
+        profissional_id=profissional_id,
         data_hora=dados.data_hora,
         especialidade=dados.especialidade
     )
@@ -223,9 +261,12 @@ def agendar_consulta(
 def listar_consultas(
     paciente_id: int,
     request: Request,
+    campos: Campos = Depends(campos_de(ConsultaOut)),
     db: Session = Depends(get_db)
 ):
-    consultas = db.query(Consulta).filter_by(paciente_id=paciente_id).all()
+    consultas = responder_lista(
+        db.query(Consulta).filter_by(paciente_id=paciente_id), Consulta, ConsultaOut, campos
+    )
 
     registrar_log(
         request, db,
@@ -277,9 +318,12 @@ def cancelar_consulta(
 def listar_prescricoes(
     paciente_id: int,
     request: Request,
+    campos: Campos = Depends(campos_de(PrescricaoPacienteOut)),
     db: Session = Depends(get_db)
 ):
-    prescricoes = db.query(Prescricao).filter_by(paciente_id=paciente_id).all()
+    prescricoes = responder_lista(
+        db.query(Prescricao).filter_by(paciente_id=paciente_id), Prescricao, PrescricaoPacienteOut, campos
+    )
 
     registrar_log(
         request, db,
@@ -288,6 +332,33 @@ def listar_prescricoes(
     )
     return prescricoes
 
+@router.get(
+    "/{paciente_id}/timeline",
+    response_model=TimelinePaginaOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def timeline(
+    paciente_id: int,
+    request: Request,
+    limite: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    tipos: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    if tipos and set(tipos) - set(TIPOS):
+        raise HTTPException(status_code=400, detail=f"Tipos válidos: {', '.join(TIPOS)}")
+    if not db.query(Paciente.id).filter_by(id=paciente_id).first():
+        raise HTTPException(status_code=404, detail="Paciente não encontrado")
+
+    itens, proximo = timeline_paciente(db, paciente_id, limite, cursor, tipos or TIPOS)
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Linha do tempo do paciente {paciente_id}"
+    )
+    return {"itens": itens, "proximo_cursor": proximo}
+
 @router.put("/{paciente_id}", response_model=PacienteRead)
 def atualizar_paciente(paciente_id: int, paciente_in: PacienteUpdate, db: Session = Depends(get_db)):
     paciente = db.get(Paciente, paciente_id)
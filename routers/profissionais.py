@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from typing import List
-from datetime import datetime
+from typing import List, Optional, Union
+from datetime import datetime, date
 from database import get_db
 from models.profissional import Profissional
 from models.prescricao import Prescricao
@@ -11,6 +11,13 @@ from models.paciente import Paciente
 from routers.usuarios import verificar_permissao
 from models.usuario import PerfilEnum
 from utils.logs import registrar_log
+from utils.agenda import compactar_agenda
+from utils.interacoes import bloqueantes, interacoes_prescricao
+from utils.autocomplete import indice_especialidades, indice_medicamentos
+from utils.cache import cache_leitura
+from utils.leitura import Campos, campos_de, listar, obter, projetar
+from utils.respostas import responder_item, responder_lista, responder_valores
+from utils.versoes import aplicar_cabecalhos, gerar_etag, nao_modificado, resumo_parametros
 
 router = APIRouter(
     prefix="/profissionais",
@@ -43,6 +50,12 @@ class AgendaOut(AgendaIn):
     class ConfigDict:
         from_attributes = True
 
+class AgendaDiaOut(BaseModel):
+    data: date
+    inicio: str
+    intervalo: int
+    mapa: str
+
 class PrescricaoIn(BaseModel):
     paciente_id: int
     data_prescricao: datetime
@@ -56,6 +69,14 @@ class PrescricaoOut(PrescricaoIn):
     class ConfigDict:
         from_attributes = True
 
+class InteracaoOut(BaseModel):
+    medicamento: str
+    gravidade: str
+    descricao: str
+
+class PrescricaoEmitidaOut(PrescricaoOut):
+    interacoes: List[InteracaoOut] = []
+
 # 2) Endpoints
 
 @router.post("/", response_model=ProfissionalOut)
@@ -71,6 +92,8 @@ def criar_profissional(
     db.add(novo)
     db.commit()
     db.refresh(novo)
+    indice_especialidades.adicionar(novo.especialidade)
+    cache_leitura.invalidar("profissionais")
 
     registrar_log(
         request, db,
@@ -82,16 +105,63 @@ def criar_profissional(
 @router.get("/", response_model=List[ProfissionalOut])
 def listar_profissionais(
     request: Request,
+    campos: Campos = Depends(campos_de(ProfissionalOut)),
     db: Session = Depends(get_db)
 ):
-    profs = db.query(Profissional).all()
+    profs = cache_leitura.obter_ou_carregar(
+        "profissionais", ("listar_profissionais",),
+        lambda: [linha._asdict() for linha in listar(db.query(Profissional), Profissional, ProfissionalOut)]
+    )
 
     registrar_log(
         request, db,
         token=request.headers.get("authorization", ""),
         descricao="Listagem de profissionais"
     )
-    return profs
+    return responder_valores(profs, campos)
+
+@router.get("/{profissional_id}", response_model=ProfissionalOut)
+def obter_profissional(
+    profissional_id: int,
+    request: Request,
+    response: Response,
+    campos: Campos = Depends(campos_de(ProfissionalOut)),
+    db: Session = Depends(get_db)
+):
+    versao = db.query(Profissional.versao, Profissional.atualizado_em).filter_by(id=profissional_id).first()
+    if not versao:
+        raise HTTPException(status_code=404, detail="Profissional não encontrado")
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Consulta de profissional ID {profissional_id}"
+    )
+
+    etag = gerar_etag("profissional", profissional_id, versao.versao, resumo_parametros(request))
+    inalterado = nao_modificado(request, etag, versao.atualizado_em)
+    if inalterado:
+        return inalterado
+    profissional = obter(db.query(Profissional).filter_by(id=profissional_id), Profissional, ProfissionalOut, campos)
+    return aplicar_cabecalhos(responder_item(profissional, campos), response, etag, versao.atualizado_em)
+
+@router.get("/especialidades/sugestoes", response_model=List[str])
+def sugerir_especialidades(
+    q: str = Query(..., min_length=1),
+    limite: int = Query(10, ge=1, le=50)
+):
+    return indice_especialidades.sugerir(q, limite)
+
+@router.get(
+    "/medicamentos/sugestoes",
+    response_model=List[str],
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def sugerir_medicamentos(
+    q: str = Query(..., min_length=1),
+    limite: int = Query(10, ge=1, le=50)
+):
+    return indice_medicamentos.sugerir(q, limite)
 
 @router.post(
     "/{profissional_id}/agenda",
@@ -125,30 +195,57 @@ def adicionar_agenda(
 
 @router.get(
     "/{profissional_id}/agenda",
-    response_model=List[AgendaOut]
+    response_model=Union[List[AgendaOut], List[AgendaDiaOut]]
 )
 def listar_agenda(
     profissional_id: int,
     request: Request,
+    response: Response,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    compacto: bool = False,
     db: Session = Depends(get_db)
 ):
-    horarios = (
-        db.query(AgendaMedica)
-          .filter_by(profissional_id=profissional_id)
-          .order_by(AgendaMedica.data_hora)
-          .all()
+    if inicio and fim and inicio > fim:
+        raise HTTPException(status_code=400, detail="Período inválido")
+
+    # Versão da agenda guardada no profissional: 304 sem tocar em agenda_medica
+    versao = (
+        db.query(Profissional.agenda_versao, Profissional.agenda_atualizada_em)
+          .filter_by(id=profissional_id)
+          .first()
     )
+    etag = None
+    if versao:
+        etag = gerar_etag("agenda", profissional_id, versao.agenda_versao, resumo_parametros(request))
+        inalterado = nao_modificado(request, etag, versao.agenda_atualizada_em)
+        if inalterado:
+            return inalterado
+
+    # Colunas necessárias conforme o formato; a janela usa o índice (profissional_id, data_hora)
+    query = db.query(AgendaMedica).filter(AgendaMedica.profissional_id == profissional_id)
+    if inicio:
+        query = query.filter(AgendaMedica.data_hora >= inicio)
+    if fim:
+        query = query.filter(AgendaMedica.data_hora <= fim)
+    query = query.order_by(AgendaMedica.data_hora)
+    if compacto:
+        horarios = compactar_agenda(query.with_entities(AgendaMedica.data_hora, AgendaMedica.disponivel).all())
+    else:
+        horarios = projetar(query, AgendaMedica, AgendaOut).all()
 
     registrar_log(
         request, db,
         token=request.headers.get("authorization", ""),
         descricao=f"Listagem de agenda do profissional {profissional_id}"
     )
+    if etag:
+        aplicar_cabecalhos(horarios, response, etag, versao.agenda_atualizada_em)
     return horarios
 
 @router.post(
     "/{profissional_id}/prescricoes",
-    response_model=PrescricaoOut,
+    response_model=PrescricaoEmitidaOut,
     dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
 )
 def emitir_prescricao(
@@ -162,17 +259,28 @@ def emitir_prescricao(
     if not profissional or not paciente:
         raise HTTPException(status_code=404, detail="Profissional ou paciente não encontrado")
 
+    interacoes = interacoes_prescricao(db, paciente.id, dados.medicamento)
+    bloqueios = bloqueantes(interacoes)
+    if bloqueios:
+        raise HTTPException(
+            status_code=409,
+            detail="Interação medicamentosa: " + "; ".join(
+                f"{i['medicamento']} ({i['gravidade']}) {i['descricao']}".rstrip() for i in bloqueios
+            )
+        )
+
     nova = Prescricao(**dados.model_dump(), profissional_id=profissional_id)
     db.add(nova)
     db.commit()
     db.refresh(nova)
+    indice_medicamentos.adicionar(nova.medicamento)
 
     registrar_log(
         request, db,
         token=request.headers.get("authorization", ""),
         descricao=f"Profissional {profissional_id} emitiu prescrição {nova.id} para paciente {paciente.id}"
     )
-    return nova
+    return {**PrescricaoOut.model_validate(nova, from_attributes=True).model_dump(), "interacoes": interacoes}
 
 @router.get(
     "/{profissional_id}/prescricoes",
@@ -181,9 +289,12 @@ def emitir_prescricao(
 def listar_prescricoes(
     profissional_id: int,
     request: Request,
+    campos: Campos = Depends(campos_de(PrescricaoOut)),
     db: Session = Depends(get_db)
 ):
-    prescricoes = db.query(Prescricao).filter_by(profissional_id=profissional_id).all()
+    prescricoes = responder_lista(
+        db.query(Prescricao).filter_by(profissional_id=profissional_id), Prescricao, PrescricaoOut, campos
+    )
 
     registrar_log(
         request, db,
@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 from database import get_db
 from models.telemedicina import ConsultaTelemedicina
+from models.consulta import StatusConsulta
 from models.paciente import Paciente
 from models.profissional import Profissional
 from routers.usuarios import verificar_permissao
 from models.usuario import PerfilEnum
+from settings import settings
 from utils.logs import registrar_log
+from utils.conflitos import conflitos_profissional
+from utils.paginacao import codificar_cursor, decodificar_cursor
+from utils.leitura import Campos, campos_de, projetar
+from utils.respostas import responder_lista
+from utils.alteracoes import corte_atual, ultimas_alteracoes
 
 router = APIRouter(
     prefix="/telemedicina",
@@ -21,15 +29,24 @@ class TeleconsultaIn(BaseModel):
     paciente_id: int
     profissional_id: int
     data_hora: datetime
+    duracao_minutos: int = Field(default=30, gt=0, le=settings.duracao_teleconsulta_maxima)
     link_video: str
     observacoes: str
 
 class TeleconsultaOut(TeleconsultaIn):
     id: int
+    status: StatusConsulta
 
     class ConfigDict:
         from_attributes = True
 
+class StatusTeleconsultaIn(BaseModel):
+    status: StatusConsulta
+
+class TeleconsultaPaginaOut(BaseModel):
+    itens: List[TeleconsultaOut]
+    proximo_cursor: Optional[str]
+
 # 2) Endpoints
 
 @router.post(
@@ -47,6 +64,14 @@ def agendar_teleconsulta(
     if not paciente or not profissional:
         raise HTTPException(status_code=404, detail="Paciente ou profissional não encontrado")
 
+    conflitos = conflitos_profissional(db, profissional.id, entrada.data_hora, entrada.duracao_minutos)
+    if conflitos:
+        c = conflitos[0]
+        raise HTTPException(
+            status_code=409,
+            detail=f"Conflito de horário com {c['tipo']} {c['id']} em {c['data_hora']:%d/%m/%Y %H:%M}"
+        )
+
     nova = ConsultaTelemedicina(**entrada.model_dump())
     db.add(nova)
     db.commit()
@@ -70,13 +95,14 @@ def agendar_teleconsulta(
 def listar_teleconsultas(
     paciente_id: int,
     request: Request,
+    campos: Campos = Depends(campos_de(TeleconsultaOut)),
     db: Session = Depends(get_db)
 ):
-    consultas = (
+    consultas = responder_lista(
         db.query(ConsultaTelemedicina)
           .filter_by(paciente_id=paciente_id)
-          .order_by(ConsultaTelemedicina.data_hora.desc())
-          .all()
+          .order_by(ConsultaTelemedicina.data_hora.desc()),
+        ConsultaTelemedicina, TeleconsultaOut, campos
     )
 
     registrar_log(
@@ -84,4 +110,112 @@ def listar_teleconsultas(
         token=request.headers.get("authorization", ""),
         descricao=f"Listagem de teleconsultas do paciente {paciente_id}"
     )
-    return consultas
\ No newline at end of file
+    return consultas
+
+@router.put(
+    "/{teleconsulta_id}/status",
+    response_model=TeleconsultaOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def atualizar_status_teleconsulta(
+    teleconsulta_id: int,
+    entrada: StatusTeleconsultaIn,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    consulta = db.query(ConsultaTelemedicina).filter_by(id=teleconsulta_id).first()
+    if not consulta:
+        raise HTTPException(status_code=404, detail="Teleconsulta não encontrada")
+
+    consulta.status = entrada.status
+    db.commit()
+    db.refresh(consulta)
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Teleconsulta {teleconsulta_id} alterada para {entrada.status.value}"
+    )
+    return consulta
+
+@router.get(
+    "/profissional/{profissional_id}",
+    response_model=TeleconsultaPaginaOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def listar_teleconsultas_profissional(
+    profissional_id: int,
+    request: Request,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    status: Optional[StatusConsulta] = None,
+    limite: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    # Paginação por chave (data_hora, id) sobre o índice (profissional_id, data_hora)
+    query = db.query(ConsultaTelemedicina).filter(
+        ConsultaTelemedicina.profissional_id == profissional_id
+    )
+    if inicio:
+        query = query.filter(ConsultaTelemedicina.data_hora >= inicio)
+    if fim:
+        query = query.filter(ConsultaTelemedicina.data_hora <= fim)
+    if status:
+        query = query.filter(ConsultaTelemedicina.status == status)
+    posicao = decodificar_cursor(cursor)
+    if posicao:
+        data_hora, id_ = posicao
+        query = query.filter(or_(
+            ConsultaTelemedicina.data_hora > data_hora,
+            and_(ConsultaTelemedicina.data_hora == data_hora, ConsultaTelemedicina.id > id_)
+        ))
+
+    itens = (
+        projetar(query, ConsultaTelemedicina, TeleconsultaOut)
+          .order_by(ConsultaTelemedicina.data_hora, ConsultaTelemedicina.id)
+          .limit(limite + 1)
+          .all()
+    )
+    proximo = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo = codificar_cursor(itens[-1].data_hora, itens[-1].id)
+
+    registrar_log(
+        request, db,
+        token=request.headers.get("authorization", ""),
+        descricao=f"Listagem de teleconsultas do profissional {profissional_id}"
+    )
+    return {"itens": itens, "proximo_cursor": proximo}
+
+@router.get(
+    "/profissional/{profissional_id}/alteracoes",
+    response_model=TeleconsultaPaginaOut,
+    dependencies=[Depends(verificar_permissao(PerfilEnum.profissional))]
+)
+def alteracoes_teleconsultas_profissional(
+    profissional_id: int,
+    desde: int = Query(0, ge=0),
+    limite: int = Query(200, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    # Polling leve: teleconsultas criadas/alteradas após o seq `desde` do feed de alterações
+    # (sequência do banco; o relógio da aplicação não ordena transações concorrentes)
+    if desde < corte_atual(db):
+        raise HTTPException(status_code=410, detail="Alterações anteriores já descartadas; recarregue a lista")
+    alteradas = ultimas_alteracoes(ConsultaTelemedicina, desde)
+    query = (
+        db.query(ConsultaTelemedicina)
+          .join(alteradas, alteradas.c.registro_id == ConsultaTelemedicina.id)
+          .filter(ConsultaTelemedicina.profissional_id == profissional_id)
+    )
+
+    itens = (
+        projetar(query, ConsultaTelemedicina, TeleconsultaOut, extras=(alteradas.c.seq,))
+          .order_by(alteradas.c.seq)
+          .limit(limite)
+          .all()
+    )
+    cursor = str(itens[-1].seq) if itens else str(desde)
+    return {"itens": itens, "proximo_cursor": cursor}
\ No newline at end of file
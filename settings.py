@@ -1,8 +1,34 @@
+from typing import Dict, Optional, Tuple
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     log_file: str = "logs/app.log"
     max_bytes: int = 5 * 1024 * 1024
     backup_count: int = 5
+    lotes_dir: str = "logs/lotes"
+    lote_tamanho_bloco: int = 1000
+    alertas_email: Optional[str] = None
+    alertas_hora: int = 7
+    alertas_dias_validade: int = 30
+    duracao_consulta_padrao: int = 30       # minutos (consultas presenciais e agenda)
+    duracao_teleconsulta_maxima: int = 240  # minutos
+    textos_compressao: bool = False         # zlib em anotações, descrições e posologias
+    textos_compressao_limite: int = 1024    # bytes (UTF-8) a partir dos quais comprime
+    textos_compressao_nivel: int = 6
+    interacoes_csv: str = "dados/interacoes.csv"  # medicamento_a,medicamento_b,gravidade,descricao
+    interacoes_janela_dias: int = 90        # prescrições consideradas ativas
+    interacoes_gravidades_bloqueio: Tuple[str, ...] = ("contraindicada",)
+    autocomplete_medicamentos: str = "dados/medicamentos.txt"      # um por linha
+    autocomplete_especialidades: str = "dados/especialidades.txt"  # um por linha
+    cache_backend: str = "memoria"          # "memoria" ou "sqlite" (compartilhado entre workers)
+    cache_sqlite_caminho: str = "logs/cache_leitura.db"
+    cache_max_itens: int = 256              # por entidade (LRU)
+    cache_ttl: Dict[str, int] = {"profissionais": 300, "leitos": 30}  # segundos
+    respostas_rapidas: bool = False         # listagens: projeção de colunas + orjson, sem validação por item
+    alteracoes_retencao_dias: int = 30      # feed de alterações: clientes mais atrasados fazem carga completa
+    alteracoes_compactacao_hora: int = 3
+    idempotencia_ttl: int = 24 * 3600       # segundos em que uma resposta pode ser reenviada
+    idempotencia_max_itens: int = 10000     # respostas guardadas (LRU, mesmo backend do cache)
+    idempotencia_resposta_maxima: int = 256 * 1024  # bytes; respostas maiores não são reenviadas
 
 settings = Settings()
\ No newline at end of file
@@ -6,6 +6,7 @@ sys.path.insert(0, ROOT)
 
 # 2) Usa SQLite em memória, única conexão (StaticPool)
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ.setdefault("SECRET_KEY", "chave-de-teste")
 
 from sqlalchemy import create_engine
 from sqlalchemy.pool import StaticPool
@@ -48,6 +49,11 @@ def reset_db():
     # antes do teste, derruba e recria todas as tabelas
     Base.metadata.drop_all(bind=database.engine)
     Base.metadata.create_all(bind=database.engine)
+    # e esvazia o cache de leitura e as respostas idempotentes, que sobreviveriam à recriação do banco
+    from utils.cache import cache_leitura
+    from utils.idempotencia import armazem_idempotencia
+    cache_leitura.limpar()
+    armazem_idempotencia.limpar()
     yield
     # opcional: limpa após o teste (já vazia se tudo rodou direito)
     Base.metadata.drop_all(bind=database.engine)
@@ -74,12 +80,28 @@ def client(db_session, monkeypatch):
 
     # 5c) **Monkey-patch do registrar_log**
     import routers.pacientes as pac_mod
-    monkeypatch.setattr(
-        pac_mod,
-        "registrar_log",
-        lambda *args, **kwargs: None
-    )
+    import routers.profissionais as prof_mod
+    import routers.administracao as adm_mod
+    import routers.internacoes as int_mod
+    import routers.telemedicina as tele_mod
+    import routers.alteracoes as alt_mod
+    for mod in (pac_mod, prof_mod, adm_mod, int_mod, tele_mod, alt_mod):
+        monkeypatch.setattr(
+            mod,
+            "registrar_log",
+            lambda *args, **kwargs: None
+        )
 
     from fastapi.testclient import TestClient
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+
+
+@pytest.fixture
+def auth_headers():
+    # Token real: verificar_permissao decodifica o JWT e compara o perfil
+    from auth import criar_token
+    def _headers(perfil):
+        token = criar_token({"sub": "teste@example.com", "perfil": perfil.value})
+        return {"Authorization": f"Bearer {token}"}
+    return _headers
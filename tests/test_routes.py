@@ -77,4 +77,938 @@ def test_deletar_paciente(client: TestClient):
     r = client.delete(f"/pacientes/{pid}")
     assert r.status_code == 204
     # 404 após remoção
-    assert client.get(f"/pacientes/{pid}").status_code == 404
\ No newline at end of file
+    assert client.get(f"/pacientes/{pid}").status_code == 404
+
+def _criar_profissional_com_agenda(db_session):
+    from datetime import datetime
+    from models.profissional import Profissional
+    from models.agenda import AgendaMedica
+
+    prof = Profissional(
+        nome="Dra. Ana", email="dra.ana@teste.com",
+        especialidade="Cardiologia", registro_conselho="CRM-123"
+    )
+    db_session.add(prof)
+    db_session.commit()
+    for dh, livre in [
+        (datetime(2026, 10, 19, 8, 0), True),
+        (datetime(2026, 10, 19, 8, 30), False),
+        (datetime(2026, 10, 19, 9, 30), True),
+        (datetime(2026, 10, 20, 14, 0), True),
+        (datetime(2026, 11, 2, 8, 0), True),
+    ]:
+        db_session.add(AgendaMedica(profissional_id=prof.id, data_hora=dh, disponivel=livre))
+    db_session.commit()
+    return prof.id
+
+def test_listar_agenda_janela(client: TestClient, db_session):
+    pid = _criar_profissional_com_agenda(db_session)
+    r = client.get(
+        f"/profissionais/profissionais/{pid}/agenda",
+        params={"inicio": "2026-10-01T00:00:00", "fim": "2026-10-31T23:59:59"}
+    )
+    assert r.status_code == 200
+    assert len(r.json()) == 4
+
+def test_listar_agenda_compacta(client: TestClient, db_session):
+    pid = _criar_profissional_com_agenda(db_session)
+    r = client.get(
+        f"/profissionais/profissionais/{pid}/agenda",
+        params={"inicio": "2026-10-01T00:00:00", "fim": "2026-10-31T23:59:59", "compacto": True}
+    )
+    assert r.status_code == 200
+    assert r.json() == [
+        {"data": "2026-10-19", "inicio": "08:00", "intervalo": 30, "mapa": "1001"},
+        {"data": "2026-10-20", "inicio": "14:00", "intervalo": 0, "mapa": "1"},
+    ]
+
+def test_listar_agenda_periodo_invalido(client: TestClient, db_session):
+    r = client.get(
+        "/profissionais/profissionais/1/agenda",
+        params={"inicio": "2026-10-31T00:00:00", "fim": "2026-10-01T00:00:00"}
+    )
+    assert r.status_code == 400
+
+def test_resumo_ocupacao_leitos(client: TestClient, db_session):
+    from models.leito import Leito
+    from utils.ocupacao import painel_ocupacao
+
+    db_session.add_all([
+        Leito(numero="101", tipo="UTI", unidade="Norte", ocupado=False),
+        Leito(numero="102", tipo="UTI", unidade="Norte", ocupado=True),
+        Leito(numero="201", tipo="Enfermaria", unidade="Sul", ocupado=False),
+    ])
+    db_session.commit()
+    painel_ocupacao.inicializar(db_session)
+    painel_ocupacao.leito_ocupado("Sul", "Enfermaria")
+
+    r = client.get("/administracao/administracao/leitos/ocupacao")
+    assert r.status_code == 200
+    resumo = {(i["unidade"], i["tipo"]): (i["livres"], i["ocupados"]) for i in r.json()}
+    assert resumo == {("Norte", "UTI"): (1, 1), ("Sul", "Enfermaria"): (0, 1)}
+
+def test_stream_ocupacao_leitos(client: TestClient, db_session):
+    import json
+    from models.leito import Leito
+    from utils.ocupacao import painel_ocupacao
+
+    db_session.add(Leito(numero="101", tipo="UTI", unidade="Norte", ocupado=True))
+    db_session.commit()
+    painel_ocupacao.inicializar(db_session)
+
+    with client.stream("GET", "/administracao/administracao/leitos/ocupacao/stream") as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/event-stream")
+        linhas = r.iter_lines()
+        assert next(linhas) == "event: resumo"
+        assert json.loads(next(linhas)[len("data: "):]) == [
+            {"unidade": "Norte", "tipo": "UTI", "livres": 0, "ocupados": 1}
+        ]
+        assert next(linhas) == ""
+
+        painel_ocupacao.leito_liberado("Norte", "UTI")
+        assert next(linhas) == "event: ocupacao"
+        assert json.loads(next(linhas)[len("data: "):]) == {"unidade": "Norte", "tipo": "UTI", "livres": 1, "ocupados": 0}
+
+def test_reservar_leito_automatico(db_session):
+    from models.leito import Leito
+    from utils.leitos import reservar_leito
+
+    db_session.add_all([
+        Leito(numero="101", tipo="UTI", unidade="Norte", ocupado=True),
+        Leito(numero="102", tipo="UTI", unidade="Norte", ocupado=False),
+        Leito(numero="103", tipo="UTI", unidade="Norte", ocupado=False),
+        Leito(numero="201", tipo="UTI", unidade="Sul", ocupado=False),
+    ])
+    db_session.commit()
+
+    primeiro = reservar_leito(db_session, "Norte", "UTI")
+    segundo = reservar_leito(db_session, "Norte", "UTI")
+    db_session.commit()
+    assert (primeiro.numero, segundo.numero) == ("102", "103")
+    assert primeiro.ocupado and segundo.ocupado
+    assert reservar_leito(db_session, "Norte", "UTI") is None
+
+def test_internacao_com_leito_automatico(client: TestClient, db_session, auth_headers):
+    from datetime import date
+    from models.leito import Leito
+    from models.paciente import Paciente
+    from models.usuario import PerfilEnum
+
+    db_session.add(Paciente(id=1, nome="Ana", email="ana@example.com", telefone="11999999999",
+                            data_nascimento=date(1980, 1, 1)))
+    db_session.add_all([
+        Leito(numero="101", tipo="UTI", unidade="Norte", ocupado=True),
+        Leito(numero="103", tipo="UTI", unidade="Norte", ocupado=False),
+        Leito(numero="102", tipo="UTI", unidade="Norte", ocupado=False),
+        Leito(numero="201", tipo="Enfermaria", unidade="Norte", ocupado=False),
+    ])
+    db_session.commit()
+    ids = {l.numero: l.id for l in db_session.query(Leito)}
+    headers = auth_headers(PerfilEnum.administrador)
+    internar = lambda **extra: client.post(
+        "/internacoes/internacoes/",
+        json={"paciente_id": 1, "data_entrada": "2026-03-01T10:00:00", "motivo": "Pneumonia", **extra},
+        headers=headers
+    )
+
+    assert internar(unidade="Norte").status_code == 400
+    r = internar(unidade="Norte", tipo="UTI", leitos_excluidos=[ids["102"]])
+    assert r.status_code == 200 and r.json()["leito_id"] == ids["103"]
+    r = internar(unidade="Norte", tipo="UTI")
+    assert r.status_code == 200 and r.json()["leito_id"] == ids["102"]
+    r = internar(unidade="Norte", tipo="UTI")
+    assert r.status_code == 409 and r.json()["detail"] == "Nenhum leito livre disponível"
+    db_session.expire_all()
+    assert not db_session.get(Leito, ids["201"]).ocupado
+
+def test_censo_diario_por_varredura(db_session):
+    from datetime import date, datetime, timedelta
+    from models.censo import CensoDiario
+    from models.internacao import Internacao
+    from models.leito import Leito
+    from models.paciente import Paciente
+    from utils.censo import consultar_censo
+
+    hoje = date.today()
+    d = lambda n: datetime.combine(hoje - timedelta(days=n), datetime.min.time()).replace(hour=10)
+    pac = Paciente(nome="Leo", email="leo@teste.com", telefone="11933333333")
+    l1 = Leito(numero="101", tipo="UTI", unidade="Norte")
+    l2 = Leito(numero="102", tipo="UTI", unidade="Norte")
+    db_session.add_all([pac, l1, l2])
+    db_session.commit()
+    db_session.add_all([
+        Internacao(paciente_id=pac.id, leito_id=l1.id, profissional_id=1,
+                   data_entrada=d(5), data_alta=d(3), motivo="A"),
+        Internacao(paciente_id=pac.id, leito_id=l2.id, profissional_id=1,
+                   data_entrada=d(4), motivo="B"),
+    ])
+    db_session.commit()
+
+    serie = consultar_censo(db_session, hoje - timedelta(days=6), hoje)
+    assert [c["ocupados"] for c in serie] == [1, 2, 2, 1, 1, 1]
+    # dias fechados foram materializados; o dia corrente não
+    assert db_session.query(CensoDiario).count() == 5
+    assert max(c.dia for c in db_session.query(CensoDiario)) == hoje - timedelta(days=1)
+
+def test_indicadores_internacao_vetorizados(db_session):
+    from datetime import datetime
+    from models.internacao import Internacao
+    from models.leito import Leito
+    from models.paciente import Paciente
+    from utils.indicadores import indicadores_internacao
+
+    p1 = Paciente(nome="Rui", email="rui@teste.com", telefone="11944444444")
+    p2 = Paciente(nome="Eva", email="eva@teste.com", telefone="11955555555")
+    leito = Leito(numero="301", tipo="Enfermaria", unidade="Leste")
+    db_session.add_all([p1, p2, leito])
+    db_session.commit()
+    db_session.add_all([
+        Internacao(paciente_id=p1.id, leito_id=leito.id, profissional_id=1, motivo="Pneumonia",
+                   data_entrada=datetime(2025, 1, 1), data_alta=datetime(2025, 1, 5)),
+        Internacao(paciente_id=p1.id, leito_id=leito.id, profissional_id=1, motivo="Pneumonia",
+                   data_entrada=datetime(2025, 1, 20), data_alta=datetime(2025, 1, 22)),
+        Internacao(paciente_id=p2.id, leito_id=leito.id, profissional_id=1, motivo="Pneumonia",
+                   data_entrada=datetime(2025, 1, 10), data_alta=datetime(2025, 1, 16)),
+    ])
+    db_session.commit()
+
+    [grupo] = indicadores_internacao(
+        db_session, datetime(2025, 1, 1), datetime(2025, 1, 31), ["unidade", "motivo"]
+    )
+    assert grupo["unidade"] == "Leste" and grupo["motivo"] == "Pneumonia"
+    assert grupo["internacoes"] == 3 and grupo["altas"] == 3
+    assert grupo["permanencia_media"] == 4.0
+    assert grupo["permanencia_p50"] == 4.0
+    assert abs(grupo["taxa_readmissao_30d"] - 1 / 3) < 1e-9
+
+def test_resumo_financeiro_consolidado(db_session):
+    from datetime import datetime
+    from decimal import Decimal
+    from models.financeiro import LancamentoFinanceiro
+    from utils.financeiro import consolidar_lancamento, resumir_lancamentos, verificar_consolidado
+
+    for tipo, valor, unidade, data in [
+        ("Receita", "0.10", "Norte", datetime(2025, 1, 1)),
+        ("receita", "0.20", "Norte", datetime(2025, 1, 2)),
+        ("Despesa", "0.05", "Sul", datetime(2025, 1, 2)),
+        ("receita", "1000.00", "Sul", datetime(2025, 2, 9)),
+    ]:
+        lanc = LancamentoFinanceiro(
+            tipo=tipo, categoria="Geral", valor=Decimal(valor),
+            unidade=unidade, data_lancamento=data
+        )
+        db_session.add(lanc)
+        consolidar_lancamento(db_session, lanc)
+    db_session.commit()
+    assert verificar_consolidado(db_session) == []
+
+    [total] = resumir_lancamentos(db_session, datetime(2025, 1, 1), datetime(2025, 1, 31))
+    assert total["receita"] == Decimal("0.30")
+    assert total["saldo"] == Decimal("0.25")
+
+    grupos = resumir_lancamentos(db_session, datetime(2025, 1, 1), datetime(2025, 2, 28), ["unidade", "mes"])
+    assert [(g["unidade"], g["mes"], g["saldo"]) for g in grupos] == [
+        ("Norte", "2025-01", Decimal("0.30")),
+        ("Sul", "2025-01", Decimal("-0.05")),
+        ("Sul", "2025-02", Decimal("1000.00")),
+    ]
+
+    # bordas fracionadas vêm dos lançamentos brutos
+    [parcial] = resumir_lancamentos(db_session, datetime(2025, 1, 1, 12), datetime(2025, 2, 9, 12))
+    assert parcial["receita"] == Decimal("1000.20")
+
+def test_reconstruir_consolidado(db_session):
+    from datetime import datetime
+    from decimal import Decimal
+    from models.financeiro import ConsolidadoFinanceiroDiario, LancamentoFinanceiro
+    from utils.financeiro import reconstruir_consolidado, semear_consolidado, verificar_consolidado
+
+    assert not semear_consolidado(db_session)
+    db_session.add_all([
+        LancamentoFinanceiro(tipo="Receita", categoria="SUS", valor=Decimal("10.50"),
+                             unidade="Norte", data_lancamento=datetime(2025, 3, 1, 9)),
+        LancamentoFinanceiro(tipo="receita", categoria="SUS", valor=Decimal("4.50"),
+                             unidade="Norte", data_lancamento=datetime(2025, 3, 1, 18)),
+    ])
+    db_session.commit()
+    assert len(verificar_consolidado(db_session)) == 1
+
+    # Banco existente com consolidado recém-criado: semeado uma única vez
+    assert semear_consolidado(db_session)
+    assert verificar_consolidado(db_session) == []
+    assert not semear_consolidado(db_session)
+
+    assert reconstruir_consolidado(db_session) == 1
+    [linha] = db_session.query(ConsolidadoFinanceiroDiario).all()
+    assert (linha.tipo, linha.total, linha.quantidade) == ("receita", Decimal("15.00"), 2)
+    assert verificar_consolidado(db_session) == []
+
+def test_pivo_financeiro_mensal(db_session):
+    from datetime import date, datetime
+    from decimal import Decimal
+    from models.financeiro import LancamentoFinanceiro
+    from utils.financeiro import consolidar_lancamento
+    from utils.relatorios import pivo_csv, pivo_financeiro
+
+    for tipo, valor, data in [
+        ("receita", "100.10", datetime(2025, 1, 5)),
+        ("despesa", "40.00", datetime(2025, 1, 20)),
+        ("receita", "10.00", datetime(2025, 3, 1)),
+    ]:
+        lanc = LancamentoFinanceiro(tipo=tipo, categoria="SUS", valor=Decimal(valor),
+                                    unidade="Norte", data_lancamento=data)
+        db_session.add(lanc)
+        consolidar_lancamento(db_session, lanc)
+    db_session.commit()
+
+    pivo = pivo_financeiro(db_session, date(2025, 1, 1), date(2025, 3, 31), ["unidade", "categoria"])
+    assert pivo["meses"] == ["2025-01", "2025-02", "2025-03"]
+    [linha] = pivo["linhas"]
+    assert linha["saldo"] == [Decimal("60.10"), Decimal("0.00"), Decimal("10.00")]
+    assert linha["variacao"] == [None, Decimal("-60.10"), Decimal("10.00")]
+    assert linha["saldo_acumulado"] == [Decimal("60.10"), Decimal("60.10"), Decimal("70.10")]
+
+    csv = "".join(pivo_csv(pivo, ["unidade", "categoria"])).splitlines()
+    assert csv[0] == "unidade,categoria,mes,receita,despesa,saldo,variacao,saldo_acumulado"
+    assert csv[2] == "Norte,SUS,2025-02,0.00,0.00,0.00,-60.10,60.10"
+    assert csv[3] == "Norte,SUS,2025-03,10.00,0.00,10.00,10.00,70.10"
+
+def test_importacao_lote_csv(db_session, tmp_path, monkeypatch):
+    import asyncio
+    from models.financeiro import LancamentoFinanceiro
+    from routers.administracao import LancamentoIn
+    from settings import settings
+    from utils.financeiro import verificar_consolidado
+    from utils.ingestao import ImportacaoLote
+
+    monkeypatch.setattr(settings, "lotes_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "lote_tamanho_bloco", 2)
+    corpo = [
+        "tipo,categoria,valor,data_lancamento,unidade,descricao,referencia_externa",
+        "receita,SUS,10.00,2025-04-01T10:00:00,Norte,A,ERP-1",
+        "receita,SUS,abc,2025-04-01T10:00:00,Norte,B,ERP-2",
+        "despesa,Folha,5.50,2025-04-02T10:00:00,Norte,C,ERP-3",
+        "receita,SUS,10.00,2025-04-01T10:00:00,Norte,A,ERP-1",
+        "receita,SUS,1,2",
+    ]
+
+    async def linhas():
+        for linha in corpo:
+            yield linha
+
+    importacao = ImportacaoLote(LancamentoIn)
+    resumo = asyncio.run(importacao.executar(db_session, linhas(), "csv"))
+    assert resumo["inseridos"] == 2
+    assert resumo["duplicados"] == 1
+    assert resumo["erros"] == 2
+    assert resumo["ultima_linha_confirmada"] == 6
+    assert db_session.query(LancamentoFinanceiro).count() == 2
+    assert verificar_consolidado(db_session) == []
+    with open(importacao.caminho_erros, encoding="utf-8") as f:
+        assert [l.split(",")[0] for l in f.read().splitlines()] == ["linha", "3", "6"]
+
+    # Linhas quebradas entre pedaços; linha acima do limite é rejeitada sem acumular o corpo
+    import pytest
+    from utils.ingestao import LinhaInvalida, linhas_do_corpo
+
+    async def pedacos(*partes):
+        for parte in partes:
+            yield parte
+
+    async def coletar(stream, **kw):
+        return [l async for l in linhas_do_corpo(stream, **kw)]
+
+    assert asyncio.run(coletar(pedacos(b"a,b\r\nc", b",d\n\ne", b",f"))) == ["a,b", "c,d", "", "e,f"]
+    with pytest.raises(LinhaInvalida, match="excede 10 bytes"):
+        asyncio.run(coletar(pedacos(b"ok\n", b"x" * 8, b"x" * 8), linha_maxima=10))
+
+    # Linha inválida no meio do corpo: confirma as anteriores e devolve o resumo parcial
+    corpo_bytes = "\n".join(corpo[:2] + ["despesa,Folha,1.00,2025-04-03T10:00:00,Norte,D,ERP-9"]).encode()
+    importacao = ImportacaoLote(LancamentoIn)
+    resumo = asyncio.run(importacao.executar(
+        db_session, linhas_do_corpo(pedacos(corpo_bytes + b"\n\xff\xfe\n", b"receita,SUS,1,2\n")), "csv"
+    ))
+    assert resumo["interrompido"] and resumo["falha"].startswith("linha 4: linha não está em UTF-8")
+    assert resumo["ultima_linha_confirmada"] == 3 and resumo["inseridos"] == 1
+
+def test_estoque_fefo(db_session):
+    from datetime import datetime
+    from models.suprimento import MovimentacaoEstoque, Suprimento
+    from utils.estoque import listar_lotes_fefo, registrar_entrada, registrar_saida
+
+    sup = Suprimento(nome="Dipirona", categoria="Medicamento", quantidade=0)
+    db_session.add(sup)
+    db_session.flush()
+    registrar_entrada(db_session, sup.id, 10, datetime(2026, 12, 1), "L-B")
+    registrar_entrada(db_session, sup.id, 5, datetime(2026, 6, 1), "L-A")
+    registrar_entrada(db_session, sup.id, 3, None, "L-C")
+    db_session.commit()
+    assert sup.quantidade == 18
+
+    movs = registrar_saida(db_session, sup.id, 7)
+    db_session.commit()
+    assert [(m.lote_id, m.quantidade) for m in movs] == [(2, 5), (1, 2)]
+    assert sup.quantidade == 11
+    assert [(l.codigo, l.quantidade) for l in listar_lotes_fefo(db_session, sup.id)] == [("L-B", 8), ("L-C", 3)]
+
+    assert registrar_saida(db_session, sup.id, 12) is None
+    db_session.rollback()
+    assert db_session.query(MovimentacaoEstoque).count() == 5
+
+def test_alertas_estoque(db_session, monkeypatch):
+    from datetime import datetime, timedelta
+    from models.suprimento import Suprimento
+    from settings import settings
+    from utils import alertas
+    from utils.estoque import registrar_entrada
+
+    alertas.limpar_cache()
+    luva = Suprimento(nome="Luva", categoria="EPI", quantidade=0, estoque_minimo=50)
+    soro = Suprimento(nome="Soro", categoria="Medicamento", quantidade=0, estoque_minimo=5)
+    db_session.add_all([luva, soro])
+    db_session.flush()
+    registrar_entrada(db_session, luva.id, 20, datetime.now() + timedelta(days=400))
+    registrar_entrada(db_session, soro.id, 8, datetime.now() + timedelta(days=10), "S-1")
+    db_session.commit()
+
+    lista = alertas.alertas_estoque(db_session, 30)
+    assert [a["nome"] for a in lista["vencendo"]] == ["Soro"]
+    assert [a["nome"] for a in lista["estoque_baixo"]] == ["Luva"]
+
+    enviados = []
+    monkeypatch.setattr(settings, "alertas_email", "farmacia@teste.com")
+    monkeypatch.setattr(alertas, "enviar_email", lambda *args: enviados.append(args) or True)
+    assert alertas.notificar_alertas(db_session, 30)
+    [(destinatario, _, corpo)] = enviados
+    assert destinatario == "farmacia@teste.com" and "Soro (lote S-1)" in corpo
+
+def test_conflitos_teleconsulta(db_session):
+    from datetime import datetime
+    from models.agenda import AgendaMedica
+    from models.consulta import Consulta, StatusConsulta
+    from models.telemedicina import ConsultaTelemedicina
+    from utils.conflitos import conflitos_profissional
+
+    db_session.add_all([
+        ConsultaTelemedicina(paciente_id=1, profissional_id=7, data_hora=datetime(2026, 5, 4, 9, 0),
+                             duracao_minutos=90, link_video="https://video/1"),
+        Consulta(paciente_id=1, profissional_id=7, data_hora=datetime(2026, 5, 4, 14, 0), especialidade="X"),
+        AgendaMedica(profissional_id=7, data_hora=datetime(2026, 5, 4, 16, 0), disponivel=True),
+        ConsultaTelemedicina(paciente_id=1, profissional_id=8, data_hora=datetime(2026, 5, 4, 10, 0),
+                             link_video="https://video/2"),
+        ConsultaTelemedicina(paciente_id=1, profissional_id=7, data_hora=datetime(2026, 5, 4, 18, 0),
+                             link_video="https://video/3", status=StatusConsulta.Cancelada),
+    ])
+    db_session.commit()
+
+    tipos = lambda h, m, d: [c["tipo"] for c in conflitos_profissional(db_session, 7, datetime(2026, 5, 4, h, m), d)]
+    assert tipos(10, 0, 30) == ["teleconsulta"]
+    assert tipos(10, 30, 30) == []
+    assert tipos(13, 45, 30) == ["consulta"]
+    assert tipos(15, 45, 60) == ["agenda"]
+    assert tipos(11, 0, 180) == []
+    assert tipos(11, 0, 200) == ["consulta"]
+    assert tipos(18, 0, 30) == []  # teleconsulta cancelada libera o horário
+
+def test_teleconsultas_profissional_paginadas(client: TestClient, db_session, auth_headers):
+    from datetime import datetime
+    from models.telemedicina import ConsultaTelemedicina
+    from models.usuario import PerfilEnum
+
+    for i, hora in enumerate([8, 9, 10, 11, 15]):
+        db_session.add(ConsultaTelemedicina(
+            paciente_id=1, profissional_id=3, link_video=f"https://video/{i}", observacoes="",
+            data_hora=datetime(2026, 10, 19, hora), status="Realizada" if hora == 9 else "Agendada"
+        ))
+    db_session.commit()
+    headers = auth_headers(PerfilEnum.profissional)
+    url = "/telemedicina/telemedicina/profissional/3"
+    janela = {"inicio": "2026-10-19T00:00:00", "fim": "2026-10-19T12:00:00", "status": "Agendada", "limite": 2}
+
+    r1 = client.get(url, params=janela, headers=headers).json()
+    assert [i["data_hora"][11:13] for i in r1["itens"]] == ["08", "10"]
+    r2 = client.get(url, params={**janela, "cursor": r1["proximo_cursor"]}, headers=headers).json()
+    assert [i["data_hora"][11:13] for i in r2["itens"]] == ["11"]
+    assert r2["proximo_cursor"] is None
+
+    polling = client.get(f"{url}/alteracoes", headers=headers).json()
+    assert len(polling["itens"]) == 5
+    vazio = client.get(f"{url}/alteracoes", params={"desde": polling["proximo_cursor"]}, headers=headers).json()
+    assert vazio["itens"] == [] and vazio["proximo_cursor"] == polling["proximo_cursor"]
+
+    # Cursor = seq do feed de alterações: cada alteração posterior aparece uma vez
+    primeira = db_session.query(ConsultaTelemedicina).order_by(ConsultaTelemedicina.id).first()
+    primeira.observacoes = "Remarcar"
+    db_session.commit()
+    novas = client.get(f"{url}/alteracoes", params={"desde": polling["proximo_cursor"]}, headers=headers).json()
+    assert [(i["id"], i["observacoes"]) for i in novas["itens"]] == [(primeira.id, "Remarcar")]
+    assert int(novas["proximo_cursor"]) > int(polling["proximo_cursor"])
+
+def test_busca_textos_clinicos(db_session):
+    from datetime import datetime
+    from models.evolucao import EvolucaoClinica
+    from models.paciente import HistoricoClinico
+    from models.profissional import Profissional
+    from sqlalchemy import text
+    from utils.busca_clinica import buscar_textos_clinicos, reindexar_busca, semear_busca
+
+    db_session.add(Profissional(id=4, nome="Dra. Ana", email="ana@example.com",
+                                especialidade="Infectologia", registro_conselho="CRM-4"))
+    evolucao = EvolucaoClinica(paciente_id=1, profissional_id=4, data_registro=datetime(2026, 9, 1),
+                               anotacoes="Suspeita de SÉPSE <script>, iniciado antibiótico & soro.")
+    db_session.add_all([
+        evolucao,
+        EvolucaoClinica(paciente_id=2, profissional_id=5, data_registro=datetime(2026, 3, 1),
+                        anotacoes="Sepse de foco urinário."),
+        HistoricoClinico(paciente_id=3, data_registro=datetime(2026, 9, 10),
+                         descricao="Internação prévia por sepse", profissional="Dra. Ana"),
+    ])
+    db_session.commit()
+
+    todos = buscar_textos_clinicos(db_session, "sepse")
+    assert sorted(r["paciente_id"] for r in todos) == [1, 2, 3]
+    recentes = buscar_textos_clinicos(db_session, "sepse", inicio=datetime(2026, 7, 1), profissional_id=4)
+    assert sorted((r["origem"], r["paciente_id"]) for r in recentes) == [("evolucao", 1), ("historico", 3)]
+    trecho = next(r["trecho"] for r in recentes if r["origem"] == "evolucao")
+    assert "<mark>SÉPSE</mark> &lt;script&gt;" in trecho and "&amp; soro" in trecho
+
+    evolucao.anotacoes = "Quadro estável."
+    db_session.commit()
+    assert len(buscar_textos_clinicos(db_session, "sepse")) == 2
+    assert buscar_textos_clinicos(db_session, 'sepse"') is None
+    assert reindexar_busca(db_session) == 3
+    assert len(buscar_textos_clinicos(db_session, "antibio*")) == 0
+
+    # Banco existente com índice recém-criado (vazio): semeado uma única vez
+    assert not semear_busca(db_session)
+    db_session.execute(text("DELETE FROM busca_clinica"))
+    db_session.commit()
+    assert semear_busca(db_session) and len(buscar_textos_clinicos(db_session, "sepse")) == 2
+
+def test_compressao_textos_clinicos(db_session, monkeypatch):
+    from datetime import datetime
+    from sqlalchemy import text
+    from models.evolucao import EvolucaoClinica
+    from settings import settings
+    from utils.compressao import medir_compressao, migrar_compressao
+
+    longo = "Paciente evolui com melhora clínica, sem febre. " * 40
+    db_session.add_all([
+        EvolucaoClinica(paciente_id=1, profissional_id=1, data_registro=datetime(2026, 1, 1), anotacoes=longo),
+        EvolucaoClinica(paciente_id=1, profissional_id=1, data_registro=datetime(2026, 1, 2), anotacoes="Estável."),
+    ])
+    db_session.commit()
+    tipos = lambda: [t for (t,) in db_session.execute(text("SELECT typeof(anotacoes) FROM evolucoes_clinicas ORDER BY id"))]
+    assert tipos() == ["text", "text"]
+
+    monkeypatch.setattr(settings, "textos_compressao", True)
+    assert migrar_compressao(db_session, lote=1)["evolucoes_clinicas.anotacoes"] == {"lidas": 2, "comprimidas": 1}
+    assert tipos() == ["blob", "text"]
+    assert migrar_compressao(db_session)["evolucoes_clinicas.anotacoes"]["comprimidas"] == 0
+
+    db_session.expire_all()
+    assert [e.anotacoes for e in db_session.query(EvolucaoClinica).order_by(EvolucaoClinica.id)] == [longo, "Estável."]
+    medida = medir_compressao(db_session)["evolucoes_clinicas.anotacoes"]
+    assert medida["acima_do_limite"] == 1 and medida["bytes_armazenados"] < medida["bytes_texto"]
+
+    # Fora do SQLite a coluna só deixa de ser TEXT com a compressão ligada
+    from sqlalchemy import LargeBinary
+    from sqlalchemy.dialects import postgresql
+    tipo = EvolucaoClinica.__table__.c.anotacoes.type
+    assert isinstance(tipo.dialect_impl(postgresql.dialect()).impl, LargeBinary)
+    monkeypatch.setattr(settings, "textos_compressao", False)
+    pg = postgresql.dialect()
+    assert not tipo.binario(pg)
+    assert tipo.dialect_impl(pg).process_bind_param(longo, pg) == longo
+
+    # Em tabelas existentes vale o tipo real da coluna, não a configuração
+    from models.tipos import TextoComprimido
+    binaria, texto = TextoComprimido(), TextoComprimido()
+    binaria.coluna_binaria, texto.coluna_binaria = True, False
+    assert binaria.binario(pg) and binaria.process_bind_param("Estável.", pg) == "Estável.".encode()
+    monkeypatch.setattr(settings, "textos_compressao", True)
+    assert not texto.binario(pg) and texto.process_bind_param(longo, pg) == longo
+
+def test_timeline_paciente_intercalada(client: TestClient, db_session, auth_headers):
+    from datetime import date, datetime
+    from models.consulta import Consulta
+    from models.evolucao import EvolucaoClinica
+    from models.paciente import HistoricoClinico, Paciente
+    from models.prescricao import Prescricao
+    from models.usuario import PerfilEnum
+
+    db_session.add(Paciente(id=1, nome="Ana", email="ana@example.com", telefone="11999999999",
+                            data_nascimento=date(1980, 1, 1)))
+    db_session.add_all([
+        HistoricoClinico(paciente_id=1, data_registro=datetime(2005, 1, 1), descricao="Apendicectomia",
+                         profissional="Dr. X"),
+        Consulta(paciente_id=1, profissional_id=2, data_hora=datetime(2026, 5, 1, 10), especialidade="Cardiologia"),
+        Prescricao(paciente_id=1, profissional_id=2, data_prescricao=datetime(2026, 5, 1, 10),
+                   medicamento="AAS", posologia="1x ao dia"),
+        EvolucaoClinica(paciente_id=1, profissional_id=2, data_registro=datetime(2026, 6, 1), anotacoes="Estável"),
+        EvolucaoClinica(paciente_id=2, profissional_id=2, data_registro=datetime(2026, 7, 1), anotacoes="Outro"),
+    ])
+    db_session.commit()
+    headers = auth_headers(PerfilEnum.profissional)
+
+    vistos, cursor = [], None
+    while True:
+        r = client.get("/pacientes/1/timeline", params={"limite": 2, "cursor": cursor}, headers=headers).json()
+        vistos += [(e["tipo"], e["data"][:10]) for e in r["itens"]]
+        cursor = r["proximo_cursor"]
+        if not cursor:
+            break
+    assert vistos == [
+        ("evolucao", "2026-06-01"), ("prescricao", "2026-05-01"),
+        ("consulta", "2026-05-01"), ("historico", "2005-01-01"),
+    ]
+    r = client.get("/pacientes/1/timeline", params={"tipos": ["historico"]}, headers=headers).json()
+    assert [e["descricao"] for e in r["itens"]] == ["Apendicectomia"]
+    assert client.get("/pacientes/1/timeline", params={"tipos": ["x"]}, headers=headers).status_code == 400
+
+def test_interacoes_na_prescricao(client: TestClient, db_session, auth_headers, tmp_path, monkeypatch):
+    import os
+    from datetime import date, datetime
+    from models.paciente import Paciente
+    from models.profissional import Profissional
+    from models.usuario import PerfilEnum
+    from utils.interacoes import IndiceInteracoes, medir_latencia
+    import utils.interacoes as interacoes_mod
+
+    csv_path = tmp_path / "interacoes.csv"
+    csv_path.write_text(
+        "medicamento_a,medicamento_b,gravidade,descricao\n"
+        "Varfarina,Ácido Acetilsalicílico,grave,Risco de sangramento\n"
+    )
+    indice = IndiceInteracoes(str(csv_path), intervalo=0)
+    assert indice.carregar() == 1
+    monkeypatch.setattr(interacoes_mod, "indice_interacoes", indice)
+
+    db_session.add_all([
+        Paciente(id=1, nome="Ana", email="ana@example.com", telefone="11999999999", data_nascimento=date(1980, 1, 1)),
+        Profissional(id=2, nome="Dr. B", email="b@example.com", especialidade="Clínica", registro_conselho="CRM-2"),
+    ])
+    db_session.commit()
+    headers = auth_headers(PerfilEnum.profissional)
+    prescrever = lambda med: client.post("/profissionais/profissionais/2/prescricoes", headers=headers, json={
+        "paciente_id": 1, "data_prescricao": datetime.now().isoformat(), "medicamento": med, "posologia": "1x"
+    })
+
+    assert prescrever("VARFARINA").json()["interacoes"] == []
+    r = prescrever("acido acetilsalicilico")
+    assert r.status_code == 200
+    assert r.json()["interacoes"] == [{"medicamento": "VARFARINA", "gravidade": "grave",
+                                       "descricao": "Risco de sangramento"}]
+
+    # Recarga a quente: a mesma interação passa a bloquear
+    csv_path.write_text(
+        "medicamento_a,medicamento_b,gravidade,descricao\n"
+        "varfarina,acido acetilsalicilico,contraindicada,Risco de sangramento\n"
+    )
+    os.utime(csv_path, (0, 0))
+    assert prescrever("Ácido acetilsalicílico").status_code == 409
+    assert medir_latencia(indice, repeticoes=100)["pares"] == 1
+
+def test_autocomplete_especialidades_e_medicamentos(client: TestClient, auth_headers):
+    from models.usuario import PerfilEnum
+    from utils.autocomplete import indice_especialidades, indice_medicamentos
+
+    indice_especialidades.substituir(["Cardiologia", "Cirurgia Pediátrica", "Clínica Médica"])
+    indice_medicamentos.substituir(["Dipirona"])
+    client.post("/profissionais/profissionais/", json={
+        "nome": "Dr. C", "email": "c@example.com", "especialidade": "Pediatria", "registro_conselho": "CRM-9"
+    })
+
+    r = client.get("/profissionais/profissionais/especialidades/sugestoes", params={"q": "pedia"})
+    assert r.json() == ["Pediatria", "Cirurgia Pediátrica"]
+    assert client.get("/profissionais/profissionais/especialidades/sugestoes", params={"q": "CLI"}).json() == ["Clínica Médica"]
+    r = client.get("/profissionais/profissionais/medicamentos/sugestoes", params={"q": "dip"},
+                   headers=auth_headers(PerfilEnum.profissional))
+    assert r.json() == ["Dipirona"]
+
+    r = client.post("/pacientes/", json={"nome": "Ana", "email": "ana@example.com",
+                                         "telefone": "11999999999", "data_nascimento": "1980-01-01"})
+    r = client.post(f"/pacientes/{r.json()['id']}/consultas",
+                    json={"data_hora": "2026-10-20T10:00:00", "especialidade": "Cardio"})
+    assert r.status_code == 404 and "Cardiologia" in r.json()["detail"]
+
+def test_cache_leitura_profissionais(client: TestClient, tmp_path, monkeypatch):
+    from utils.cache import BackendMemoria, BackendSQLite, cache_leitura
+
+    monkeypatch.setattr(cache_leitura, "backend", BackendSQLite(str(tmp_path / "cache.db"), max_itens=10))
+    url = "/profissionais/profissionais/"
+    novo = lambda n: client.post(url, json={"nome": f"Dr. {n}", "email": f"{n}@example.com",
+                                            "especialidade": "Clínica", "registro_conselho": f"CRM-{n}"})
+
+    novo(1)
+    assert len(client.get(url).json()) == 1
+    assert len(client.get(url).json()) == 1
+    novo(2)  # invalida
+    assert len(client.get(url).json()) == 2
+    assert cache_leitura.metricas()["profissionais"] == {
+        "acertos": 1, "falhas": 2, "invalidacoes": 2, "taxa_acerto": 0.333
+    }
+
+    lru = BackendMemoria(max_itens=2)
+    for chave in ("a", "b"):
+        lru.guardar("x", chave, chave.upper(), ttl=60)
+    lru.obter("x", "a")
+    lru.guardar("x", "c", "C", ttl=60)
+    assert lru.obter("x", "b") == (False, None) and lru.obter("x", "a") == (True, "A")
+
+def test_listagem_resposta_rapida(client: TestClient, db_session, monkeypatch):
+    from datetime import datetime
+    from models.consulta import Consulta
+    from settings import settings
+
+    db_session.add_all([
+        Consulta(paciente_id=1, profissional_id=2, data_hora=datetime(2026, 5, 1, 10, 30), especialidade="Cardiologia"),
+        Consulta(paciente_id=1, profissional_id=3, data_hora=datetime(2026, 6, 1, 8), especialidade="Ortopedia",
+                 status="Cancelada"),
+    ])
+    db_session.commit()
+
+    padrao = client.get("/pacientes/1/consultas").json()
+    monkeypatch.setattr(settings, "respostas_rapidas", True)
+    rapida = client.get("/pacientes/1/consultas")
+    assert rapida.headers["content-type"] == "application/json"
+    assert rapida.json() == padrao
+
+    esquema = client.get("/openapi.json").json()
+    resposta = esquema["paths"]["/pacientes/{paciente_id}/consultas"]["get"]["responses"]["200"]
+    assert resposta["content"]["application/json"]["schema"]["items"]["$ref"].endswith("/ConsultaOut")
+
+def test_campos_esparsos(client: TestClient):
+    r = client.post("/pacientes/", json={"nome": "Ana", "email": "ana@example.com",
+                                         "telefone": "11999999999", "data_nascimento": "1980-01-01"})
+    pid = r.json()["id"]
+
+    assert client.get("/pacientes/", params={"fields": "id,nome,telefone"}).json() == [
+        {"id": pid, "nome": "Ana", "telefone": "11999999999"}
+    ]
+    assert client.get(f"/pacientes/{pid}", params={"fields": "nome"}).json() == {"nome": "Ana"}
+    assert client.get(f"/pacientes/{pid}").json()["email"] == "ana@example.com"
+    r = client.get("/pacientes/", params={"fields": "id,senha"})
+    assert r.status_code == 400 and "senha" in r.json()["detail"]
+
+    client.post("/profissionais/profissionais/", json={
+        "nome": "Dr. C", "email": "c@example.com", "especialidade": "Pediatria", "registro_conselho": "CRM-9"
+    })
+    assert client.get("/profissionais/profissionais/", params={"fields": "especialidade"}).json() == [
+        {"especialidade": "Pediatria"}
+    ]
+
+def test_get_condicional(client: TestClient, auth_headers):
+    from models.usuario import PerfilEnum
+
+    r = client.post("/pacientes/", json={"nome": "Ana", "email": "ana@example.com",
+                                         "telefone": "11999999999", "data_nascimento": "1980-01-01"})
+    pid = r.json()["id"]
+
+    r = client.get(f"/pacientes/{pid}")
+    etag, modificado = r.headers["etag"], r.headers["last-modified"]
+    assert client.get(f"/pacientes/{pid}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/pacientes/{pid}", headers={"If-Modified-Since": modificado}).status_code == 304
+    assert client.get(f"/pacientes/{pid}", params={"fields": "nome"},
+                      headers={"If-None-Match": etag}).status_code == 200
+
+    client.put(f"/pacientes/{pid}", json={"telefone": "11888888888"})
+    r = client.get(f"/pacientes/{pid}", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    assert r.json()["telefone"] == "11888888888"
+
+    r = client.post("/profissionais/profissionais/", json={
+        "nome": "Dr. C", "email": "c@example.com", "especialidade": "Pediatria", "registro_conselho": "CRM-9"
+    })
+    prof = r.json()["id"]
+    r = client.get(f"/profissionais/profissionais/{prof}")
+    assert r.json()["nome"] == "Dr. C"
+    assert client.get(f"/profissionais/profissionais/{prof}",
+                      headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    assert client.get("/profissionais/profissionais/999").status_code == 404
+
+    agenda = f"/profissionais/profissionais/{prof}/agenda"
+    etag = client.get(agenda).headers["etag"]
+    assert client.get(agenda, headers={"If-None-Match": etag}).status_code == 304
+    client.post(agenda, json={"data_hora": "2026-07-01T09:00:00"}, headers=auth_headers(PerfilEnum.profissional))
+    r = client.get(agenda, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and len(r.json()) == 1 and r.headers["etag"] != etag
+
+def test_feed_alteracoes(client: TestClient, db_session, auth_headers, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+    from models.alteracao import Alteracao
+    from models.leito import Leito
+    from models.usuario import PerfilEnum
+    from utils.leitos import ocupar_leito
+
+    headers = auth_headers(PerfilEnum.profissional)
+    admin = auth_headers(PerfilEnum.administrador)
+    feed = lambda **p: client.get("/alteracoes/", params=p, headers=headers)
+
+    r = client.post("/pacientes/", json={"nome": "Ana", "email": "ana@example.com",
+                                         "telefone": "11999999999", "data_nascimento": "1980-01-01"})
+    pid = r.json()["id"]
+    client.put(f"/pacientes/{pid}", json={"telefone": "11888888888"})
+    leito = Leito(numero="101", tipo="UTI", unidade="A", ocupado=False)
+    db_session.add(leito)
+    db_session.commit()
+    assert ocupar_leito(db_session, leito.id)
+    db_session.commit()
+
+    r = feed(limite=2).json()
+    assert [(i["entidade"], i["operacao"]) for i in r["itens"]] == [("paciente", "upsert")] * 2
+    assert r["mais"] and r["itens"][1]["dados"]["telefone"] == "11888888888"
+    r = feed(desde=r["proximo"]).json()
+    assert [(i["entidade"], i["dados"]["ocupado"]) for i in r["itens"]] == [("leito", False), ("leito", True)]
+    assert not r["mais"]
+    desde = r["proximo"]
+
+    client.delete(f"/pacientes/{pid}")
+    r = feed(desde=desde, entidades="paciente").json()
+    assert r["itens"] == [{"seq": desde + 1, "entidade": "paciente", "id": pid, "operacao": "delete", "dados": None}]
+    assert feed(entidades="nada").status_code == 400
+
+    # Compactação: só a última entrada de cada registro
+    r = client.post("/alteracoes/compactar", headers=admin).json()
+    assert r == {"compactadas": 3, "expiradas": 0, "corte": 0}
+    assert [(i["entidade"], i["operacao"]) for i in feed().json()["itens"]] == [("leito", "upsert"), ("paciente", "delete")]
+
+    # Retenção: entradas antigas saem e clientes atrasados recebem 410
+    db_session.query(Alteracao).update({Alteracao.registrado_em: datetime.now(timezone.utc) - timedelta(days=60)})
+    db_session.commit()
+    atual = client.get("/alteracoes/atual", headers=headers).json()["seq"]
+    assert client.post("/alteracoes/compactar", headers=admin).json()["corte"] == atual
+    assert feed(desde=0).status_code == 410
+    assert feed(desde=atual).json() == {"itens": [], "proximo": atual, "mais": False}
+    client.post("/pacientes/", json={"nome": "Bia", "email": "bia@example.com",
+                                     "telefone": "11999999999", "data_nascimento": "1990-01-01"})
+    assert feed(desde=atual).json()["itens"][0]["seq"] == atual + 1
+
+    # Cada leitura do feed fica na auditoria
+    import routers.alteracoes as alt_mod
+    leituras = []
+    monkeypatch.setattr(alt_mod, "registrar_log", lambda *a, **k: leituras.append(k["descricao"]))
+    feed(desde=atual)
+    assert leituras == [f"Leitura do feed de alterações de seq {atual} a {atual + 1}"]
+
+def test_idempotency_key(client: TestClient, db_session):
+    from models.paciente import Paciente
+
+    dados = {"nome": "Ana", "email": "ana@example.com", "telefone": "11999999999", "data_nascimento": "1980-01-01"}
+    chave = {"Idempotency-Key": "3f1c-ana"}
+
+    primeira = client.post("/pacientes/", json=dados, headers=chave)
+    repetida = client.post("/pacientes/", json=dados, headers=chave)
+    assert primeira.status_code == repetida.status_code == 200
+    assert repetida.json() == primeira.json()
+    assert repetida.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in primeira.headers
+    assert db_session.query(Paciente).count() == 1
+
+    assert client.post("/pacientes/", json={**dados, "nome": "Bia"}, headers=chave).status_code == 422
+    assert client.post("/pacientes/", json=dados, headers={"Idempotency-Key": ""}).status_code == 400
+    assert client.post("/pacientes/", json=dados).status_code == 409  # sem chave: executa normalmente
+    nova = client.post("/pacientes/", json=dados, headers={"Idempotency-Key": "outra"})
+    assert nova.status_code == 409 and "idempotent-replayed" not in nova.headers
+
+def test_colunas_novas_em_banco_existente(tmp_path):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session
+    from database import Base
+    from models.paciente import Paciente
+    from sqlalchemy import inspect
+    from sqlalchemy.exc import IntegrityError
+    from utils.esquema import adicionar_colunas_ausentes, criar_indices_ausentes
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'antigo.db'}")
+    with engine.begin() as conexao:
+        conexao.execute(text(
+            "CREATE TABLE pacientes (id INTEGER PRIMARY KEY, nome VARCHAR(100) NOT NULL, "
+            "email VARCHAR(150) NOT NULL, telefone VARCHAR(20), data_nascimento DATETIME)"
+        ))
+        conexao.execute(text("INSERT INTO pacientes (nome, email) VALUES ('Ana', 'ana@example.com')"))
+        conexao.execute(text(
+            "CREATE TABLE lancamentos_financeiros (id INTEGER PRIMARY KEY, tipo VARCHAR(30) NOT NULL, "
+            "categoria VARCHAR(50) NOT NULL, valor NUMERIC(12, 2) NOT NULL, data_lancamento DATETIME NOT NULL, "
+            "unidade VARCHAR(50), descricao TEXT, referencia_externa VARCHAR(100))"
+        ))
+        conexao.execute(text(
+            "CREATE INDEX ix_lancamentos_financeiros_referencia_externa "
+            "ON lancamentos_financeiros (referencia_externa)"
+        ))
+    Base.metadata.create_all(bind=engine)
+
+    assert adicionar_colunas_ausentes(engine) == ["pacientes.versao", "pacientes.atualizado_em"]
+    assert adicionar_colunas_ausentes(engine) == []
+    criados = criar_indices_ausentes(engine)
+    assert {"ix_pacientes_email", "ix_pacientes_data_nascimento", "ix_lancamentos_data_tipo",
+            "ix_lancamentos_financeiros_referencia_externa"} <= set(criados)
+    assert criar_indices_ausentes(engine) == []
+    unicos = {i["name"]: i["unique"] for i in inspect(engine).get_indexes("lancamentos_financeiros")}
+    assert unicos["ix_lancamentos_financeiros_referencia_externa"]
+    with engine.begin() as conexao:
+        inserir = text("INSERT INTO lancamentos_financeiros (tipo, categoria, valor, data_lancamento, "
+                       "referencia_externa) VALUES ('receita', 'SUS', 1, '2025-01-01', 'ERP-1')")
+        conexao.execute(inserir)
+        with pytest.raises(IntegrityError):
+            conexao.execute(inserir)
+    with Session(engine) as db:
+        paciente = db.query(Paciente).one()
+        assert paciente.versao == 1 and paciente.atualizado_em is not None
+        paciente.telefone = "11999999999"
+        db.commit()
+        assert paciente.versao == 2
+    engine.dispose()
+
+def test_idempotency_key_reserva_e_limites(tmp_path):
+    from fastapi.testclient import TestClient as Cliente
+    from starlette.responses import PlainTextResponse
+    from utils.cache import BackendMemoria, BackendSQLite
+    from utils.idempotencia import ArmazemIdempotencia, MiddlewareIdempotencia, _resumo
+
+    # Reserva atômica entre "workers" que compartilham o arquivo SQLite
+    caminho = str(tmp_path / "cache.db")
+    a, b = BackendSQLite(caminho, 10), BackendSQLite(caminho, 10)
+    assert a.reservar("idempotencia", "k", 1, ttl=60)
+    assert not b.reservar("idempotencia", "k", 2, ttl=60)
+    assert b.reservar("idempotencia", "vencida", 1, ttl=-1) and b.reservar("idempotencia", "vencida", 2, ttl=60)
+
+    execucoes = []
+    async def rota(scope, receive, send):
+        corpo = b""
+        while True:
+            mensagem = await receive()
+            corpo += mensagem.get("body", b"")
+            if not mensagem.get("more_body"):
+                break
+        execucoes.append(corpo)
+        await PlainTextResponse("x" * (20 if corpo == b"grande" else 5))(scope, receive, send)
+
+    armazem = ArmazemIdempotencia(BackendMemoria(10), ttl=60)
+    cliente = Cliente(MiddlewareIdempotencia(rota, armazem=armazem, resposta_maxima=10))
+
+    # Em andamento em outro worker: 409 sem executar
+    armazem.reservar(("POST", "/", _resumo(b"", 8), "ocupada"))
+    assert cliente.post("/", content=b"a", headers={"Idempotency-Key": "ocupada"}).status_code == 409
+
+    # Resposta acima do limite não é guardada; a retentativa não reexecuta
+    assert cliente.post("/", content=b"grande", headers={"Idempotency-Key": "g"}).status_code == 200
+    r = cliente.post("/", content=b"grande", headers={"Idempotency-Key": "g"})
+    assert r.status_code == 409 and execucoes == [b"grande"]
+
+    assert cliente.post("/", content=b"p", headers={"Idempotency-Key": "p"}).text == "xxxxx"
+    assert cliente.post("/", content=b"p", headers={"Idempotency-Key": "p"}).headers["idempotent-replayed"] == "true"
+    assert execucoes == [b"grande", b"p"]
+
+    # Rota que não lê o corpo (POST sem corpo): a resposta também é guardada
+    chamadas = []
+    async def sem_corpo(scope, receive, send):
+        chamadas.append(1)
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    cliente = Cliente(MiddlewareIdempotencia(sem_corpo, armazem=armazem))
+    assert cliente.post("/notificar", headers={"Idempotency-Key": "n"}).text == "ok"
+    assert cliente.post("/notificar", headers={"Idempotency-Key": "n"}).headers["idempotent-replayed"] == "true"
+    assert cliente.post("/notificar", content=b"x", headers={"Idempotency-Key": "n"}).status_code == 422
+    assert chamadas == [1]
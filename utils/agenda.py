@@ -0,0 +1,37 @@
+from datetime import datetime
+from itertools import groupby
+from math import gcd
+from typing import Iterable, List, Tuple
+
+# 1) Representação compacta da agenda
+def compactar_agenda(horarios: Iterable[Tuple[datetime, bool]]) -> List[dict]:
+    """
+    Agrupa horários (data_hora, disponivel), já ordenados por data_hora,
+    em um registro por dia: horário inicial, intervalo entre slots (minutos)
+    e um mapa de bits onde "1" = livre e "0" = ocupado/sem horário.
+    """
+    dias = []
+    for dia, grupo in groupby(horarios, key=lambda h: h[0].date()):
+        slots = list(grupo)
+        inicio = slots[0][0]
+        offsets = [int((dh - inicio).total_seconds() // 60) for dh, _ in slots]
+
+        intervalo = 0
+        for off in offsets:
+            intervalo = gcd(intervalo, off)
+
+        if intervalo:
+            mapa = ["0"] * (offsets[-1] // intervalo + 1)
+            for off, (_, disponivel) in zip(offsets, slots):
+                if disponivel:
+                    mapa[off // intervalo] = "1"
+        else:
+            mapa = ["1" if any(d for _, d in slots) else "0"]
+
+        dias.append({
+            "data": dia,
+            "inicio": inicio.strftime("%H:%M"),
+            "intervalo": intervalo,
+            "mapa": "".join(mapa),
+        })
+    return dias
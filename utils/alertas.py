@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+import database
+from models.suprimento import LoteSuprimento, Suprimento
+from settings import settings
+from utils.cache import CacheTTL
+from utils.email_utils import enviar_email
+
+logger = logging.getLogger("utils.alertas")
+
+# Válido até a próxima movimentação de estoque (limpar_cache) ou 1 dia
+_cache = CacheTTL(ttl=24 * 60 * 60)
+
+# 1) Listas por varredura de índice
+def alertas_estoque(db: Session, dias: int) -> dict:
+    """
+    Lotes com saldo vencendo em até `dias` dias (faixa em data_validade)
+    e suprimentos no ponto de reposição (quantidade <= estoque_minimo).
+    """
+    hoje = datetime.now().date()
+    alertas = _cache.obter((hoje, dias))
+    if alertas is not None:
+        return alertas
+
+    limite = datetime.combine(hoje + timedelta(days=dias), datetime.max.time())
+    vencendo = (
+        db.query(LoteSuprimento, Suprimento.nome)
+          .join(Suprimento, LoteSuprimento.suprimento_id == Suprimento.id)
+          .filter(
+              LoteSuprimento.data_validade <= limite,
+              LoteSuprimento.quantidade > 0
+          )
+          .order_by(LoteSuprimento.data_validade)
+          .all()
+    )
+    baixo = (
+        db.query(Suprimento)
+          .filter(
+              Suprimento.estoque_minimo.isnot(None),
+              Suprimento.quantidade <= Suprimento.estoque_minimo
+          )
+          .order_by(Suprimento.nome)
+          .all()
+    )
+
+    alertas = {
+        "vencendo": [
+            {
+                "suprimento_id": lote.suprimento_id,
+                "nome": nome,
+                "lote_id": lote.id,
+                "lote": lote.codigo,
+                "data_validade": lote.data_validade,
+                "quantidade": lote.quantidade,
+            }
+            for lote, nome in vencendo
+        ],
+        "estoque_baixo": [
+            {
+                "suprimento_id": s.id,
+                "nome": s.nome,
+                "quantidade": s.quantidade,
+                "estoque_minimo": s.estoque_minimo,
+            }
+            for s in baixo
+        ],
+    }
+    _cache.guardar((hoje, dias), alertas)
+    return alertas
+
+def limpar_cache() -> None:
+    _cache.limpar()
+
+# 2) Notificação em lote
+def notificar_alertas(db: Session, dias: Optional[int] = None) -> bool:
+    """
+    Envia um único e-mail com todas as pendências para `settings.alertas_email`.
+    Retorna False se não houver destinatário, pendências ou se o envio falhar.
+    """
+    dias = settings.alertas_dias_validade if dias is None else dias
+    alertas = alertas_estoque(db, dias)
+    if not settings.alertas_email or not (alertas["vencendo"] or alertas["estoque_baixo"]):
+        return False
+
+    linhas = [f"Lotes vencendo em até {dias} dias:"]
+    linhas += [
+        f"- {a['nome']} (lote {a['lote'] or a['lote_id']}): {a['quantidade']} un. "
+        f"vence em {a['data_validade']:%d/%m/%Y}"
+        for a in alertas["vencendo"]
+    ] or ["- nenhum"]
+    linhas += ["", "Suprimentos abaixo do estoque mínimo:"]
+    linhas += [
+        f"- {a['nome']}: {a['quantidade']} un. (mínimo {a['estoque_minimo']})"
+        for a in alertas["estoque_baixo"]
+    ] or ["- nenhum"]
+    return enviar_email(settings.alertas_email, "Alertas de estoque", "\n".join(linhas))
+
+def _notificar_com_sessao() -> None:
+    db = database.SessionLocal()
+    try:
+        notificar_alertas(db)
+    finally:
+        db.close()
+
+# 3) Job diário
+async def job_alertas_diario() -> None:
+    """
+    Dispara notificar_alertas todo dia em `settings.alertas_hora`.
+    """
+    while True:
+        agora = datetime.now()
+        proxima = agora.replace(hour=settings.alertas_hora, minute=0, second=0, microsecond=0)
+        if proxima <= agora:
+            proxima += timedelta(days=1)
+        await asyncio.sleep((proxima - agora).total_seconds())
+        try:
+            await run_in_threadpool(_notificar_com_sessao)
+        except Exception as err:
+            logger.error("Falha no job de alertas de estoque: %s", err, exc_info=True)
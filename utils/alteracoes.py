@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import List, Optional, Sequence, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+import database
+from models.alteracao import Alteracao, CorteAlteracoes
+from models.consulta import Consulta
+from models.evolucao import EvolucaoClinica
+from models.internacao import Internacao
+from models.leito import Leito
+from models.paciente import Paciente
+from models.prescricao import Prescricao
+from models.telemedicina import ConsultaTelemedicina
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+ENTIDADES = {
+    Paciente: "paciente",
+    Consulta: "consulta",
+    Internacao: "internacao",
+    Leito: "leito",
+    Prescricao: "prescricao",
+    EvolucaoClinica: "evolucao",
+    ConsultaTelemedicina: "teleconsulta",
+}
+MODELOS = {nome: modelo for modelo, nome in ENTIDADES.items()}
+
+# 1) Registro das alterações (mesma transação da escrita)
+def _json_padrao(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    return str(valor)
+
+def registrar_alteracao(conexao: Connection, modelo, registro_id: int, operacao: str = "upsert") -> None:
+    """
+    Acrescenta uma entrada ao feed. Em "upsert" grava a linha como está no
+    banco (inclui defaults do servidor); em "delete" só a chave.
+    Para UPDATEs em massa, que não disparam os eventos do ORM.
+    """
+    dados = None
+    if operacao == "upsert":
+        tabela = modelo.__table__
+        linha = conexao.execute(select(tabela).where(tabela.c.id == registro_id)).mappings().first()
+        if linha is None:
+            return
+        dados = json.dumps(dict(linha), default=_json_padrao, separators=(",", ":"), ensure_ascii=False)
+    conexao.execute(insert(Alteracao.__table__).values(
+        entidade=ENTIDADES[modelo],
+        registro_id=registro_id,
+        operacao=operacao,
+        dados=dados,
+        registrado_em=datetime.now(timezone.utc)
+    ))
+
+def _ao_gravar(mapper, conexao, alvo):
+    registrar_alteracao(conexao, mapper.class_, alvo.id)
+
+def _ao_remover(mapper, conexao, alvo):
+    registrar_alteracao(conexao, mapper.class_, alvo.id, "delete")
+
+for _modelo in ENTIDADES:
+    event.listen(_modelo, "after_insert", _ao_gravar)
+    event.listen(_modelo, "after_update", _ao_gravar)
+    event.listen(_modelo, "after_delete", _ao_remover)
+
+# 2) Leitura incremental
+def corte_atual(db: Session) -> int:
+    return db.query(CorteAlteracoes.seq).filter_by(id=1).scalar() or 0
+
+def listar_alteracoes(
+    db: Session,
+    desde: int,
+    limite: int,
+    entidades: Optional[Sequence[str]] = None
+) -> Optional[Tuple[List[dict], int, bool]]:
+    """
+    Alterações com seq > `desde`, em ordem. Retorna (itens, próximo `desde`,
+    há mais), ou None se a retenção já descartou entradas posteriores a
+    `desde` (o cliente precisa de carga completa).
+    """
+    if desde < corte_atual(db):
+        return None
+
+    query = db.query(
+        Alteracao.seq, Alteracao.entidade, Alteracao.registro_id, Alteracao.operacao, Alteracao.dados
+    ).filter(Alteracao.seq > desde)
+    if entidades:
+        query = query.filter(Alteracao.entidade.in_(entidades))
+    linhas = query.order_by(Alteracao.seq).limit(limite + 1).all()
+
+    mais = len(linhas) > limite
+    itens = [
+        {
+            "seq": seq,
+            "entidade": entidade,
+            "id": registro_id,
+            "operacao": operacao,
+            "dados": json.loads(dados) if dados else None,
+        }
+        for seq, entidade, registro_id, operacao, dados in linhas[:limite]
+    ]
+    return itens, (itens[-1]["seq"] if itens else desde), mais
+
+def ultimas_alteracoes(modelo, desde: int):
+    """
+    Subconsulta (registro_id, seq) com a última alteração de cada registro
+    do modelo após `desde`: cursor monotônico para feeds por entidade.
+    """
+    return (
+        select(Alteracao.registro_id, func.max(Alteracao.seq).label("seq"))
+          .where(Alteracao.entidade == ENTIDADES[modelo], Alteracao.seq > desde)
+          .group_by(Alteracao.registro_id)
+          .subquery()
+    )
+
+def seq_atual(db: Session) -> int:
+    """
+    Último seq emitido: ponto de partida após uma carga completa.
+    """
+    return db.query(func.max(Alteracao.seq)).scalar() or corte_atual(db)
+
+# 3) Compactação e retenção
+def compactar_alteracoes(db: Session, retencao_dias: Optional[int] = None) -> dict:
+    """
+    Mantém só a última entrada de cada registro (quem está à frente dela
+    não perde nada) e descarta as entradas mais antigas que a retenção,
+    avançando o corte.
+    """
+    retencao_dias = settings.alteracoes_retencao_dias if retencao_dias is None else retencao_dias
+
+    ultimas = select(func.max(Alteracao.seq)).group_by(Alteracao.entidade, Alteracao.registro_id)
+    compactadas = (
+        db.query(Alteracao)
+          .filter(Alteracao.seq.notin_(ultimas))
+          .delete(synchronize_session=False)
+    )
+
+    limite = datetime.now(timezone.utc) - timedelta(days=retencao_dias)
+    novo_corte = db.query(func.max(Alteracao.seq)).filter(Alteracao.registrado_em < limite).scalar()
+    expiradas = 0
+    corte = corte_atual(db)
+    if novo_corte and novo_corte > corte:
+        expiradas = (
+            db.query(Alteracao)
+              .filter(Alteracao.seq <= novo_corte)
+              .delete(synchronize_session=False)
+        )
+        marco = db.get(CorteAlteracoes, 1)
+        if marco:
+            marco.seq = novo_corte
+        else:
+            db.add(CorteAlteracoes(id=1, seq=novo_corte))
+        corte = novo_corte
+
+    db.commit()
+    return {"compactadas": compactadas, "expiradas": expiradas, "corte": corte}
+
+def _compactar_com_sessao() -> None:
+    db = database.SessionLocal()
+    try:
+        resultado = compactar_alteracoes(db)
+        logger.info("Feed de alterações compactado: %s", resultado)
+    finally:
+        db.close()
+
+async def job_compactacao_diaria() -> None:
+    """
+    Executa compactar_alteracoes todo dia em `settings.alteracoes_compactacao_hora`.
+    """
+    while True:
+        agora = datetime.now()
+        proxima = agora.replace(hour=settings.alteracoes_compactacao_hora, minute=0, second=0, microsecond=0)
+        if proxima <= agora:
+            proxima += timedelta(days=1)
+        await asyncio.sleep((proxima - agora).total_seconds())
+        try:
+            await run_in_threadpool(_compactar_com_sessao)
+        except Exception as err:
+            logger.error("Falha na compactação do feed de alterações: %s", err, exc_info=True)
@@ -0,0 +1,94 @@
+import bisect
+import logging
+import threading
+from typing import Iterable, List, Tuple
+from sqlalchemy.orm import Session
+
+from models.prescricao import Prescricao
+from models.profissional import Profissional
+from settings import settings
+from utils.texto import normalizar
+
+logger = logging.getLogger("utils.autocomplete")
+
+# 1) Índice de prefixos: lista ordenada + bisect
+class IndicePrefixos:
+    """
+    Sugestões por prefixo sobre um vetor ordenado de (chave normalizada, valor).
+    Cada valor é indexado a partir de cada palavra ("pedia" encontra
+    "Cirurgia Pediátrica"). A primeira grafia vista de um valor é a canônica.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas: List[Tuple[str, str]] = []
+        self._conhecidos = set()
+
+    @staticmethod
+    def _chaves(valor: str) -> List[str]:
+        palavras = normalizar(valor).split(" ")
+        return [" ".join(palavras[i:]) for i in range(len(palavras))]
+
+    def substituir(self, valores: Iterable[str]) -> int:
+        entradas, conhecidos = [], set()
+        for valor in valores:
+            valor = (valor or "").strip()
+            if not valor or normalizar(valor) in conhecidos:
+                continue
+            conhecidos.add(normalizar(valor))
+            entradas.extend((chave, valor) for chave in self._chaves(valor))
+        entradas.sort()
+        with self._lock:
+            self._entradas, self._conhecidos = entradas, conhecidos
+        return len(conhecidos)
+
+    def adicionar(self, valor: str) -> None:
+        """
+        Atualização incremental (após gravações): O(log n) para localizar.
+        """
+        valor = (valor or "").strip()
+        chave = normalizar(valor)
+        if not valor or chave in self._conhecidos:
+            return
+        with self._lock:
+            if chave in self._conhecidos:
+                return
+            self._conhecidos.add(chave)
+            for k in self._chaves(valor):
+                bisect.insort(self._entradas, (k, valor))
+
+    def sugerir(self, prefixo: str, limite: int = 10) -> List[str]:
+        prefixo = normalizar(prefixo)
+        entradas = self._entradas
+        i = bisect.bisect_left(entradas, (prefixo,))
+        sugestoes = []
+        while i < len(entradas) and len(sugestoes) < limite and entradas[i][0].startswith(prefixo):
+            valor = entradas[i][1]
+            if valor not in sugestoes:
+                sugestoes.append(valor)
+            i += 1
+        return sugestoes
+
+    def __len__(self) -> int:
+        return len(self._conhecidos)
+
+indice_medicamentos = IndicePrefixos()
+indice_especialidades = IndicePrefixos()
+
+# 2) Carga: lista de referência + valores distintos do banco
+def _referencia(caminho: str) -> List[str]:
+    try:
+        with open(caminho, encoding="utf-8-sig") as arquivo:
+            return [linha.strip() for linha in arquivo if linha.strip()]
+    except FileNotFoundError:
+        logger.warning("Lista de referência não encontrada: %s", caminho)
+        return []
+
+def carregar_autocomplete(db: Session) -> None:
+    """
+    A lista de referência vem antes: sua grafia prevalece sobre a digitada.
+    """
+    medicamentos = [m for (m,) in db.query(Prescricao.medicamento).distinct()]
+    especialidades = [e for (e,) in db.query(Profissional.especialidade).distinct()]
+    indice_medicamentos.substituir(_referencia(settings.autocomplete_medicamentos) + medicamentos)
+    indice_especialidades.substituir(_referencia(settings.autocomplete_especialidades) + especialidades)
@@ -0,0 +1,204 @@
+import html
+import itertools
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import DDL, event, or_, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from database import Base
+from models.evolucao import EvolucaoClinica
+from models.paciente import HistoricoClinico
+from models.profissional import Profissional
+
+# 1) Índice FTS5 (SQLite): um documento por evolução/histórico.
+#    unicode61 + remove_diacritics: "sépse", "SEPSE" e "sepse" casam igual.
+#    rowid = id * 2 (evolução) ou id * 2 + 1 (histórico): remoções por rowid.
+event.listen(Base.metadata, "after_create", DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS busca_clinica USING fts5("
+    "texto, origem UNINDEXED, registro_id UNINDEXED, paciente_id UNINDEXED, "
+    "profissional UNINDEXED, data_registro UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '3')"
+).execute_if(dialect="sqlite"))
+event.listen(Base.metadata, "before_drop", DDL(
+    "DROP TABLE IF EXISTS busca_clinica"
+).execute_if(dialect="sqlite"))
+
+FONTES = {
+    EvolucaoClinica: ("evolucao", 0, "anotacoes", "profissional_id"),
+    HistoricoClinico: ("historico", 1, "descricao", "profissional"),
+}
+
+_INSERIR = text(
+    "INSERT INTO busca_clinica(rowid, texto, origem, registro_id, paciente_id, profissional, data_registro) "
+    "VALUES (:rowid, :texto, :origem, :registro_id, :paciente_id, :profissional, :data_registro)"
+)
+_REMOVER = text("DELETE FROM busca_clinica WHERE rowid = :rowid")
+
+# Marcadores fora do HTML no snippet(): o texto é escapado antes de virar <mark>
+_INICIO_DESTAQUE, _FIM_DESTAQUE = "\x02", "\x03"
+
+def _trecho_html(trecho: str) -> str:
+    return (
+        html.escape(trecho)
+            .replace(_INICIO_DESTAQUE, "<mark>")
+            .replace(_FIM_DESTAQUE, "</mark>")
+    )
+
+def _data_texto(valor) -> Optional[str]:
+    # Mesmo formato que o SQLAlchemy grava no SQLite: permite filtrar por faixa como texto
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return valor
+
+def _documento(alvo) -> dict:
+    origem, deslocamento, campo_texto, campo_prof = FONTES[type(alvo)]
+    return {
+        "rowid": alvo.id * 2 + deslocamento,
+        "texto": getattr(alvo, campo_texto),
+        "origem": origem,
+        "registro_id": alvo.id,
+        "paciente_id": alvo.paciente_id,
+        "profissional": str(getattr(alvo, campo_prof)),
+        "data_registro": _data_texto(alvo.data_registro),
+    }
+
+# 2) Manutenção incremental via eventos do ORM (mesma transação da escrita).
+#    Escritas em massa ou via Core (insert()/update() em evolucoes_clinicas ou
+#    historicos, query.update/delete) não disparam os eventos: depois delas,
+#    chame reindexar_busca (ou POST /evolucoes/busca/reindexar).
+def _ao_inserir(mapper, conexao, alvo):
+    if conexao.dialect.name == "sqlite":
+        conexao.execute(_INSERIR, _documento(alvo))
+
+def _ao_atualizar(mapper, conexao, alvo):
+    if conexao.dialect.name == "sqlite":
+        doc = _documento(alvo)
+        conexao.execute(_REMOVER, {"rowid": doc["rowid"]})
+        conexao.execute(_INSERIR, doc)
+
+def _ao_remover(mapper, conexao, alvo):
+    if conexao.dialect.name == "sqlite":
+        conexao.execute(_REMOVER, {"rowid": _documento(alvo)["rowid"]})
+
+for _modelo in FONTES:
+    event.listen(_modelo, "after_insert", _ao_inserir)
+    event.listen(_modelo, "after_update", _ao_atualizar)
+    event.listen(_modelo, "after_delete", _ao_remover)
+
+def reindexar_busca(db: Session, lote: int = 1000) -> int:
+    """
+    Reconstrói o índice a partir das tabelas de origem (carga inicial).
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return 0
+    db.execute(text("DELETE FROM busca_clinica"))
+    total = 0
+    for modelo in FONTES:
+        for registro in db.query(modelo).yield_per(lote):
+            db.execute(_INSERIR, _documento(registro))
+            total += 1
+    db.commit()
+    return total
+
+def semear_busca(db: Session) -> bool:
+    """
+    Carga inicial do índice em bancos que já tinham textos clínicos
+    (after_create cria a tabela FTS vazia). Retorna True se reindexou.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    if db.execute(text("SELECT 1 FROM busca_clinica LIMIT 1")).first():
+        return False
+    if not any(db.query(modelo.id).first() for modelo in FONTES):
+        return False
+    reindexar_busca(db)
+    return True
+
+# 3) Busca
+def buscar_textos_clinicos(
+    db: Session,
+    termos: str,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    profissional_id: Optional[int] = None,
+    limite: int = 50
+) -> Optional[List[dict]]:
+    """
+    Busca em evoluções e históricos, mais relevantes primeiro, com trecho
+    em HTML escapado e termos em <mark>. Retorna None se a expressão de
+    busca for inválida.
+    O filtro por profissional casa o id (evoluções) e o nome (históricos).
+    """
+    profissionais = []
+    if profissional_id is not None:
+        profissionais.append(str(profissional_id))
+        nome = db.query(Profissional.nome).filter_by(id=profissional_id).scalar()
+        if nome:
+            profissionais.append(nome)
+
+    if db.get_bind().dialect.name != "sqlite":
+        return _buscar_sem_fts(db, termos, inicio, fim, profissionais, limite)
+
+    filtros, params = [], {
+        "termos": termos, "limite": limite,
+        "inicio_destaque": _INICIO_DESTAQUE, "fim_destaque": _FIM_DESTAQUE,
+    }
+    if inicio:
+        filtros.append("data_registro >= :inicio")
+        params["inicio"] = _data_texto(inicio)
+    if fim:
+        filtros.append("data_registro <= :fim")
+        params["fim"] = _data_texto(fim)
+    if profissional_id is not None:
+        marcadores = []
+        for i, valor in enumerate(profissionais):
+            marcadores.append(f":prof{i}")
+            params[f"prof{i}"] = valor
+        filtros.append(f"profissional IN ({', '.join(marcadores)})")
+
+    sql = (
+        "SELECT origem, registro_id, paciente_id, profissional, data_registro, "
+        "snippet(busca_clinica, 0, :inicio_destaque, :fim_destaque, '…', 16) AS trecho "
+        "FROM busca_clinica WHERE busca_clinica MATCH :termos "
+        + "".join(f"AND {f} " for f in filtros)
+        + "ORDER BY rank LIMIT :limite"
+    )
+    try:
+        linhas = db.execute(text(sql), params).mappings().all()
+    except OperationalError:
+        db.rollback()
+        return None
+    return [{**linha, "trecho": _trecho_html(linha["trecho"])} for linha in linhas]
+
+def _buscar_sem_fts(db, termos, inicio, fim, profissionais, limite) -> List[dict]:
+    # Bancos sem FTS5: LIKE simples, sem ranking nem destaque.
+    # Coluna binária (compressão ligada): o filtro roda no texto já descomprimido.
+    resultado = []
+    for modelo, (origem, _, campo_texto, campo_prof) in FONTES.items():
+        coluna_texto = getattr(modelo, campo_texto)
+        binario = coluna_texto.type.binario(db.get_bind().dialect)
+        query = db.query(modelo)
+        if not binario:
+            query = query.filter(coluna_texto.ilike(f"%{termos}%"))
+        if inicio:
+            query = query.filter(modelo.data_registro >= inicio)
+        if fim:
+            query = query.filter(modelo.data_registro <= fim)
+        if profissionais:
+            coluna = getattr(modelo, campo_prof)
+            query = query.filter(or_(*(coluna == p for p in profissionais)))
+        query = query.order_by(modelo.data_registro.desc())
+        if binario:
+            alvo = termos.lower()
+            registros = (r for r in query.yield_per(500) if alvo in getattr(r, campo_texto).lower())
+        else:
+            registros = query.limit(limite)
+        for registro in itertools.islice(registros, limite):
+            doc = _documento(registro)
+            resultado.append({
+                "origem": origem, "registro_id": registro.id, "paciente_id": registro.paciente_id,
+                "profissional": doc["profissional"], "data_registro": doc["data_registro"],
+                "trecho": html.escape(doc["texto"][:200]),
+            })
+    return resultado[:limite]
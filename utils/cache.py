@@ -0,0 +1,241 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from settings import settings
+
+# 1) Cache em memória com expiração
+class CacheTTL:
+    """
+    Dicionário thread-safe cujas entradas expiram após `ttl` segundos.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._itens: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item and item[0] > time.monotonic():
+                return item[1]
+            return None
+
+    def guardar(self, chave: Hashable, valor: Any) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            # Descarta entradas vencidas para manter o cache pequeno
+            for k in [k for k, (expira, _) in self._itens.items() if expira <= agora]:
+                del self._itens[k]
+            self._itens[chave] = (agora + self.ttl, valor)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+# 2) Cache de leitura (read-through) por entidade, com backends intercambiáveis
+class BackendMemoria:
+    """
+    Entradas por entidade em ordem de uso (LRU), limitadas a `max_itens`.
+    Vale apenas para o processo atual.
+    """
+
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self._lock = threading.Lock()
+        self._entidades: Dict[str, OrderedDict] = defaultdict(OrderedDict)
+
+    def obter(self, entidade: str, chave: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            itens = self._entidades[entidade]
+            item = itens.get(chave)
+            if item is None:
+                return False, None
+            if item[0] <= time.monotonic():
+                del itens[chave]
+                return False, None
+            itens.move_to_end(chave)
+            return True, item[1]
+
+    def guardar(self, entidade: str, chave: Hashable, valor: Any, ttl: float) -> None:
+        with self._lock:
+            itens = self._entidades[entidade]
+            itens[chave] = (time.monotonic() + ttl, valor)
+            itens.move_to_end(chave)
+            while len(itens) > self.max_itens:
+                itens.popitem(last=False)
+
+    def reservar(self, entidade: str, chave: Hashable, valor: Any, ttl: float) -> bool:
+        """
+        Guarda `valor` só se a chave estiver ausente ou vencida (atômico).
+        """
+        with self._lock:
+            itens = self._entidades[entidade]
+            item = itens.get(chave)
+            if item is not None and item[0] > time.monotonic():
+                return False
+            itens[chave] = (time.monotonic() + ttl, valor)
+            itens.move_to_end(chave)
+            while len(itens) > self.max_itens:
+                itens.popitem(last=False)
+            return True
+
+    def remover(self, entidade: str, chave: Hashable) -> None:
+        with self._lock:
+            self._entidades[entidade].pop(chave, None)
+
+    def invalidar(self, entidade: str) -> None:
+        with self._lock:
+            self._entidades.pop(entidade, None)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entidades.clear()
+
+class BackendSQLite:
+    """
+    Mesmo contrato em um arquivo SQLite: compartilhado entre workers da
+    mesma máquina (invalidação vale para todos) e usado nos testes.
+    Valores serializados com pickle; o arquivo é local e confiável.
+    """
+
+    def __init__(self, caminho: str, max_itens: int):
+        self.max_itens = max_itens
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS cache_leitura ("
+            "entidade TEXT NOT NULL, chave TEXT NOT NULL, expira REAL NOT NULL, "
+            "usado_em REAL NOT NULL, valor BLOB NOT NULL, PRIMARY KEY (entidade, chave))"
+        )
+
+    def obter(self, entidade: str, chave: Hashable) -> Tuple[bool, Any]:
+        agora = time.time()
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT valor FROM cache_leitura WHERE entidade = ? AND chave = ? AND expira > ?",
+                (entidade, repr(chave), agora)
+            ).fetchone()
+            if linha is None:
+                return False, None
+            self._conexao.execute(
+                "UPDATE cache_leitura SET usado_em = ? WHERE entidade = ? AND chave = ?",
+                (agora, entidade, repr(chave))
+            )
+        return True, pickle.loads(linha[0])
+
+    def guardar(self, entidade: str, chave: Hashable, valor: Any, ttl: float) -> None:
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO cache_leitura VALUES (?, ?, ?, ?, ?)",
+                (entidade, repr(chave), agora + ttl, agora, pickle.dumps(valor))
+            )
+            self._conexao.execute(
+                "DELETE FROM cache_leitura WHERE entidade = ? AND chave NOT IN ("
+                "SELECT chave FROM cache_leitura WHERE entidade = ? ORDER BY usado_em DESC LIMIT ?)",
+                (entidade, entidade, self.max_itens)
+            )
+
+    def reservar(self, entidade: str, chave: Hashable, valor: Any, ttl: float) -> bool:
+        """
+        Guarda `valor` só se a chave estiver ausente ou vencida. INSERT OR
+        IGNORE é atômico também entre processos que usam o mesmo arquivo.
+        """
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                "DELETE FROM cache_leitura WHERE entidade = ? AND chave = ? AND expira <= ?",
+                (entidade, repr(chave), agora)
+            )
+            inseridas = self._conexao.execute(
+                "INSERT OR IGNORE INTO cache_leitura VALUES (?, ?, ?, ?, ?)",
+                (entidade, repr(chave), agora + ttl, agora, pickle.dumps(valor))
+            ).rowcount
+            if inseridas:
+                self._conexao.execute(
+                    "DELETE FROM cache_leitura WHERE entidade = ? AND chave NOT IN ("
+                    "SELECT chave FROM cache_leitura WHERE entidade = ? ORDER BY usado_em DESC LIMIT ?)",
+                    (entidade, entidade, self.max_itens)
+                )
+        return inseridas == 1
+
+    def remover(self, entidade: str, chave: Hashable) -> None:
+        with self._lock:
+            self._conexao.execute(
+                "DELETE FROM cache_leitura WHERE entidade = ? AND chave = ?", (entidade, repr(chave))
+            )
+
+    def invalidar(self, entidade: str) -> None:
+        with self._lock:
+            self._conexao.execute("DELETE FROM cache_leitura WHERE entidade = ?", (entidade,))
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._conexao.execute("DELETE FROM cache_leitura")
+
+class CacheLeitura:
+    """
+    obter_ou_carregar(entidade, chave, carregar): devolve o valor guardado
+    ou executa `carregar()` e guarda o resultado (inclusive None) pelo TTL
+    da entidade. As rotas de escrita chamam invalidar(entidade).
+    Métricas de acertos/falhas são contadas por processo.
+    """
+
+    def __init__(self, backend, ttls: Dict[str, float], ttl_padrao: float = 60):
+        self.backend = backend
+        self.ttls = ttls
+        self.ttl_padrao = ttl_padrao
+        self._lock = threading.Lock()
+        self._metricas: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"acertos": 0, "falhas": 0, "invalidacoes": 0}
+        )
+
+    def _contar(self, entidade: str, evento: str) -> None:
+        with self._lock:
+            self._metricas[entidade][evento] += 1
+
+    def obter_ou_carregar(self, entidade: str, chave: Hashable, carregar: Callable[[], Any]) -> Any:
+        achou, valor = self.backend.obter(entidade, chave)
+        if achou:
+            self._contar(entidade, "acertos")
+            return valor
+        self._contar(entidade, "falhas")
+        valor = carregar()
+        self.backend.guardar(entidade, chave, valor, self.ttls.get(entidade, self.ttl_padrao))
+        return valor
+
+    def invalidar(self, entidade: str) -> None:
+        self.backend.invalidar(entidade)
+        self._contar(entidade, "invalidacoes")
+
+    def limpar(self) -> None:
+        self.backend.limpar()
+        with self._lock:
+            self._metricas.clear()
+
+    def metricas(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                entidade: {
+                    **m,
+                    "taxa_acerto": round(m["acertos"] / (m["acertos"] + m["falhas"]), 3)
+                                   if m["acertos"] + m["falhas"] else None,
+                }
+                for entidade, m in self._metricas.items()
+            }
+
+def criar_backend(max_itens: int):
+    if settings.cache_backend == "sqlite":
+        return BackendSQLite(settings.cache_sqlite_caminho, max_itens)
+    return BackendMemoria(max_itens)
+
+cache_leitura = CacheLeitura(criar_backend(settings.cache_max_itens), settings.cache_ttl)
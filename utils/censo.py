@@ -0,0 +1,131 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.censo import CensoDiario
+from models.internacao import Internacao
+from models.leito import Leito
+
+Chave = Tuple[str, str]
+
+# 1) Varredura de intervalos (data_entrada/data_alta)
+def _varrer(db: Session, inicio: date, fim: date) -> Dict[Chave, List[int]]:
+    """
+    Ocupação diária por (unidade, tipo) entre `inicio` e `fim` (inclusive).
+    Um paciente conta no dia se esteve internado em algum momento dele.
+    Cada internação vira +1 no dia de entrada e -1 no dia seguinte à alta;
+    a soma acumulada dá a série diária.
+    """
+    dias = (fim - inicio).days + 1
+    intervalos = (
+        db.query(Leito.unidade, Leito.tipo, Internacao.data_entrada, Internacao.data_alta)
+          .join(Leito, Internacao.leito_id == Leito.id)
+          .filter(
+              Internacao.data_entrada < datetime.combine(fim + timedelta(days=1), time.min),
+              or_(
+                  Internacao.data_alta.is_(None),
+                  Internacao.data_alta >= datetime.combine(inicio, time.min)
+              )
+          )
+          .all()
+    )
+
+    # Séries densas para todos os tipos de leito, mesmo sem internações
+    deltas: Dict[Chave, List[int]] = {
+        (unidade, tipo): [0] * (dias + 1)
+        for unidade, tipo in db.query(Leito.unidade, Leito.tipo).distinct()
+    }
+    for unidade, tipo, entrada, alta in intervalos:
+        primeiro = max((entrada.date() - inicio).days, 0)
+        ultimo = min((alta.date() - inicio).days, dias - 1) if alta else dias - 1
+        if ultimo < primeiro:
+            continue
+        serie = deltas.setdefault((unidade, tipo), [0] * (dias + 1))
+        serie[primeiro] += 1
+        serie[ultimo + 1] -= 1
+
+    series = {}
+    for chave, serie in deltas.items():
+        acumulado, ocupados = 0, []
+        for delta in serie[:dias]:
+            acumulado += delta
+            ocupados.append(acumulado)
+        series[chave] = ocupados
+    return series
+
+# 2) Snapshots diários materializados
+def materializar_censo(db: Session, ate: date) -> None:
+    """
+    Grava os dias fechados ainda não materializados, até `ate` (inclusive).
+    """
+    ultimo = db.query(func.max(CensoDiario.dia)).scalar()
+    if ultimo:
+        inicio = ultimo + timedelta(days=1)
+    else:
+        primeira = db.query(func.min(Internacao.data_entrada)).scalar()
+        if not primeira:
+            return
+        inicio = primeira.date()
+    if inicio > ate:
+        return
+
+    linhas = [
+        {"dia": inicio + timedelta(days=i), "unidade": unidade, "tipo": tipo, "ocupados": ocupados}
+        for (unidade, tipo), serie in _varrer(db, inicio, ate).items()
+        for i, ocupados in enumerate(serie)
+    ]
+    if not linhas:
+        return
+    try:
+        db.execute(insert(CensoDiario), linhas)
+        db.commit()
+    except IntegrityError:
+        # Outro worker materializou o mesmo período
+        db.rollback()
+
+def invalidar_censo(db: Session, desde: date) -> None:
+    """
+    Descarta snapshots a partir de `desde` (internação/alta retroativa).
+    Não faz commit: deve acompanhar a transação que alterou os intervalos.
+    """
+    db.query(CensoDiario).filter(CensoDiario.dia >= desde).delete(synchronize_session=False)
+
+# 3) Consulta
+def consultar_censo(
+    db: Session,
+    inicio: date,
+    fim: date,
+    unidade: Optional[str] = None,
+    tipo: Optional[str] = None
+) -> List[dict]:
+    """
+    Série diária de ocupação: dias fechados vêm dos snapshots e
+    apenas o dia corrente é recalculado.
+    """
+    hoje = date.today()
+    fim = min(fim, hoje)
+    resultado = []
+
+    ontem = hoje - timedelta(days=1)
+    if inicio <= ontem:
+        materializar_censo(db, ontem)
+        query = db.query(CensoDiario).filter(
+            CensoDiario.dia.between(inicio, min(fim, ontem))
+        )
+        if unidade:
+            query = query.filter(CensoDiario.unidade == unidade)
+        if tipo:
+            query = query.filter(CensoDiario.tipo == tipo)
+        resultado = [
+            {"dia": c.dia, "unidade": c.unidade, "tipo": c.tipo, "ocupados": c.ocupados}
+            for c in query.order_by(CensoDiario.dia, CensoDiario.unidade, CensoDiario.tipo)
+        ]
+
+    if inicio <= hoje <= fim:
+        for (u, t), serie in sorted(_varrer(db, hoje, hoje).items()):
+            if (unidade and u != unidade) or (tipo and t != tipo):
+                continue
+            resultado.append({"dia": hoje, "unidade": u, "tipo": t, "ocupados": serie[0]})
+    return resultado
@@ -0,0 +1,153 @@
+import argparse
+import logging
+import time
+import zlib
+from sqlalchemy import LargeBinary, Text, inspect, select, type_coerce, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import database
+from models.evolucao import EvolucaoClinica
+from models.paciente import HistoricoClinico
+from models.prescricao import Prescricao
+from models.tipos import TextoComprimido
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = (
+    EvolucaoClinica.anotacoes,
+    HistoricoClinico.descricao,
+    Prescricao.posologia,
+)
+
+def _nome(coluna) -> str:
+    return f"{coluna.class_.__tablename__}.{coluna.key}"
+
+def _bruto(coluna):
+    # Lê o valor como gravado (texto ou BLOB), sem passar por TextoComprimido
+    return type_coerce(coluna, Text())
+
+# 1) Tipo real das colunas existentes
+def sincronizar_colunas(engine: Engine) -> dict:
+    """
+    Fora do SQLite, fixa em cada TextoComprimido o tipo que a coluna tem de
+    fato no banco (binário ou TEXT), antes de qualquer uso do engine. Se a
+    configuração pede compressão e a coluna ainda é TEXT, os textos seguem
+    sem compressão até a coluna ser convertida para binário (migração
+    manual); com a compressão desligada numa coluna binária, os textos
+    novos vão como UTF-8 e os antigos continuam legíveis.
+    """
+    resultado = {}
+    if engine.dialect.name == "sqlite":
+        return resultado
+    inspetor = inspect(engine)
+    for coluna in COLUNAS:
+        tabela = coluna.class_.__table__
+        if not inspetor.has_table(tabela.name):
+            continue
+        tipos = {c["name"]: c["type"] for c in inspetor.get_columns(tabela.name)}
+        if coluna.key not in tipos:
+            continue
+        binaria = isinstance(tipos[coluna.key], LargeBinary)
+        tabela.c[coluna.key].type.coluna_binaria = binaria
+        resultado[_nome(coluna)] = binaria
+        if settings.textos_compressao and not binaria:
+            logger.error("Coluna %s é TEXT: converta para binário para ativar a compressão", _nome(coluna))
+    return resultado
+
+# 2) Migração em lotes das linhas existentes
+def migrar_compressao(db: Session, lote: int = 500) -> dict:
+    """
+    Regrava, em lotes com commit, as linhas ainda não comprimidas que
+    passam do limite. Idempotente: pode ser interrompida e reexecutada.
+    Sem `settings.textos_compressao` nada é alterado.
+    """
+    resultado = {}
+    for coluna in COLUNAS:
+        modelo = coluna.class_
+        lidas = comprimidas = 0
+        ultimo_id = 0
+        while True:
+            linhas = db.execute(
+                select(modelo.id, _bruto(coluna))
+                  .where(modelo.id > ultimo_id)
+                  .order_by(modelo.id)
+                  .limit(lote)
+            ).all()
+            if not linhas:
+                break
+            ultimo_id = linhas[-1][0]
+            lidas += len(linhas)
+
+            alterar = []
+            for id_, valor in linhas:
+                if valor is None or TextoComprimido.esta_comprimido(valor):
+                    continue
+                texto = TextoComprimido.descomprimir(valor)
+                if TextoComprimido.esta_comprimido(TextoComprimido.comprimir(texto)):
+                    alterar.append({"id": id_, coluna.key: texto})
+            if alterar:
+                # UPDATE em massa por chave primária: a compressão fica no tipo da coluna
+                db.execute(update(modelo), alterar)
+            db.commit()
+            comprimidas += len(alterar)
+        resultado[_nome(coluna)] = {"lidas": lidas, "comprimidas": comprimidas}
+    return resultado
+
+# 3) Benchmark: espaço x latência de leitura
+def medir_compressao(db: Session, amostra: int = 1000) -> dict:
+    """
+    Para uma amostra de cada coluna, compara o tamanho em texto com o
+    tamanho armazenado com a configuração atual (limite e nível) e o custo
+    de leitura (decodificação pura x descompressão + decodificação).
+    """
+    resultado = {}
+    for coluna in COLUNAS:
+        textos = [t for (t,) in db.execute(select(coluna).limit(amostra))]
+        brutos = [t.encode("utf-8") for t in textos]
+        armazenados = [
+            TextoComprimido.MARCA + zlib.compress(b, settings.textos_compressao_nivel)
+            if len(b) >= settings.textos_compressao_limite else b
+            for b in brutos
+        ]
+
+        inicio = time.perf_counter()
+        for b in brutos:
+            TextoComprimido.descomprimir(b)
+        leitura_texto = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for b in armazenados:
+            TextoComprimido.descomprimir(b)
+        leitura_comprimido = time.perf_counter() - inicio
+
+        bytes_texto = sum(map(len, brutos))
+        bytes_armazenados = sum(map(len, armazenados))
+        resultado[_nome(coluna)] = {
+            "linhas": len(textos),
+            "acima_do_limite": sum(len(b) >= settings.textos_compressao_limite for b in brutos),
+            "bytes_texto": bytes_texto,
+            "bytes_armazenados": bytes_armazenados,
+            "razao": round(bytes_armazenados / bytes_texto, 3) if bytes_texto else None,
+            "leitura_texto_us": round(leitura_texto * 1e6 / max(len(textos), 1), 2),
+            "leitura_comprimido_us": round(leitura_comprimido * 1e6 / max(len(textos), 1), 2),
+        }
+    return resultado
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compressão dos textos clínicos")
+    parser.add_argument("--benchmark", action="store_true", help="apenas mede, sem alterar dados")
+    parser.add_argument("--lote", type=int, default=500)
+    parser.add_argument("--amostra", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = database.SessionLocal()
+    try:
+        if args.benchmark:
+            saida = medir_compressao(db, args.amostra)
+        else:
+            saida = migrar_compressao(db, args.lote)
+        for coluna, valores in saida.items():
+            print(coluna, valores)
+    finally:
+        db.close()
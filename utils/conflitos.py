@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import Session
+
+from models.agenda import AgendaMedica
+from models.consulta import Consulta, StatusConsulta
+from models.telemedicina import ConsultaTelemedicina
+from settings import settings
+
+# 1) Comparação de datas com e sem fuso
+def _comparaveis(a: datetime, b: datetime):
+    # SQLite devolve datas sem fuso; só descarta o fuso quando os dois lados divergem
+    if (a.tzinfo is None) != (b.tzinfo is None):
+        return a.replace(tzinfo=None), b.replace(tzinfo=None)
+    return a, b
+
+# 2) Conflitos de agenda do profissional
+def conflitos_profissional(
+    db: Session,
+    profissional_id: int,
+    inicio: datetime,
+    duracao_minutos: int
+) -> List[dict]:
+    """
+    Compromissos do profissional que se sobrepõem a [inicio, inicio + duração):
+    teleconsultas e consultas presenciais não canceladas e horários de agenda livres
+    (os ocupados já aparecem como consulta). Uma única consulta UNION ALL, em que
+    cada parte é uma faixa no índice (profissional_id, data_hora): como nenhuma
+    duração passa do máximo configurado, basta olhar inícios em
+    (inicio - duração máxima, fim).
+    """
+    fim = inicio + timedelta(minutes=duracao_minutos)
+    padrao = settings.duracao_consulta_padrao
+    janela_tele = inicio - timedelta(minutes=settings.duracao_teleconsulta_maxima)
+    janela_padrao = inicio - timedelta(minutes=padrao)
+
+    tele = select(
+        ConsultaTelemedicina.data_hora.label("data_hora"),
+        ConsultaTelemedicina.duracao_minutos.label("duracao"),
+        literal("teleconsulta").label("tipo"),
+        ConsultaTelemedicina.id.label("id"),
+    ).where(
+        ConsultaTelemedicina.profissional_id == profissional_id,
+        ConsultaTelemedicina.status != StatusConsulta.Cancelada,
+        ConsultaTelemedicina.data_hora > janela_tele,
+        ConsultaTelemedicina.data_hora < fim,
+    )
+    presencial = select(
+        Consulta.data_hora, literal(padrao), literal("consulta"), Consulta.id
+    ).where(
+        Consulta.profissional_id == profissional_id,
+        Consulta.status != StatusConsulta.Cancelada,
+        Consulta.data_hora > janela_padrao,
+        Consulta.data_hora < fim,
+    )
+    agenda = select(
+        AgendaMedica.data_hora, literal(padrao), literal("agenda"), AgendaMedica.id
+    ).where(
+        AgendaMedica.profissional_id == profissional_id,
+        AgendaMedica.disponivel.is_(True),
+        AgendaMedica.data_hora > janela_padrao,
+        AgendaMedica.data_hora < fim,
+    )
+
+    conflitos = []
+    for data_hora, duracao, tipo, id_ in db.execute(union_all(tele, presencial, agenda)):
+        termino, ini = _comparaveis(data_hora + timedelta(minutes=duracao), inicio)
+        if termino > ini:
+            conflitos.append({"tipo": tipo, "id": id_, "data_hora": data_hora, "duracao_minutos": duracao})
+    return sorted(conflitos, key=lambda c: c["data_hora"])
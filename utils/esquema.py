@@ -0,0 +1,102 @@
+import logging
+from sqlalchemy import UniqueConstraint, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import Engine
+
+from database import Base
+
+logger = logging.getLogger(__name__)
+
+# 1) Colunas novas em tabelas existentes (create_all só cria tabelas ausentes)
+def _literal(valor: str) -> str:
+    return "'" + valor.replace("'", "''") + "'"
+
+def adicionar_colunas_ausentes(engine: Engine) -> list:
+    """
+    ALTER TABLE ... ADD COLUMN para colunas dos modelos que ainda não
+    existem no banco. Exige server_default (ou coluna anulável). No SQLite,
+    defaults não constantes (ex.: CURRENT_TIMESTAMP) não são aceitos no
+    ADD COLUMN: a coluna entra sem NOT NULL e é preenchida com um UPDATE.
+    Retorna os nomes "tabela.coluna" adicionados.
+    """
+    dialeto = engine.dialect
+    existentes = inspect(engine)
+    adicionadas = []
+    with engine.begin() as conexao:
+        for tabela in Base.metadata.sorted_tables:
+            if not existentes.has_table(tabela.name):
+                continue
+            nomes = {c["name"] for c in existentes.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name in nomes:
+                    continue
+                padrao = coluna.server_default.arg if coluna.server_default is not None else None
+                if padrao is None and not coluna.nullable:
+                    logger.error("Coluna %s.%s sem server_default: migração manual", tabela.name, coluna.name)
+                    continue
+
+                ddl = f"ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {coluna.type.compile(dialect=dialeto)}"
+                preencher = None
+                if isinstance(padrao, str):
+                    ddl += f" DEFAULT {_literal(padrao)}"
+                elif padrao is not None:
+                    expressao = str(padrao.compile(dialect=dialeto))
+                    if dialeto.name == "sqlite":
+                        preencher = expressao
+                    else:
+                        ddl += f" DEFAULT {expressao}"
+                if not coluna.nullable and preencher is None:
+                    ddl += " NOT NULL"
+
+                conexao.execute(text(ddl))
+                if preencher:
+                    conexao.execute(text(f"UPDATE {tabela.name} SET {coluna.name} = {preencher}"))
+                adicionadas.append(f"{tabela.name}.{coluna.name}")
+                logger.info("Coluna adicionada: %s.%s", tabela.name, coluna.name)
+    return adicionadas
+
+# 2) Índices e restrições de unicidade novos em tabelas existentes
+def criar_indices_ausentes(engine: Engine) -> list:
+    """
+    Cria os índices dos modelos que faltam no banco (checkfirst) e recria
+    os que existem com unicidade diferente. UniqueConstraint de tabela
+    vira um índice único de mesmo nome (ALTER TABLE ADD CONSTRAINT não
+    existe no SQLite). Índices únicos que falham por dados duplicados são
+    registrados no log e ignorados. Retorna os nomes criados.
+    """
+    existentes = inspect(engine)
+    criados = []
+    for tabela in Base.metadata.sorted_tables:
+        if not existentes.has_table(tabela.name):
+            continue
+        no_banco = {i["name"]: bool(i["unique"]) for i in existentes.get_indexes(tabela.name)}
+        no_banco.update({u["name"]: True for u in existentes.get_unique_constraints(tabela.name) if u["name"]})
+
+        for indice in tabela.indexes:
+            if no_banco.get(indice.name) == bool(indice.unique):
+                continue
+            def _criar(conexao, indice=indice):
+                if indice.name in no_banco:
+                    indice.drop(conexao)
+                indice.create(conexao, checkfirst=True)
+            if _executar(engine, indice.name, _criar):
+                criados.append(indice.name)
+
+        for restricao in tabela.constraints:
+            if not isinstance(restricao, UniqueConstraint) or not restricao.name or restricao.name in no_banco:
+                continue
+            colunas = ", ".join(c.name for c in restricao.columns)
+            ddl = text(f"CREATE UNIQUE INDEX {restricao.name} ON {tabela.name} ({colunas})")
+            if _executar(engine, restricao.name, lambda conexao, ddl=ddl: conexao.execute(ddl)):
+                criados.append(restricao.name)
+    return criados
+
+def _executar(engine: Engine, nome: str, criar) -> bool:
+    try:
+        with engine.begin() as conexao:
+            criar(conexao)
+    except SQLAlchemyError as err:
+        logger.error("Índice %s não criado: %s", nome, err)
+        return False
+    logger.info("Índice criado: %s", nome)
+    return True
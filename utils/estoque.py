@@ -0,0 +1,112 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+
+from models.suprimento import LoteSuprimento, MovimentacaoEstoque, Suprimento
+
+# 1) Ajuste atômico do estoque consolidado
+def _ajustar_estoque(db: Session, suprimento_id: int, delta: int) -> bool:
+    """
+    UPDATE condicional: soma `delta` apenas se o estoque não ficar negativo
+    (mesma regra de chk_quantidade_nao_negativa). Não faz commit.
+    """
+    alterados = (
+        db.query(Suprimento)
+          .filter(Suprimento.id == suprimento_id, Suprimento.quantidade + delta >= 0)
+          .update({Suprimento.quantidade: Suprimento.quantidade + delta}, synchronize_session="fetch")
+    )
+    return alterados == 1
+
+# 2) Movimentações
+def registrar_entrada(
+    db: Session,
+    suprimento_id: int,
+    quantidade: int,
+    data_validade: Optional[datetime] = None,
+    codigo_lote: Optional[str] = None
+) -> List[MovimentacaoEstoque]:
+    """
+    Recebe estoque em um lote (reaproveitando lote com mesmo código e validade).
+    Não faz commit.
+    """
+    lote = None
+    if codigo_lote:
+        lote = db.query(LoteSuprimento).filter_by(
+            suprimento_id=suprimento_id, codigo=codigo_lote, data_validade=data_validade
+        ).first()
+    if lote:
+        db.query(LoteSuprimento).filter_by(id=lote.id).update(
+            {LoteSuprimento.quantidade: LoteSuprimento.quantidade + quantidade},
+            synchronize_session="fetch"
+        )
+    else:
+        lote = LoteSuprimento(
+            suprimento_id=suprimento_id, codigo=codigo_lote,
+            data_validade=data_validade, quantidade=quantidade
+        )
+        db.add(lote)
+        db.flush()
+
+    _ajustar_estoque(db, suprimento_id, quantidade)
+    mov = MovimentacaoEstoque(
+        suprimento_id=suprimento_id, lote_id=lote.id, tipo="entrada", quantidade=quantidade
+    )
+    db.add(mov)
+    db.flush()
+    return [mov]
+
+def registrar_saida(db: Session, suprimento_id: int, quantidade: int) -> Optional[List[MovimentacaoEstoque]]:
+    """
+    Consome estoque pelos lotes que vencem primeiro (FEFO).
+    Retorna None se o estoque for insuficiente. Não faz commit.
+    """
+    if not _ajustar_estoque(db, suprimento_id, -quantidade):
+        return None
+
+    movimentacoes = []
+    restante = quantidade
+    while restante > 0:
+        lotes = (
+            db.query(LoteSuprimento)
+              .filter(LoteSuprimento.suprimento_id == suprimento_id, LoteSuprimento.quantidade > 0)
+              .order_by(LoteSuprimento.data_validade.asc().nulls_last(), LoteSuprimento.id)
+              .limit(10)
+              .populate_existing()
+              .all()
+        )
+        if not lotes:
+            # Estoque anterior ao controle por lotes
+            movimentacoes.append(MovimentacaoEstoque(
+                suprimento_id=suprimento_id, tipo="saida", quantidade=restante
+            ))
+            break
+
+        for lote in lotes:
+            retirar = min(lote.quantidade, restante)
+            # Decremento condicional: outro consumo concorrente pode ter esvaziado o lote
+            alterados = (
+                db.query(LoteSuprimento)
+                  .filter(LoteSuprimento.id == lote.id, LoteSuprimento.quantidade >= retirar)
+                  .update({LoteSuprimento.quantidade: LoteSuprimento.quantidade - retirar},
+                          synchronize_session="fetch")
+            )
+            if not alterados:
+                continue
+            movimentacoes.append(MovimentacaoEstoque(
+                suprimento_id=suprimento_id, lote_id=lote.id, tipo="saida", quantidade=retirar
+            ))
+            restante -= retirar
+            if not restante:
+                break
+
+    db.add_all(movimentacoes)
+    db.flush()
+    return movimentacoes
+
+def listar_lotes_fefo(db: Session, suprimento_id: int) -> List[LoteSuprimento]:
+    return (
+        db.query(LoteSuprimento)
+          .filter(LoteSuprimento.suprimento_id == suprimento_id, LoteSuprimento.quantidade > 0)
+          .order_by(LoteSuprimento.data_validade.asc().nulls_last(), LoteSuprimento.id)
+          .all()
+    )
@@ -0,0 +1,232 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Sequence, Tuple
+from sqlalchemy import Date, Numeric, case, cast, func, insert, select, type_coerce
+from sqlalchemy.orm import Session
+
+from models.financeiro import ConsolidadoFinanceiroDiario, LancamentoFinanceiro
+
+DIMENSOES = ("unidade", "categoria", "dia", "mes")
+
+Lanc = LancamentoFinanceiro
+Cons = ConsolidadoFinanceiroDiario
+
+# Colunas equivalentes nas duas fontes: lançamentos brutos e consolidado diário
+FONTE_BRUTA = {
+    "data": Lanc.data_lancamento, "unidade": Lanc.unidade,
+    "categoria": Lanc.categoria, "tipo": Lanc.tipo, "valor": Lanc.valor,
+}
+FONTE_CONSOLIDADA = {
+    "data": Cons.dia, "unidade": func.nullif(Cons.unidade, ""),
+    "categoria": Cons.categoria, "tipo": Cons.tipo, "valor": Cons.total,
+}
+
+# 1) Expressões de agrupamento
+def _dialeto(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+def _dia(db: Session, coluna):
+    if _dialeto(db) == "sqlite":
+        return func.date(coluna)
+    return cast(coluna, Date)
+
+def _dimensao(db: Session, nome: str, fonte: dict):
+    if nome in ("unidade", "categoria"):
+        return fonte[nome]
+    formato = "%Y-%m-%d" if nome == "dia" else "%Y-%m"
+    if _dialeto(db) == "sqlite":
+        return func.strftime(formato, fonte["data"])
+    return func.to_char(fonte["data"], "YYYY-MM-DD" if nome == "dia" else "YYYY-MM")
+
+def _soma(tipo: str, fonte: dict):
+    # SUM em Numeric: o driver devolve Decimal exato em vez de float
+    return type_coerce(
+        func.coalesce(func.sum(
+            case((func.lower(fonte["tipo"]) == tipo, fonte["valor"]), else_=0)
+        ), 0),
+        Numeric(14, 2)
+    )
+
+def _agregar(db: Session, fonte: dict, filtros: list, agrupar: Sequence[str]) -> Dict[Tuple, list]:
+    colunas = [_dimensao(db, d, fonte).label(d) for d in agrupar]
+    query = db.query(*colunas, _soma("receita", fonte), _soma("despesa", fonte)).filter(*filtros)
+    if colunas:
+        query = query.group_by(*colunas)
+    return {
+        tuple(linha[:len(agrupar)]): [Decimal(linha[-2] or 0), Decimal(linha[-1] or 0)]
+        for linha in query.all()
+    }
+
+# 2) Resumo: dias inteiros do consolidado, bordas dos lançamentos brutos
+def resumir_lancamentos(
+    db: Session,
+    inicio: datetime,
+    fim: datetime,
+    agrupar: Sequence[str] = ()
+) -> List[dict]:
+    """
+    Receita, despesa e saldo do período via SUM ... GROUP BY.
+    Dias totalmente contidos no período são lidos do consolidado diário;
+    apenas as frações de dia nas bordas consultam os lançamentos.
+    Sem `agrupar`, retorna uma única linha com o total.
+    """
+    data = Lanc.data_lancamento
+    primeiro = inicio.date() if inicio.time() == time.min else inicio.date() + timedelta(days=1)
+    ultimo = fim.date() - timedelta(days=1)
+    inicio_cheio = datetime.combine(primeiro, time.min, inicio.tzinfo)
+    fim_cheio = datetime.combine(ultimo + timedelta(days=1), time.min, fim.tzinfo)
+
+    if primeiro <= ultimo:
+        parciais = [
+            _agregar(db, FONTE_CONSOLIDADA, [Cons.dia.between(primeiro, ultimo)], agrupar),
+            _agregar(db, FONTE_BRUTA, [data >= inicio, data < inicio_cheio], agrupar),
+            _agregar(db, FONTE_BRUTA, [data >= fim_cheio, data <= fim], agrupar),
+        ]
+    else:
+        parciais = [_agregar(db, FONTE_BRUTA, [data.between(inicio, fim)], agrupar)]
+
+    totais: Dict[Tuple, list] = {} if agrupar else {(): [Decimal("0"), Decimal("0")]}
+    for parcial in parciais:
+        for chave, (receita, despesa) in parcial.items():
+            atual = totais.setdefault(chave, [Decimal("0"), Decimal("0")])
+            atual[0] += receita
+            atual[1] += despesa
+
+    resultado = []
+    for chave in sorted(totais, key=lambda c: [(v is None, v or "") for v in c]):
+        receita, despesa = totais[chave]
+        resultado.append({
+            **dict(zip(agrupar, chave)),
+            "receita": receita,
+            "despesa": despesa,
+            "saldo": receita - despesa,
+        })
+    return resultado
+
+# 3) Manutenção do consolidado
+def _somar_consolidado(db: Session, valores: dict) -> None:
+    dialeto = _dialeto(db)
+    if dialeto in ("sqlite", "postgresql"):
+        if dialeto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(Cons).values(**valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["dia", "unidade", "categoria", "tipo"],
+            set_={
+                "total": Cons.total + stmt.excluded.total,
+                "quantidade": Cons.quantidade + stmt.excluded.quantidade,
+            }
+        )
+        db.execute(stmt)
+        return
+
+    alterados = (
+        db.query(Cons)
+          .filter_by(dia=valores["dia"], unidade=valores["unidade"],
+                     categoria=valores["categoria"], tipo=valores["tipo"])
+          .update({Cons.total: Cons.total + valores["total"],
+                   Cons.quantidade: Cons.quantidade + valores["quantidade"]},
+                  synchronize_session=False)
+    )
+    if not alterados:
+        db.execute(insert(Cons).values(**valores))
+
+def consolidar_lote(db: Session, lancamentos: Sequence[dict]) -> None:
+    """
+    Soma lançamentos (dicts com as colunas do modelo) ao consolidado diário,
+    com um upsert por (dia, unidade, categoria, tipo). Não faz commit:
+    deve ir na mesma transação que insere os lançamentos.
+    """
+    grupos: Dict[Tuple, list] = {}
+    for lanc in lancamentos:
+        chave = (
+            lanc["data_lancamento"].date(),
+            lanc.get("unidade") or "",
+            lanc["categoria"],
+            lanc["tipo"].lower(),
+        )
+        grupo = grupos.setdefault(chave, [Decimal("0"), 0])
+        grupo[0] += Decimal(str(lanc["valor"]))
+        grupo[1] += 1
+
+    for (dia, unidade, categoria, tipo), (total, quantidade) in grupos.items():
+        _somar_consolidado(db, {
+            "dia": dia, "unidade": unidade, "categoria": categoria,
+            "tipo": tipo, "total": total, "quantidade": quantidade,
+        })
+
+def consolidar_lancamento(db: Session, lanc: LancamentoFinanceiro) -> None:
+    """
+    Soma um lançamento ao consolidado do dia (upsert). Não faz commit.
+    """
+    consolidar_lote(db, [{
+        "data_lancamento": lanc.data_lancamento,
+        "unidade": lanc.unidade,
+        "categoria": lanc.categoria,
+        "tipo": lanc.tipo,
+        "valor": lanc.valor,
+    }])
+
+def _agregado_bruto(db: Session):
+    dia = _dia(db, Lanc.data_lancamento)
+    unidade = func.coalesce(Lanc.unidade, "")
+    tipo = func.lower(Lanc.tipo)
+    return select(
+        dia, unidade, Lanc.categoria, tipo,
+        func.sum(Lanc.valor), func.count(Lanc.id)
+    ).group_by(dia, unidade, Lanc.categoria, tipo)
+
+def reconstruir_consolidado(db: Session) -> int:
+    """
+    Recria o consolidado a partir dos lançamentos. Retorna o nº de linhas.
+    """
+    db.query(Cons).delete(synchronize_session=False)
+    db.execute(
+        insert(Cons).from_select(
+            ["dia", "unidade", "categoria", "tipo", "total", "quantidade"],
+            _agregado_bruto(db)
+        )
+    )
+    db.commit()
+    return db.query(func.count(Cons.id)).scalar()
+
+def semear_consolidado(db: Session) -> bool:
+    """
+    Carga inicial do consolidado em bancos que já tinham lançamentos
+    (create_all cria a tabela vazia). Retorna True se reconstruiu.
+    """
+    if db.query(Cons.id).first() or not db.query(Lanc.id).first():
+        return False
+    reconstruir_consolidado(db)
+    return True
+
+def verificar_consolidado(db: Session) -> List[dict]:
+    """
+    Compara o consolidado com os lançamentos brutos e lista as divergências.
+    """
+    def _chave(dia, unidade, categoria, tipo) -> Tuple:
+        return (str(dia)[:10], unidade, categoria, tipo)
+
+    bruto = {
+        _chave(*linha[:4]): (Decimal(str(linha[4])).quantize(Decimal("0.01")), linha[5])
+        for linha in db.execute(_agregado_bruto(db))
+    }
+    consolidado = {
+        _chave(c.dia, c.unidade, c.categoria, c.tipo): (Decimal(str(c.total)), c.quantidade)
+        for c in db.query(Cons)
+    }
+
+    divergencias = []
+    for chave in sorted(bruto.keys() | consolidado.keys()):
+        esperado = bruto.get(chave, (Decimal("0.00"), 0))
+        atual = consolidado.get(chave, (Decimal("0.00"), 0))
+        if esperado != atual:
+            divergencias.append({
+                "dia": chave[0], "unidade": chave[1] or None,
+                "categoria": chave[2], "tipo": chave[3],
+                "esperado": esperado[0], "consolidado": atual[0],
+                "quantidade_esperada": esperado[1], "quantidade_consolidada": atual[1],
+            })
+    return divergencias
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+from typing import Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from settings import settings
+from utils.cache import criar_backend
+
+ENTIDADE = "idempotencia"
+CABECALHO = "idempotency-key"
+_RESERVA = {"concluida": False, "impressao": None, "resposta": None}
+
+# 1) Armazém das respostas: limitado (LRU) e com expiração, sobre os backends do cache
+class ArmazemIdempotencia:
+    """
+    Cada chave passa por "em andamento" (reserva atômica no backend, que
+    expira em `ttl_reserva` se o worker morrer e é renovada enquanto a rota
+    executa) e "concluída" (impressão do corpo e resposta, expira em `ttl`).
+    Com o backend SQLite a reserva vale entre workers.
+    """
+
+    def __init__(self, backend, ttl: float, ttl_reserva: float = 60):
+        self.backend = backend
+        self.ttl = ttl
+        self.ttl_reserva = ttl_reserva
+
+    def reservar(self, chave: tuple) -> Tuple[str, Optional[dict]]:
+        """
+        Retorna ("nova", None), ("em_andamento", None) ou ("concluida", item).
+        """
+        while True:
+            if self.backend.reservar(ENTIDADE, chave, _RESERVA, self.ttl_reserva):
+                return "nova", None
+            achou, item = self.backend.obter(ENTIDADE, chave)
+            if achou:
+                return ("concluida", item) if item["concluida"] else ("em_andamento", None)
+            # Venceu entre as duas chamadas: tenta reservar de novo
+
+    def renovar(self, chave: tuple) -> None:
+        self.backend.guardar(ENTIDADE, chave, _RESERVA, self.ttl_reserva)
+
+    def gravar(self, chave: tuple, impressao: str, resposta: Optional[dict]) -> None:
+        # resposta None: processada, mas grande demais para reenviar
+        self.backend.guardar(
+            ENTIDADE, chave, {"concluida": True, "impressao": impressao, "resposta": resposta}, self.ttl
+        )
+
+    def liberar(self, chave: tuple) -> None:
+        self.backend.remover(ENTIDADE, chave)
+
+    def limpar(self) -> None:
+        self.backend.invalidar(ENTIDADE)
+
+armazem_idempotencia = ArmazemIdempotencia(criar_backend(settings.idempotencia_max_itens), settings.idempotencia_ttl)
+
+def _resumo(dados: bytes, tamanho: int = 16) -> str:
+    return hashlib.blake2b(dados, digest_size=tamanho).hexdigest()
+
+def _erro(status: int, detalhe: str) -> JSONResponse:
+    return JSONResponse({"detail": detalhe}, status_code=status)
+
+# 2) Middleware ASGI
+class MiddlewareIdempotencia:
+    """
+    POSTs com o cabeçalho Idempotency-Key: a primeira resposta (status
+    < 500) é guardada e repetida, com Idempotent-Replayed: true, nas
+    retentativas com a mesma chave, sem executar a rota. A chave vale por
+    rota e credencial; reutilizá-la com outro corpo dá 422 e repeti-la
+    enquanto a primeira ainda executa dá 409. Erros 5xx liberam a chave.
+    O corpo segue em streaming para a rota; só sua impressão é calculada.
+    """
+
+    def __init__(
+        self,
+        app,
+        armazem: ArmazemIdempotencia = armazem_idempotencia,
+        metodos=("POST",),
+        resposta_maxima: Optional[int] = None
+    ):
+        self.app = app
+        self.armazem = armazem
+        self.metodos = metodos
+        self.resposta_maxima = resposta_maxima or settings.idempotencia_resposta_maxima
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.metodos:
+            return await self.app(scope, receive, send)
+        cabecalhos = Headers(scope=scope)
+        valor = cabecalhos.get(CABECALHO)
+        if valor is None:
+            return await self.app(scope, receive, send)
+        if not valor or len(valor) > 255:
+            return await _erro(400, "Idempotency-Key deve ter entre 1 e 255 caracteres")(scope, receive, send)
+
+        chave = (
+            scope["method"], scope["path"],
+            _resumo(cabecalhos.get("authorization", "").encode(), 8), valor
+        )
+        impressao = hashlib.blake2b(scope.get("query_string", b"") + b"\n", digest_size=16)
+        situacao, item = await run_in_threadpool(self.armazem.reservar, chave)
+        if situacao == "em_andamento":
+            return await _erro(409, "Requisição com esta Idempotency-Key ainda em andamento")(scope, receive, send)
+        if situacao == "concluida":
+            return await self._repetir(item, impressao, scope, receive, send)
+
+        corpo_lido = False
+        async def receber():
+            nonlocal corpo_lido
+            mensagem = await receive()
+            if mensagem["type"] == "http.request":
+                impressao.update(mensagem.get("body", b""))
+                corpo_lido = not mensagem.get("more_body")
+            return mensagem
+
+        inicio, partes, tamanho = {}, [], 0
+        async def enviar(mensagem):
+            nonlocal partes, tamanho
+            if mensagem["type"] == "http.response.start":
+                inicio.update(mensagem)
+            elif mensagem["type"] == "http.response.body" and partes is not None:
+                tamanho += len(mensagem.get("body", b""))
+                if tamanho > self.resposta_maxima:
+                    partes = None
+                else:
+                    partes.append(mensagem.get("body", b""))
+            await send(mensagem)
+
+        renovacao = asyncio.create_task(self._renovar(chave))
+        concluida = False
+        try:
+            await self.app(scope, receber, enviar)
+            # Rotas sem corpo (ou que não o leram inteiro): o restante entra na impressão
+            while not corpo_lido:
+                if (await receber())["type"] == "http.disconnect":
+                    break
+            concluida = True
+        finally:
+            renovacao.cancel()
+            try:
+                await renovacao  # espera uma renovação em curso: não pode sobrescrever a gravação
+            except asyncio.CancelledError:
+                pass
+            if concluida and corpo_lido and inicio and inicio["status"] < 500:
+                resposta = None
+                if partes is not None:
+                    resposta = {
+                        "status": inicio["status"],
+                        "headers": list(inicio.get("headers", [])),
+                        "corpo": b"".join(partes),
+                    }
+                await run_in_threadpool(self.armazem.gravar, chave, impressao.hexdigest(), resposta)
+            else:
+                await run_in_threadpool(self.armazem.liberar, chave)
+
+    async def _renovar(self, chave: tuple) -> None:
+        # Rotas longas (ex.: importação em lote) mantêm a reserva viva
+        while True:
+            await asyncio.sleep(self.armazem.ttl_reserva / 3)
+            await run_in_threadpool(self.armazem.renovar, chave)
+
+    async def _repetir(self, item: dict, impressao, scope, receive, send):
+        # Só a impressão do corpo da retentativa é calculada, pedaço a pedaço
+        while True:
+            mensagem = await receive()
+            if mensagem["type"] == "http.disconnect":
+                return
+            impressao.update(mensagem.get("body", b""))
+            if not mensagem.get("more_body"):
+                break
+        if impressao.hexdigest() != item["impressao"]:
+            return await _erro(422, "Idempotency-Key já usada com outra requisição")(scope, receive, send)
+        resposta = item["resposta"]
+        if resposta is None:
+            return await _erro(
+                409, "Requisição já processada; a resposta excede o limite para reenvio"
+            )(scope, receive, send)
+        await send({
+            "type": "http.response.start",
+            "status": resposta["status"],
+            "headers": resposta["headers"] + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": resposta["corpo"]})
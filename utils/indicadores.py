@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Sequence
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.internacao import Internacao
+from models.leito import Leito
+from utils.cache import CacheTTL
+
+DIMENSOES = ("unidade", "motivo")
+JANELA_READMISSAO = timedelta(days=30)
+
+_cache = CacheTTL(ttl=300)  # 5 minutos
+
+# 1) Carga colunar
+def _datas(valores: Sequence[datetime]) -> np.ndarray:
+    # datetime64 não guarda fuso: normaliza para UTC ingênuo (None -> NaT)
+    return np.array(
+        [v.astimezone(timezone.utc).replace(tzinfo=None) if v and v.tzinfo else v for v in valores],
+        dtype="datetime64[s]"
+    )
+
+def _carregar(db: Session, inicio: datetime, fim: datetime) -> Dict[str, np.ndarray]:
+    """
+    Uma única consulta de projeção. Inclui entradas até 30 dias após `fim`
+    para enxergar readmissões das altas do período.
+    """
+    linhas = (
+        db.query(
+            Internacao.paciente_id,
+            Internacao.data_entrada,
+            Internacao.data_alta,
+            Internacao.motivo,
+            Leito.unidade
+        )
+          .join(Leito, Internacao.leito_id == Leito.id)
+          .filter(Internacao.data_entrada.between(inicio, fim + JANELA_READMISSAO))
+          .all()
+    )
+    paciente, entrada, alta, motivo, unidade = zip(*linhas) if linhas else ((),) * 5
+    return {
+        "paciente_id": np.array(paciente, dtype=np.int64),
+        "entrada": _datas(entrada),
+        "alta": _datas(alta),
+        "motivo": np.array(motivo, dtype=object),
+        "unidade": np.array(unidade, dtype=object),
+    }
+
+# 2) Cálculo vetorizado
+def _calcular(col: Dict[str, np.ndarray], inicio: datetime, fim: datetime, agrupar: Sequence[str]) -> List[dict]:
+    # Readmissão: próxima entrada do mesmo paciente até 30 dias após a alta
+    ordem = np.lexsort((col["entrada"], col["paciente_id"]))
+    pac, ent, alt = col["paciente_id"][ordem], col["entrada"][ordem], col["alta"][ordem]
+    readmitido = np.zeros(len(ordem), dtype=bool)
+    if len(ordem) > 1:
+        mesmo = pac[1:] == pac[:-1]
+        intervalo = ent[1:] - alt[:-1]
+        readmitido[:-1] = mesmo & ~np.isnat(alt[:-1]) & (intervalo <= np.timedelta64(JANELA_READMISSAO))
+    readmissao = np.empty_like(readmitido)
+    readmissao[ordem] = readmitido
+
+    ini, fi = _datas([inicio, fim])
+    no_periodo = (col["entrada"] >= ini) & (col["entrada"] <= fi)
+    if not no_periodo.any():
+        return []
+    alta = col["alta"][no_periodo]
+    com_alta = ~np.isnat(alta)
+    permanencia = (alta - col["entrada"][no_periodo]) / np.timedelta64(1, "D")
+    readmissao = readmissao[no_periodo]
+
+    # Grupos por combinação das dimensões pedidas
+    if agrupar:
+        chaves = np.array(
+            list(zip(*(col[d][no_periodo] for d in agrupar))), dtype=object
+        ).reshape(-1, len(agrupar))
+        rotulos, grupo = np.unique(chaves.astype(str), axis=0, return_inverse=True)
+        grupo = grupo.reshape(-1)
+    else:
+        rotulos, grupo = np.empty((1, 0)), np.zeros(no_periodo.sum(), dtype=np.int64)
+
+    n = len(rotulos)
+    internacoes = np.bincount(grupo, minlength=n)
+    altas = np.bincount(grupo, weights=com_alta, minlength=n)
+    soma = np.bincount(grupo[com_alta], weights=permanencia[com_alta], minlength=n)
+    readm = np.bincount(grupo[com_alta], weights=readmissao[com_alta], minlength=n)
+
+    # Percentis: ordena uma vez por (grupo, permanência) e fatia por grupo
+    ord_p = np.lexsort((permanencia[com_alta], grupo[com_alta]))
+    valores = permanencia[com_alta][ord_p]
+    limites = np.cumsum(altas).astype(np.int64)[:-1]
+    fatias = np.split(valores, limites)
+
+    resultado = []
+    for g in range(n):
+        fatia = fatias[g]
+        p50, p90 = np.percentile(fatia, [50, 90]) if fatia.size else (None, None)
+        resultado.append({
+            **dict(zip(agrupar, rotulos[g])),
+            "internacoes": int(internacoes[g]),
+            "altas": int(altas[g]),
+            "permanencia_media": float(soma[g] / altas[g]) if altas[g] else None,
+            "permanencia_p50": float(p50) if p50 is not None else None,
+            "permanencia_p90": float(p90) if p90 is not None else None,
+            "taxa_readmissao_30d": float(readm[g] / altas[g]) if altas[g] else None,
+        })
+    return resultado
+
+# 3) API com cache por período
+def indicadores_internacao(
+    db: Session,
+    inicio: datetime,
+    fim: datetime,
+    agrupar: Sequence[str] = DIMENSOES
+) -> List[dict]:
+    """
+    Permanência (dias: média, p50, p90) e taxa de readmissão em 30 dias
+    das internações iniciadas entre `inicio` e `fim`, por unidade/motivo.
+    """
+    chave = (inicio, fim, tuple(agrupar))
+    resultado = _cache.obter(chave)
+    if resultado is None:
+        resultado = _calcular(_carregar(db, inicio, fim), inicio, fim, tuple(agrupar))
+        _cache.guardar(chave, resultado)
+    return resultado
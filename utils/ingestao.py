@@ -0,0 +1,210 @@
+import csv
+import json
+import os
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models.financeiro import LancamentoFinanceiro
+from settings import settings
+from utils.financeiro import consolidar_lote
+
+FORMATOS = ("csv", "ndjson")
+LINHA_MAXIMA = 64 * 1024  # bytes
+
+class LinhaInvalida(ValueError):
+    """
+    Linha que interrompe a leitura do corpo (longa demais ou fora de UTF-8).
+    """
+# 1) Leitura incremental do corpo da requisição
+async def linhas_do_corpo(
+    stream: AsyncIterator[bytes],
+    linha_maxima: int = LINHA_MAXIMA
+) -> AsyncIterator[str]:
+    """
+    Converte o stream de bytes em linhas de texto sem carregar o corpo inteiro.
+    Cada registro deve ocupar uma única linha de até `linha_maxima` bytes
+    (LinhaInvalida caso contrário): a memória fica limitada a uma linha e
+    um pedaço.
+    """
+    pendente = bytearray()
+    numero = 0
+
+    def _verificar():
+        if len(pendente) > linha_maxima:
+            raise LinhaInvalida(f"linha excede {linha_maxima} bytes")
+
+    def _texto() -> str:
+        try:
+            return pendente.decode("utf-8-sig").rstrip("\r")
+        except UnicodeDecodeError as exc:
+            raise LinhaInvalida(f"linha não está em UTF-8 ({exc.reason})") from exc
+
+    async for pedaco in stream:
+        inicio = 0
+        while (fim := pedaco.find(b"\n", inicio)) >= 0:
+            pendente += pedaco[inicio:fim]
+            _verificar()
+            numero += 1
+            yield _texto()
+            pendente.clear()
+            inicio = fim + 1
+        pendente += pedaco[inicio:]
+        _verificar()
+    if pendente:
+        yield _texto()
+
+def interpretar_linha(linha: str, formato: str, cabecalho: Optional[List[str]]) -> dict:
+    if formato == "ndjson":
+        return json.loads(linha)
+    [valores] = csv.reader([linha])
+    if len(valores) != len(cabecalho):
+        raise ValueError(f"esperadas {len(cabecalho)} colunas, recebidas {len(valores)}")
+    return dict(zip(cabecalho, valores))
+
+# 2) Importação em blocos
+class ImportacaoLote:
+    """
+    Valida, deduplica e insere lançamentos bloco a bloco, com commit por bloco.
+    As linhas rejeitadas vão para um CSV de erros em `settings.lotes_dir`.
+    """
+
+    def __init__(self, schema: type[BaseModel]):
+        self.schema = schema
+        self.lote_id = uuid.uuid4().hex
+        self.linhas = 0
+        self.inseridos = 0
+        self.duplicados = 0
+        self.erros = 0
+        self.ultima_linha_confirmada = 0
+        self.falha: Optional[str] = None
+        self._arquivo_erros = None
+        self._escritor_erros = None
+
+    @staticmethod
+    def caminho_erros_de(lote_id: str) -> str:
+        return os.path.join(settings.lotes_dir, f"{lote_id}_erros.csv")
+
+    @property
+    def caminho_erros(self) -> str:
+        return self.caminho_erros_de(self.lote_id)
+
+    def registrar_erro(self, numero: int, erro: str, conteudo: str) -> None:
+        if self._escritor_erros is None:
+            os.makedirs(settings.lotes_dir, exist_ok=True)
+            self._arquivo_erros = open(self.caminho_erros, "w", newline="", encoding="utf-8")
+            self._escritor_erros = csv.writer(self._arquivo_erros)
+            self._escritor_erros.writerow(["linha", "erro", "conteudo"])
+        self._escritor_erros.writerow([numero, erro, conteudo])
+        self.erros += 1
+
+    def processar_bloco(self, db: Session, bloco: List[Tuple[int, str, dict]]) -> None:
+        """
+        `bloco`: tuplas (nº da linha, texto original, registro já interpretado).
+        """
+        validos = []
+        for numero, texto, registro in bloco:
+            try:
+                validos.append((numero, texto, self.schema.model_validate(registro).model_dump()))
+            except ValidationError as exc:
+                erro = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+                self.registrar_erro(numero, erro, texto)
+
+        # Deduplicação: dentro do bloco e contra o banco, com uma única consulta
+        referencias = {v["referencia_externa"] for _, _, v in validos if v.get("referencia_externa")}
+        existentes = set()
+        if referencias:
+            existentes = {
+                ref for (ref,) in db.query(LancamentoFinanceiro.referencia_externa)
+                                    .filter(LancamentoFinanceiro.referencia_externa.in_(referencias))
+            }
+        novos = []
+        for numero, texto, valores in validos:
+            ref = valores.get("referencia_externa")
+            if ref and ref in existentes:
+                self.duplicados += 1
+                continue
+            if ref:
+                existentes.add(ref)
+            novos.append(valores)
+
+        if novos:
+            db.execute(insert(LancamentoFinanceiro), novos)
+            consolidar_lote(db, novos)
+        db.commit()
+
+        self.inseridos += len(novos)
+        self.ultima_linha_confirmada = bloco[-1][0]
+
+    async def executar(
+        self,
+        db: Session,
+        linhas: AsyncIterator[str],
+        formato: str,
+        retomar_apos: int = 0
+    ) -> dict:
+        """
+        Consome as linhas em blocos de `settings.lote_tamanho_bloco`.
+        Linhas até `retomar_apos` (inclusive) são puladas, permitindo
+        retomar a partir do último bloco confirmado de uma execução anterior.
+        """
+        cabecalho = None
+        bloco: List[Tuple[int, str, dict]] = []
+        numero = 0
+        try:
+            async for linha in linhas:
+                numero += 1
+                if formato == "csv" and cabecalho is None:
+                    [cabecalho] = csv.reader([linha])
+                    continue
+                if numero <= retomar_apos or not linha.strip():
+                    continue
+
+                self.linhas += 1
+                try:
+                    bloco.append((numero, linha, interpretar_linha(linha, formato, cabecalho)))
+                except ValueError as exc:
+                    self.registrar_erro(numero, str(exc), linha)
+                if len(bloco) >= settings.lote_tamanho_bloco:
+                    await run_in_threadpool(self.processar_bloco, db, bloco)
+                    bloco = []
+            if bloco:
+                await run_in_threadpool(self.processar_bloco, db, bloco)
+            self.ultima_linha_confirmada = numero
+        except LinhaInvalida as exc:
+            # Confirma as linhas válidas anteriores e para na linha com problema
+            self.falha = f"linha {numero + 1}: {exc}"
+            try:
+                if bloco:
+                    await run_in_threadpool(self.processar_bloco, db, bloco)
+                self.ultima_linha_confirmada = numero
+            except SQLAlchemyError as erro:
+                db.rollback()
+                self.falha += f"; {erro.__cause__ or erro}"
+        except SQLAlchemyError as exc:
+            db.rollback()
+            self.falha = str(exc.__cause__ or exc)
+        finally:
+            self.fechar()
+        return self.resumo()
+
+    def fechar(self) -> None:
+        if self._arquivo_erros:
+            self._arquivo_erros.close()
+
+    def resumo(self) -> dict:
+        return {
+            "lote_id": self.lote_id,
+            "linhas": self.linhas,
+            "inseridos": self.inseridos,
+            "duplicados": self.duplicados,
+            "erros": self.erros,
+            "ultima_linha_confirmada": self.ultima_linha_confirmada,
+            "interrompido": self.falha is not None,
+            "falha": self.falha,
+            "arquivo_erros": self.lote_id if self.erros else None,
+        }
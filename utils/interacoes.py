@@ -0,0 +1,147 @@
+import argparse
+import csv
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy.orm import Session
+
+from models.prescricao import Prescricao
+from settings import settings
+from utils.texto import normalizar
+
+logger = logging.getLogger("utils.interacoes")
+
+GRAVIDADES = ("leve", "moderada", "grave", "contraindicada")
+COLUNAS_CSV = ("medicamento_a", "medicamento_b", "gravidade", "descricao")
+
+def _par(a: str, b: str) -> Tuple[str, str]:
+    return (a, b) if a <= b else (b, a)
+
+# 1) Índice de pares em memória
+class IndiceInteracoes:
+    """
+    Tabela de interações (CSV) compilada num dicionário indexado pelo par
+    normalizado de medicamentos. Recarrega sozinho quando o arquivo muda
+    (verificação de mtime no máximo a cada `intervalo` segundos).
+    """
+
+    def __init__(self, caminho: str, intervalo: float = 5.0):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._pares: Dict[Tuple[str, str], dict] = {}
+        self._mtime = None
+        self._verificado_em = 0.0
+
+    def carregar(self) -> int:
+        """
+        Compila o CSV num novo dicionário e o publica por troca de referência:
+        leituras concorrentes veem o índice antigo ou o novo, nunca um parcial.
+        """
+        try:
+            mtime = os.stat(self.caminho).st_mtime
+        except FileNotFoundError:
+            logger.warning("Tabela de interações não encontrada: %s", self.caminho)
+            self._pares, self._mtime = {}, None
+            return 0
+
+        pares = {}
+        with open(self.caminho, newline="", encoding="utf-8-sig") as arquivo:
+            for numero, linha in enumerate(csv.DictReader(arquivo), start=2):
+                gravidade = (linha.get("gravidade") or "").strip().lower()
+                a, b = normalizar(linha.get("medicamento_a") or ""), normalizar(linha.get("medicamento_b") or "")
+                if not a or not b or gravidade not in GRAVIDADES:
+                    logger.warning("Linha %d ignorada em %s", numero, self.caminho)
+                    continue
+                pares[_par(a, b)] = {
+                    "gravidade": gravidade,
+                    "descricao": (linha.get("descricao") or "").strip(),
+                }
+        self._pares, self._mtime = pares, mtime
+        return len(pares)
+
+    def _recarregar_se_alterado(self) -> None:
+        agora = time.monotonic()
+        if agora - self._verificado_em < self.intervalo:
+            return
+        with self._lock:
+            if agora - self._verificado_em < self.intervalo:
+                return
+            self._verificado_em = agora
+            try:
+                mtime = os.stat(self.caminho).st_mtime
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self._mtime:
+                self.carregar()
+
+    def verificar(self, novo: str, em_uso: Iterable[str]) -> List[dict]:
+        """
+        Interações do `novo` medicamento com cada um de `em_uso`: O(k) buscas.
+        """
+        self._recarregar_se_alterado()
+        pares = self._pares
+        chave_novo = normalizar(novo)
+        encontradas = []
+        for medicamento in em_uso:
+            interacao = pares.get(_par(chave_novo, normalizar(medicamento)))
+            if interacao:
+                encontradas.append({"medicamento": medicamento, **interacao})
+        return encontradas
+
+    def __len__(self) -> int:
+        return len(self._pares)
+
+indice_interacoes = IndiceInteracoes(settings.interacoes_csv)
+
+# 2) Verificação contra as prescrições ativas do paciente
+def interacoes_prescricao(db: Session, paciente_id: int, medicamento: str) -> List[dict]:
+    """
+    Prescrições dos últimos `settings.interacoes_janela_dias` dias contam
+    como ativas. Uma única consulta (índice paciente_id, data_prescricao).
+    """
+    desde = datetime.now() - timedelta(days=settings.interacoes_janela_dias)
+    em_uso = [
+        m for (m,) in db.query(Prescricao.medicamento)
+                        .filter(Prescricao.paciente_id == paciente_id, Prescricao.data_prescricao >= desde)
+                        .distinct()
+    ]
+    return indice_interacoes.verificar(medicamento, em_uso)
+
+def bloqueantes(interacoes: List[dict]) -> List[dict]:
+    return [i for i in interacoes if i["gravidade"] in settings.interacoes_gravidades_bloqueio]
+
+# 3) Benchmark de latência das buscas
+def medir_latencia(indice: IndiceInteracoes, em_uso: int = 10, repeticoes: int = 10000) -> dict:
+    medicamentos = sorted({m for par in indice._pares for m in par}) or ["a", "b"]
+    amostras = []
+    for _ in range(repeticoes):
+        lista = random.choices(medicamentos, k=em_uso)
+        novo = random.choice(medicamentos)
+        inicio = time.perf_counter()
+        indice.verificar(novo, lista)
+        amostras.append(time.perf_counter() - inicio)
+    amostras.sort()
+    return {
+        "pares": len(indice),
+        "em_uso": em_uso,
+        "p50_us": round(amostras[len(amostras) // 2] * 1e6, 2),
+        "p99_us": round(amostras[int(len(amostras) * 0.99)] * 1e6, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do índice de interações")
+    parser.add_argument("--csv", default=settings.interacoes_csv)
+    parser.add_argument("--em-uso", type=int, default=10)
+    parser.add_argument("--repeticoes", type=int, default=10000)
+    args = parser.parse_args()
+
+    indice = IndiceInteracoes(args.csv)
+    inicio = time.perf_counter()
+    indice.carregar()
+    print(f"compilação: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    print(medir_latencia(indice, args.em_uso, args.repeticoes))
@@ -0,0 +1,60 @@
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session
+
+from models.leito import Leito
+from utils.alteracoes import registrar_alteracao
+
+# 1) Reserva atômica de leitos
+def ocupar_leito(db: Session, leito_id: int) -> bool:
+    """
+    Marca o leito como ocupado com um UPDATE condicional (ocupado = false).
+    Retorna False se outra transação já o ocupou. Não faz commit.
+    """
+    alterados = (
+        db.query(Leito)
+          .filter(Leito.id == leito_id, Leito.ocupado.is_(False))
+          .update({Leito.ocupado: True}, synchronize_session="fetch")
+    )
+    if alterados == 1:
+        # UPDATE em massa não passa pelos eventos do ORM
+        registrar_alteracao(db.connection(), Leito, leito_id)
+    return alterados == 1
+
+def reservar_leito(
+    db: Session,
+    unidade: str,
+    tipo: str,
+    excluidos: Iterable[int] = (),
+    lote: int = 10
+) -> Optional[Leito]:
+    """
+    Escolhe e ocupa um leito livre da unidade/tipo usando o índice
+    (unidade, tipo, ocupado). Em caso de disputa tenta o próximo candidato.
+    Retorna None se não houver leito livre. Não faz commit.
+    """
+    excluidos = set(excluidos)
+    tentados = set()
+    while True:
+        query = (
+            db.query(Leito)
+              .filter(
+                  Leito.unidade == unidade,
+                  Leito.tipo == tipo,
+                  Leito.ocupado.is_(False)
+              )
+        )
+        if excluidos or tentados:
+            query = query.filter(Leito.id.notin_(excluidos | tentados))
+        candidatos = (
+            query.order_by(Leito.numero, Leito.id)
+                 .limit(lote)
+                 .with_for_update(skip_locked=True)
+                 .all()
+        )
+        if not candidatos:
+            return None
+
+        for leito in candidatos:
+            if ocupar_leito(db, leito.id):
+                return leito
+            tentados.add(leito.id)
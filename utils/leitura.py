@@ -0,0 +1,86 @@
+import gc
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Sequence
+from fastapi import HTTPException, Query as ParametroQuery
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query
+
+Campos = Optional[List[str]]
+
+# 1) Leitura por projeção de colunas
+def colunas_do_schema(modelo, schema: type[BaseModel], extras: Sequence = (), campos: Campos = None) -> list:
+    nomes = campos or schema.model_fields
+    return [getattr(modelo, nome).label(nome) for nome in nomes] + list(extras)
+
+def projetar(
+    consulta: Query,
+    modelo,
+    schema: type[BaseModel],
+    extras: Sequence = (),
+    campos: Campos = None
+) -> Query:
+    """
+    Troca a entidade da consulta pelas colunas do schema de saída (ou só
+    `campos`, mais `extras`), mantendo filtros, ordenação e limite. O
+    resultado são `Row`s: sem identity map, estado de instância ou
+    relacionamentos; o FastAPI os valida pelo response_model como faria
+    com objetos ORM.
+    """
+    return consulta.with_entities(*colunas_do_schema(modelo, schema, extras, campos))
+
+def listar(consulta: Query, modelo, schema: type[BaseModel], campos: Campos = None) -> List[Row]:
+    return projetar(consulta, modelo, schema, campos=campos).all()
+
+def obter(consulta: Query, modelo, schema: type[BaseModel], campos: Campos = None) -> Optional[Row]:
+    return projetar(consulta, modelo, schema, campos=campos).first()
+
+# 2) Conjuntos esparsos de campos (?fields=id,nome)
+def campos_de(schema: type[BaseModel]) -> Callable[..., Campos]:
+    """
+    Dependência que valida `fields` contra os campos do schema de saída.
+    Sem o parâmetro, devolve None (objeto completo).
+    """
+    disponiveis = tuple(schema.model_fields)
+
+    def dependencia(
+        fields: Optional[str] = ParametroQuery(
+            None, description=f"Campos separados por vírgula: {', '.join(disponiveis)}"
+        )
+    ) -> Campos:
+        if fields is None:
+            return None
+        campos = list(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+        invalidos = [c for c in campos if c not in disponiveis]
+        if invalidos or not campos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos inválidos: {', '.join(invalidos) or fields}. Disponíveis: {', '.join(disponiveis)}"
+            )
+        return campos
+    return dependencia
+
+# 3) Medição: objetos ORM x Row
+def medir_leitura(consulta: Query, modelo, schema: type[BaseModel]) -> dict:
+    """
+    Tempo e pico de memória (tracemalloc) para carregar o resultado inteiro.
+    """
+    resultado = {}
+    for nome, carregar in (
+        ("orm", lambda: consulta.all()),
+        ("colunas", lambda: listar(consulta, modelo, schema)),
+    ):
+        consulta.session.expunge_all()
+        gc.collect()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        linhas = carregar()
+        duracao = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        resultado["linhas"] = len(linhas)
+        resultado[f"{nome}_ms"] = round(duracao * 1000, 1)
+        resultado[f"{nome}_pico_mb"] = round(pico / 2**20, 1)
+        del linhas
+    return resultado
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.leito import Leito
+
+# 1) Painel de ocupação em memória
+class PainelOcupacao:
+    """
+    Contadores de leitos livres/ocupados por (unidade, tipo).
+    Carregado uma única vez do banco e atualizado pelas rotas de
+    internação/alta; cada alteração é publicada aos assinantes SSE.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._assinantes: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.inicializado = False
+
+    def inicializar(self, db: Session) -> None:
+        linhas = (
+            db.query(Leito.unidade, Leito.tipo, Leito.ocupado, func.count(Leito.id))
+              .group_by(Leito.unidade, Leito.tipo, Leito.ocupado)
+              .all()
+        )
+        contadores = defaultdict(lambda: {"livres": 0, "ocupados": 0})
+        for unidade, tipo, ocupado, total in linhas:
+            contadores[(unidade, tipo)]["ocupados" if ocupado else "livres"] += total
+
+        with self._lock:
+            self._contadores = dict(contadores)
+            self.inicializado = True
+
+    def resumo(self) -> List[dict]:
+        with self._lock:
+            return [
+                {"unidade": unidade, "tipo": tipo, **valores}
+                for (unidade, tipo), valores in self._contadores.items()
+            ]
+
+    # 2) Atualizações (chamadas após o commit)
+    def _ajustar(self, unidade: str, tipo: str, livres: int, ocupados: int) -> None:
+        with self._lock:
+            if not self.inicializado:
+                return
+            atual = self._contadores.setdefault((unidade, tipo), {"livres": 0, "ocupados": 0})
+            atual["livres"] += livres
+            atual["ocupados"] += ocupados
+            evento = {"unidade": unidade, "tipo": tipo, **atual}
+            assinantes = list(self._assinantes)
+
+        for loop, fila in assinantes:
+            loop.call_soon_threadsafe(fila.put_nowait, evento)
+
+    def leito_cadastrado(self, unidade: str, tipo: str) -> None:
+        self._ajustar(unidade, tipo, livres=1, ocupados=0)
+
+    def leito_ocupado(self, unidade: str, tipo: str) -> None:
+        self._ajustar(unidade, tipo, livres=-1, ocupados=1)
+
+    def leito_liberado(self, unidade: str, tipo: str) -> None:
+        self._ajustar(unidade, tipo, livres=1, ocupados=-1)
+
+    # 3) Server-Sent Events
+    async def eventos(self, intervalo_keepalive: float = 15.0) -> AsyncIterator[str]:
+        """
+        Gera o fluxo SSE: um snapshot inicial seguido de cada alteração.
+        """
+        fila: asyncio.Queue = asyncio.Queue()
+        assinatura = (asyncio.get_running_loop(), fila)
+        with self._lock:
+            self._assinantes.append(assinatura)
+        try:
+            yield f"event: resumo\ndata: {json.dumps(self.resumo())}\n\n"
+            while True:
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=intervalo_keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: ocupacao\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            with self._lock:
+                self._assinantes.remove(assinatura)
+
+painel_ocupacao = PainelOcupacao()
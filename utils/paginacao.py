@@ -0,0 +1,20 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+
+# 1) Cursores opacos para paginação por chave (keyset)
+def codificar_cursor(data: datetime, id_: int) -> str:
+    bruto = json.dumps([data.isoformat(), id_]).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+def decodificar_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data, id_ = json.loads(bruto)
+        return datetime.fromisoformat(data), int(id_)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
@@ -0,0 +1,120 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from typing import Iterator, List, Sequence
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.financeiro import ConsolidadoFinanceiroDiario as Cons
+from utils.cache import CacheTTL
+
+DIMENSOES = ("unidade", "categoria")
+COLUNAS_CSV = ("mes", "receita", "despesa", "saldo", "variacao", "saldo_acumulado")
+
+_cache = CacheTTL(ttl=300)  # 5 minutos
+
+# 1) Carga colunar (consolidado diário: uma linha por dia/unidade/categoria/tipo)
+def _carregar(db: Session, inicio: date, fim: date) -> dict:
+    linhas = (
+        db.query(Cons.dia, Cons.unidade, Cons.categoria, Cons.tipo, Cons.total)
+          .filter(Cons.dia.between(inicio, fim))
+          .all()
+    )
+    dia, unidade, categoria, tipo, total = zip(*linhas) if linhas else ((),) * 5
+    return {
+        "mes": np.array([f"{d:%Y-%m}" for d in dia], dtype="U7"),
+        "unidade": np.array(unidade, dtype=object).astype(str),
+        "categoria": np.array(categoria, dtype=object).astype(str),
+        "tipo": np.array(tipo, dtype=object).astype(str),
+        # centavos inteiros: somas exatas, sem drift de float
+        "centavos": np.array([int(Decimal(str(t)) * 100) for t in total], dtype=np.int64),
+    }
+
+def _reais(centavos: np.ndarray) -> List[Decimal]:
+    return [Decimal(int(c)).scaleb(-2) for c in centavos]
+
+# 2) Pivô vetorizado: linhas (dimensões) x colunas (meses)
+def _pivotar(col: dict, linhas: Sequence[str], inicio: date, fim: date) -> dict:
+    if not col["mes"].size:
+        return {"meses": [], "linhas": []}
+
+    # Todos os meses do período, com ou sem lançamentos: a variação compara meses consecutivos
+    meses = np.arange(
+        np.datetime64(f"{inicio:%Y-%m}", "M"), np.datetime64(f"{fim:%Y-%m}", "M") + 1
+    ).astype("U7")
+    idx_mes = np.searchsorted(meses, col["mes"])
+    if linhas:
+        chaves = np.stack([col[d] for d in linhas], axis=1)
+        rotulos, idx_linha = np.unique(chaves, axis=0, return_inverse=True)
+        idx_linha = idx_linha.reshape(-1)
+    else:
+        rotulos, idx_linha = np.empty((1, 0), dtype=str), np.zeros(col["mes"].size, dtype=np.int64)
+
+    forma = (len(rotulos), len(meses))
+    receita = np.zeros(forma, dtype=np.int64)
+    despesa = np.zeros(forma, dtype=np.int64)
+    eh_receita = col["tipo"] == "receita"
+    eh_despesa = col["tipo"] == "despesa"
+    np.add.at(receita, (idx_linha[eh_receita], idx_mes[eh_receita]), col["centavos"][eh_receita])
+    np.add.at(despesa, (idx_linha[eh_despesa], idx_mes[eh_despesa]), col["centavos"][eh_despesa])
+
+    saldo = receita - despesa
+    variacao = np.diff(saldo, axis=1, prepend=0)
+    acumulado = np.cumsum(saldo, axis=1)
+
+    return {
+        "meses": meses.tolist(),
+        "linhas": [
+            {
+                **dict(zip(linhas, rotulos[i].tolist())),
+                "receita": _reais(receita[i]),
+                "despesa": _reais(despesa[i]),
+                "saldo": _reais(saldo[i]),
+                "variacao": [None] + _reais(variacao[i][1:]),
+                "saldo_acumulado": _reais(acumulado[i]),
+            }
+            for i in range(len(rotulos))
+        ],
+    }
+
+# 3) API com cache por conjunto de parâmetros
+def pivo_financeiro(
+    db: Session,
+    inicio: date,
+    fim: date,
+    linhas: Sequence[str] = DIMENSOES
+) -> dict:
+    """
+    Receita, despesa, saldo, variação mês a mês e saldo acumulado
+    por unidade x categoria x mês.
+    """
+    chave = (inicio, fim, tuple(linhas))
+    pivo = _cache.obter(chave)
+    if pivo is None:
+        pivo = _pivotar(_carregar(db, inicio, fim), tuple(linhas), inicio, fim)
+        _cache.guardar(chave, pivo)
+    return pivo
+
+def limpar_cache() -> None:
+    _cache.limpar()
+
+def pivo_csv(pivo: dict, linhas: Sequence[str]) -> Iterator[str]:
+    """
+    Serializa o pivô em CSV (formato longo), uma linha por vez.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def _linha(valores) -> str:
+        escritor.writerow(valores)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto
+
+    yield _linha([*linhas, *COLUNAS_CSV])
+    for item in pivo["linhas"]:
+        rotulo = [item[d] for d in linhas]
+        for j, mes in enumerate(pivo["meses"]):
+            yield _linha([*rotulo, mes, *(item[c][j] for c in COLUNAS_CSV[1:])])
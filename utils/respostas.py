@@ -0,0 +1,144 @@
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, List
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Boolean, Date, DateTime, Enum, Integer, Numeric, insert
+from sqlalchemy.orm import Query
+
+from settings import settings
+from utils.leitura import Campos, colunas_do_schema, listar, medir_leitura
+
+# 1) Resposta JSON via orjson
+def _padrao(valor: Any):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+class RespostaJSONRapida(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_padrao, option=orjson.OPT_NON_STR_KEYS)
+
+# 2) Caminho rápido para listagens
+def responder_lista(consulta: Query, modelo, schema: type[BaseModel], campos: Campos = None):
+    """
+    Com `settings.respostas_rapidas` ou `campos` (?fields=), serializa as
+    linhas projetadas com orjson, sem validação Pydantic por item; o
+    response_model da rota continua documentando o formato no OpenAPI.
+    Caso contrário, devolve as linhas (validadas pelo FastAPI).
+    """
+    linhas = listar(consulta, modelo, schema, campos)
+    if not (settings.respostas_rapidas or campos):
+        return linhas
+    return RespostaJSONRapida([linha._asdict() for linha in linhas])
+
+def responder_valores(valores: List[dict], campos: Campos = None):
+    """
+    Listas já montadas (ex.: vindas do cache de leitura).
+    """
+    if campos:
+        valores = [{c: v[c] for c in campos} for v in valores]
+    return RespostaJSONRapida(valores) if settings.respostas_rapidas or campos else valores
+
+def responder_item(linha, campos: Campos = None):
+    return RespostaJSONRapida(linha._asdict()) if campos else linha
+
+# 3) Benchmark: linhas/s com validação Pydantic x projeção + orjson
+def medir_listagem(consulta: Query, modelo, schema: type[BaseModel], repeticoes: int = 3) -> dict:
+    adaptador = TypeAdapter(List[schema])
+
+    def _pydantic() -> int:
+        objetos = consulta.all()
+        adaptador.dump_json(adaptador.validate_python(objetos, from_attributes=True))
+        return len(objetos)
+
+    def _rapido() -> int:
+        linhas = consulta.with_entities(*colunas_do_schema(modelo, schema)).all()
+        RespostaJSONRapida([linha._asdict() for linha in linhas])
+        return len(linhas)
+
+    resultado = {}
+    for nome, caminho in (("pydantic", _pydantic), ("rapido", _rapido)):
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            consulta.session.expunge_all()
+            inicio = time.perf_counter()
+            linhas = caminho()
+            melhor = min(melhor, time.perf_counter() - inicio)
+        resultado["linhas"] = linhas
+        resultado[f"{nome}_linhas_s"] = round(linhas / melhor) if melhor else None
+    return resultado
+
+def _semear(db, modelo, quantidade: int) -> None:
+    # Valores sintéticos por tipo de coluna (FKs não são verificadas no SQLite)
+    base = datetime(2020, 1, 1)
+    def valor(coluna, i):
+        tipo = coluna.type
+        if isinstance(tipo, Enum):
+            return tipo.enums[0]
+        if isinstance(tipo, Boolean):
+            return bool(i % 2)
+        if isinstance(tipo, DateTime):
+            return base + timedelta(minutes=i)
+        if isinstance(tipo, Date):
+            return (base + timedelta(days=i % 3650)).date()
+        if isinstance(tipo, Numeric):
+            return Decimal(i % 10000) / 100
+        if isinstance(tipo, Integer):
+            return i % 1000 + 1
+        if "email" in coluna.name:
+            return f"{coluna.name}{i}@example.com"
+        return f"{coluna.name} {i}"
+    colunas = [c for c in modelo.__table__.columns if not c.primary_key]
+    for inicio in range(0, quantidade, 5000):
+        db.execute(insert(modelo.__table__), [
+            {c.name: valor(c, i) for c in colunas}
+            for i in range(inicio, min(inicio + 5000, quantidade))
+        ])
+    db.commit()
+
+if __name__ == "__main__":
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database import Base
+    from models.consulta import Consulta
+    from models.evolucao import EvolucaoClinica
+    from models.financeiro import LancamentoFinanceiro
+    from models.internacao import Internacao
+    from models.paciente import HistoricoClinico, Paciente
+    from models.prescricao import Prescricao
+    from models.suprimento import Suprimento
+    from routers.administracao import LancamentoOut, SuprimentoOut
+    from routers.evolucoes import EvolucaoOut
+    from routers.internacoes import InternacaoOut
+    from routers.pacientes import ConsultaOut, HistoricoOut, PacienteOut, PrescricaoPacienteOut
+
+    parser = argparse.ArgumentParser(description="Benchmark das rotas de listagem")
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--leitura", action="store_true", help="mede ORM x projeção de colunas")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    rotas = [
+        ("listar_internacoes", Internacao, InternacaoOut),
+        ("listar_pacientes", Paciente, PacienteOut),
+        ("listar_historico", HistoricoClinico, HistoricoOut),
+        ("listar_consultas", Consulta, ConsultaOut),
+        ("listar_prescricoes", Prescricao, PrescricaoPacienteOut),
+        ("listar_evolucoes", EvolucaoClinica, EvolucaoOut),
+        ("listar_suprimentos", Suprimento, SuprimentoOut),
+        ("listar_lancamentos", LancamentoFinanceiro, LancamentoOut),
+    ]
+    for nome, modelo, schema in rotas:
+        _semear(db, modelo, args.linhas)
+        if args.leitura:
+            print(nome, medir_leitura(db.query(modelo), modelo, schema))
+        else:
+            print(nome, medir_listagem(db.query(modelo), modelo, schema))
@@ -0,0 +1,8 @@
+import unicodedata
+
+def normalizar(texto: str) -> str:
+    """
+    Chave de comparação: minúsculas, sem acentos e espaços repetidos.
+    """
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return " ".join(sem_acento.lower().split())
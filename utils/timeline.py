@@ -0,0 +1,95 @@
+import heapq
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from models.consulta import Consulta
+from models.evolucao import EvolucaoClinica
+from models.paciente import HistoricoClinico
+from models.prescricao import Prescricao
+from models.telemedicina import ConsultaTelemedicina
+from utils.paginacao import codificar_cursor, decodificar_cursor
+
+# 1) Fontes: (modelo, coluna de data, montagem do evento)
+FONTES = {
+    "historico": (
+        HistoricoClinico, HistoricoClinico.data_registro,
+        lambda h: {"descricao": h.descricao, "profissional": h.profissional},
+    ),
+    "consulta": (
+        Consulta, Consulta.data_hora,
+        lambda c: {"descricao": f"{c.especialidade} ({c.status.value})", "profissional_id": c.profissional_id},
+    ),
+    "prescricao": (
+        Prescricao, Prescricao.data_prescricao,
+        lambda p: {"descricao": f"{p.medicamento}: {p.posologia}", "profissional_id": p.profissional_id},
+    ),
+    "evolucao": (
+        EvolucaoClinica, EvolucaoClinica.data_registro,
+        lambda e: {"descricao": e.anotacoes, "profissional_id": e.profissional_id},
+    ),
+    "teleconsulta": (
+        ConsultaTelemedicina, ConsultaTelemedicina.data_hora,
+        lambda t: {"descricao": f"Teleconsulta ({t.status.value}) {t.observacoes or ''}".rstrip(),
+                   "profissional_id": t.profissional_id},
+    ),
+}
+TIPOS = tuple(FONTES)
+
+# Ordem total entre fontes: (data, id * N + posição da fonte), decrescente.
+# O cursor reaproveita o formato (data, id) de utils.paginacao com essa chave composta.
+def _chave(id_: int, tipo: str) -> int:
+    return id_ * len(TIPOS) + TIPOS.index(tipo)
+
+def _eventos_da_fonte(
+    db: Session,
+    tipo: str,
+    paciente_id: int,
+    posicao: Optional[Tuple[datetime, int]],
+    limite: int
+) -> Iterator[tuple]:
+    modelo, coluna_data, montar = FONTES[tipo]
+    query = db.query(modelo).filter(modelo.paciente_id == paciente_id, coluna_data.isnot(None))
+    if posicao:
+        data, chave = posicao
+        # id * N + pos < chave  <=>  id < teto((chave - pos) / N)
+        id_maximo = -((TIPOS.index(tipo) - chave) // len(TIPOS))
+        query = query.filter(or_(
+            coluna_data < data,
+            and_(coluna_data == data, modelo.id < id_maximo)
+        ))
+    # Uma consulta ordenada por fonte, no índice (paciente_id, data)
+    for registro in query.order_by(coluna_data.desc(), modelo.id.desc()).limit(limite):
+        data_evento = getattr(registro, coluna_data.key)
+        yield (data_evento, _chave(registro.id, tipo), tipo, registro, montar)
+
+# 2) Intercalação k-way
+def timeline_paciente(
+    db: Session,
+    paciente_id: int,
+    limite: int = 50,
+    cursor: Optional[str] = None,
+    tipos: Sequence[str] = TIPOS
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Eventos clínicos do paciente, mais recentes primeiro. Cada fonte contribui
+    com no máximo `limite` + 1 linhas por página; o heap consome só o necessário.
+    """
+    posicao = decodificar_cursor(cursor)
+    fontes = [_eventos_da_fonte(db, t, paciente_id, posicao, limite + 1) for t in tipos]
+    mesclados = heapq.merge(*fontes, key=lambda e: (e[0], e[1]), reverse=True)
+
+    pagina = list(islice(mesclados, limite + 1))
+    proximo = None
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        data, chave = pagina[-1][0], pagina[-1][1]
+        proximo = codificar_cursor(data, chave)
+
+    eventos = [
+        {"tipo": tipo, "id": registro.id, "data": data, **montar(registro)}
+        for data, _, tipo, registro, montar in pagina
+    ]
+    return eventos, proximo
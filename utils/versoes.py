@@ -0,0 +1,72 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import event, update
+
+from models.agenda import AgendaMedica
+from models.profissional import Profissional
+
+# 1) Versão da agenda no profissional: ETag da agenda com uma leitura por chave primária
+def _agenda_alterada(mapper, conexao, alvo):
+    conexao.execute(
+        update(Profissional.__table__)
+          .where(Profissional.__table__.c.id == alvo.profissional_id)
+          .values(
+              agenda_versao=Profissional.__table__.c.agenda_versao + 1,
+              agenda_atualizada_em=datetime.now(timezone.utc)
+          )
+    )
+
+for _evento in ("after_insert", "after_update", "after_delete"):
+    event.listen(AgendaMedica, _evento, _agenda_alterada)
+
+# 2) GET condicional
+def gerar_etag(*partes) -> str:
+    return '"' + "-".join(str(p) for p in partes) + '"'
+
+def resumo_parametros(request: Request) -> str:
+    """
+    Parâmetros de consulta entram no ETag: a mesma versão com outro filtro
+    ou `fields` é outra representação.
+    """
+    consulta = str(request.query_params)
+    return hashlib.blake2b(consulta.encode(), digest_size=6).hexdigest() if consulta else "0"
+
+def _utc(data: datetime) -> datetime:
+    # SQLite devolve datas sem fuso; gravamos sempre em UTC
+    data = data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+    return data.astimezone(timezone.utc).replace(microsecond=0)
+
+def cabecalhos_versao(etag: str, modificado_em: Optional[datetime]) -> dict:
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+    if modificado_em:
+        cabecalhos["Last-Modified"] = format_datetime(_utc(modificado_em), usegmt=True)
+    return cabecalhos
+
+def nao_modificado(request: Request, etag: str, modificado_em: Optional[datetime]) -> Optional[Response]:
+    """
+    Resposta 304 se o cliente já tem esta versão. If-None-Match tem
+    precedência sobre If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        atual = "*" in etags or etag in etags
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        try:
+            desde = parsedate_to_datetime(if_modified_since) if if_modified_since else None
+        except (TypeError, ValueError):
+            desde = None
+        atual = bool(desde and modificado_em and _utc(modificado_em) <= desde)
+    if atual:
+        return Response(status_code=304, headers=cabecalhos_versao(etag, modificado_em))
+    return None
+
+def aplicar_cabecalhos(resultado, response: Response, etag: str, modificado_em: Optional[datetime]):
+    # O corpo pode ser um Response pronto (ex.: ?fields=) ou dados validados pelo FastAPI
+    destino = resultado if isinstance(resultado, Response) else response
+    destino.headers.update(cabecalhos_versao(etag, modificado_em))
+    return resultado